@@ -12,6 +12,11 @@ HEALTH_LOG="/var/log/chicha-store/health.log"
 ERROR_LOG="/var/log/chicha-store/error.log"
 PERFORMANCE_LOG="/var/log/chicha-store/performance.log"
 
+# Routage par sévérité : criticals immédiats, avertissements regroupés (ALERT_ROUTES, ADVANCED_MONITORING_ROUTER_STATE)
+ALERT_ROUTER="$(dirname "$0")/alert_router.py"
+# État propre à ce script : monitoring.sh et advanced-monitoring.sh routent les mêmes clés (site, disk, load)
+export ALERT_ROUTER_STATE="${ADVANCED_MONITORING_ROUTER_STATE:-/tmp/chicha_store_advanced_monitoring_router.json}"
+
 # Fonction générique d'envoi de notification
 send_notification() {
     local message="$1"
@@ -29,10 +34,34 @@ send_notification() {
             ;;
         *)
             echo "Méthode de notification non supportée"
+            return 1
             ;;
     esac
 }
 
+# Passage d'une condition par le routeur ; seuls les envois dus sont notifiés
+notify() {
+    local key="$1"
+    local message="$2"
+    local severity="$3"
+    local value="$4"
+
+    python3 "$ALERT_ROUTER" --channel "$NOTIFICATION_METHOD" route "$key" "$severity" "$message" ${value:+--value "$value"} | deliver_notifications
+}
+
+# Une notification n'est acquittée (retirée des envois dus) qu'une fois livrée ;
+# en cas d'échec, son jeton d'envoi est rendu et elle repart au prochain appel du routeur
+deliver_notifications() {
+    local id severity text
+    while IFS=$'\t' read -r id severity text; do
+        if send_notification "$text" "$severity"; then
+            python3 "$ALERT_ROUTER" ack "$id" < /dev/null
+        else
+            python3 "$ALERT_ROUTER" --channel "$NOTIFICATION_METHOD" nack "$id" < /dev/null
+        fi
+    done
+}
+
 # Notification Discord
 send_discord_notification() {
     local message="$1"
@@ -57,13 +86,13 @@ send_discord_notification() {
 EOF
 )
 
-    curl -X POST -H "Content-Type: application/json" -d "$payload" "$NOTIFICATION_WEBHOOK"
+    curl -fsS -X POST -H "Content-Type: application/json" -d "$payload" "$NOTIFICATION_WEBHOOK"
 }
 
 # Notification Telegram
 send_telegram_notification() {
     local message="$1"
-    curl -s -X POST "https://api.telegram.org/bot${TELEGRAM_BOT_TOKEN}/sendMessage" \
+    curl -fsS -X POST "https://api.telegram.org/bot${TELEGRAM_BOT_TOKEN}/sendMessage" \
          -d "chat_id=${TELEGRAM_CHAT_ID}" \
          -d "text=$message"
 }
@@ -80,13 +109,13 @@ check_system_health() {
     # Vérification de la disponibilité du site
     local http_status=$(curl -o /dev/null -s -w "%{http_code}" https://chicha-store.com)
     if [ "$http_status" -ne 200 ]; then
-        send_notification "Site indisponible. Statut HTTP: $http_status" "critical"
+        notify site "Site indisponible. Statut HTTP: $http_status" critical
     fi
 
     # Vérification de l'espace disque
     local disk_usage=$(df -h / | awk '/\// {print $5}' | sed 's/%//')
     if [ "$disk_usage" -gt 85 ]; then
-        send_notification "Espace disque critique : $disk_usage% utilisé" "critical"
+        notify disk "Espace disque critique : $disk_usage% utilisé" critical "$disk_usage"
     fi
 
     # Vérification de la charge système
@@ -95,7 +124,7 @@ check_system_health() {
     local load_percentage=$(echo "scale=2; ($load / $cores) * 100" | bc)
     
     if (( $(echo "$load_percentage > 90" | bc -l) )); then
-        send_notification "Charge système critique : $load_percentage%" "critical"
+        notify load "Charge système critique : $load_percentage%" critical "$load_percentage"
     fi
 }
 
@@ -105,7 +134,7 @@ check_error_logs() {
     local critical_errors=$(grep -E "CRITICAL|ERROR" "$ERROR_LOG" | tail -n 10)
     
     if [ ! -z "$critical_errors" ]; then
-        send_notification "Erreurs critiques détectées:\n$critical_errors" "critical"
+        notify error_logs "Erreurs critiques détectées:\n$critical_errors" critical
     fi
 }
 
@@ -115,7 +144,7 @@ check_performance() {
     local avg_response_time=$(awk '{sum+=$1} END {print sum/NR}' "$PERFORMANCE_LOG")
     
     if (( $(echo "$avg_response_time > 2000" | bc -l) )); then
-        send_notification "Performances dégradées : temps de réponse moyen de $avg_response_time ms" "warning"
+        notify performance "Performances dégradées : temps de réponse moyen de $avg_response_time ms" warning "$avg_response_time"
     fi
 }
 
@@ -124,6 +153,8 @@ main() {
     check_system_health
     check_error_logs
     check_performance
+    # Digests dont la fenêtre s'est écoulée sans nouvelle condition
+    python3 "$ALERT_ROUTER" --channel "$NOTIFICATION_METHOD" flush | deliver_notifications
 }
 
 # Exécution du script
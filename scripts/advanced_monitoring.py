@@ -2,20 +2,25 @@
 
 import os
 import sys
-import psutil
-import socket
-import smtplib
-import ssl
-import requests
 import logging
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from dotenv import load_dotenv
 from datetime import datetime
-import subprocess
-import platform
-ImportWarning
-ImportError
+import signal
+import threading
+import time
+import argparse
+import json
+from alert_router import AlertRouter, parse_windows, post_webhook, worst_severity
+from alert_rules import AlertEngine, AlertRule, LEVEL_NAMES, RESOLVED, notification_subject
+from alert_spool import AlertSpool
+from alert_message import build_alert_message
+from send_limits import SendLimiter, parse_rates
+from check_registry import CheckRegistry, SEVERITY_CODES, NORMAL, WARNING, CRITICAL, UNKNOWN
+from timeseries import TimeSeriesStore
+from urllib.parse import urlsplit
+# Disque, charge et cœurs lus sans psutil ; email.mime, smtplib, python-dotenv, les sondes HTTP (ssl, http.client),
+# le client Docker, les cgroups, l'historique disque et les références adaptatives sont importés au premier besoin
+from system_stats import disk_usage, load_average, usable_cpus
+from startup import STARTED, deferred_import, load_env_file, parse_targets, profile_report
 
 # Configuration du logging
 logging.basicConfig(
@@ -27,18 +32,150 @@ logging.basicConfig(
     ]
 )
 
-# Charger les variables d'environnement
-load_dotenv('/Users/bv/CascadeProjects/chicha-store/scripts/.env.monitoring')
+# Charger les variables d'environnement (fichier voisin du script)
+ENV_FILE = os.getenv('MONITORING_ENV_FILE',
+                     os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env.monitoring'))
+load_env_file(ENV_FILE)
+
+# Métriques suivies par référence adaptative : libellé, échelle minimale, unité
+BASELINE_METRICS = {
+    'disk_percent': ('ESPACE DISQUE', 0.5, '%'),
+    'load_percent': ('CHARGE SYSTÈME', 5.0, '%'),
+    'http_response_time': ('TEMPS DE RÉPONSE', 0.05, 's'),
+}
+
+def _fmt(value, spec, default='N/A'):
+    """Formatage tolérant d'une valeur absente (check en erreur ou hors délai)"""
+    return default if value is None else format(value, spec)
+
+class SystemSnapshot:
+    """État du système collecté une seule fois par cycle, en lecture seule"""
+
+    __slots__ = ('timestamp', 'disk', 'load', 'website', 'docker', 'resources', 'endpoints',
+                 'journeys', 'backend', 'processes', 'collection_time')
+
+    def __init__(self, timestamp, collection_time, **results):
+        object.__setattr__(self, 'timestamp', timestamp)
+        object.__setattr__(self, 'collection_time', collection_time)
+        for name in self.__slots__[1:-1]:
+            object.__setattr__(self, name, results[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"SystemSnapshot is read-only ({name})")
+
+    @classmethod
+    def from_results(cls, results, timestamp, collection_time):
+        # Résultats déjà immuables : repris tels quels, sans copie
+        return cls(timestamp, collection_time, **results)
+
+    def checks(self):
+        return (self.disk, self.load, self.website, self.docker, self.resources,
+                self.endpoints, self.journeys, self.backend, self.processes)
+
 
 class ChichaStoreMonitoring:
     def __init__(self):
+        self.interval_override = None
+        self.load_config()
+
+        # État du mode daemon
+        self._stop_event = threading.Event()
+        # Réveil de la boucle (arrêt ou rechargement) ; l'arrêt reste prioritaire sur le rechargement
+        self._wake_event = threading.Event()
+        self._reload_requested = False
+
+        # État persistant entre deux exécutions : conditions en attente par fenêtre et dernier rapport quotidien
+        self.router = AlertRouter(self.alert_routes)
+        # Débits et quota d'envoi, partagés avec email-monitoring.py et les scripts shell
+        self.limiter = SendLimiter(self.send_limits_file, self.send_rates, self.recipient_rate, self.daily_quota)
+        # États des alertes (pending, firing, flapping) : seuls les changements sont notifiés
+        self.alerts = AlertEngine()
+        self._last_daily_report = None
+        self.baselines = {}
+        self._baseline_state = {}
+        self._process_state = None
+        self._saved_state = None
+        # Histogrammes prom-client du backend (latence par route et par collection)
+        self.backend_scraper = None
+        if self.backend_metrics_url:
+            prometheus_scraper = deferred_import('prometheus_scraper')
+            self.backend_scraper = prometheus_scraper.BackendMetricsScraper(
+                self.backend_metrics_url, min_requests=self.backend_min_requests,
+                error_rate_threshold=self.backend_error_rate_threshold, threshold=self.anomaly_threshold
+            )
+        self.load_state()
+
+        # Sondes HTTP sur connexions keep-alive réutilisées d'un cycle à l'autre, créées à la première sonde ;
+        # les checks tournent en parallèle, d'où le verrou de création
+        self._probes = None
+        self._docker = None
+        self._lazy_lock = threading.Lock()
+
+        # Parcours synthétiques authentifiés (jeton réutilisé d'une exécution à l'autre)
+        self.journeys = None
+        self._last_journeys = {'steps': [], 'failing': []}
+        self._next_journeys = 0.0
+        if self.synthetic_email and self.synthetic_password and self.website_url:
+            parts = urlsplit(self.website_url)
+            self.journeys = deferred_import('synthetic_journeys').SyntheticRunner(
+                f"{parts.scheme}://{parts.netloc}", self.synthetic_email, self.synthetic_password
+            )
+
+        # Client Docker Engine API (connexion keep-alive réutilisée d'un cycle à l'autre), créé au premier check
+
+        # Échantillonneur par processus (handles psutil conservés d'un cycle à l'autre), créé au premier cycle ;
+        # son état passe d'une exécution cron à l'autre par le fichier d'état
+        self.process_sampler = None
+
+        # Compteurs cgroup v2 par conteneur (identifiants résolus via l'API Docker), lecteur créé au premier check
+        self.cgroups = None
+        self._container_ids = {}
+
+        # Historique en mémoire des métriques principales (un tampon circulaire par métrique)
+        self.history = TimeSeriesStore(self.history_capacity)
+        # Copie persistante (fichiers projetés en mémoire) qui survit aux redémarrages, ouverte au premier point
+        self.persistent_history = None
+
+        # File persistante des alertes sortantes : rien n'est perdu si le SMTP est indisponible
+        self.spool = AlertSpool(self.spool_dir, self._deliver_alert)
+
+        # Export Prometheus (mode daemon uniquement) : corps pré-rendu à chaque cycle, servi par un thread dédié
+        self.metrics = None
+        self.metrics_server = None
+        self._metrics_bind_failed = False
+        self._cycles = 0
+
+        # Registre des checks du cycle (intervalle et délai propres à chacun)
+        self.checks = self.build_checks()
+
+    def load_config(self):
+        """Lecture de la configuration depuis l'environnement"""
         # Paramètres de configuration
         self.smtp_server = os.getenv('EMAIL_SMTP_SERVER')
         self.smtp_port = int(os.getenv('EMAIL_SMTP_PORT'))
+        # Désactivable pour un relais local ou le puits SMTP des benchmarks (smtp_sink.py)
+        self.smtp_starttls = os.getenv('EMAIL_SMTP_STARTTLS', 'true').lower() == 'true'
+        self.smtp_cafile = os.getenv('EMAIL_SMTP_CAFILE')
         self.sender_email = os.getenv('EMAIL_SENDER')
         self.sender_password = os.getenv('EMAIL_PASSWORD')
         self.admin_emails = os.getenv('ADMIN_EMAILS', '').split(',')
         self.website_url = os.getenv('MONITORING_WEBSITE_URL')
+
+        # Sondes HTTP complémentaires (nom=url,...) ; par défaut santé et catalogue de l'API
+        self.probe_targets = parse_targets(os.getenv('MONITORING_PROBE_URLS', ''))
+        if not self.probe_targets and self.website_url:
+            parts = urlsplit(self.website_url)
+            base = f"{parts.scheme}://{parts.netloc}"
+            self.probe_targets = [('health', f"{base}/api/health"), ('products', f"{base}/api/products")]
+            if os.getenv('MONITORING_CDN_URL'):
+                self.probe_targets.append(('cdn', os.getenv('MONITORING_CDN_URL')))
+        # Mode cold : connexion neuve à chaque sonde (DNS + TCP + TLS mesurés à chaque fois)
+        self.cold_probes = os.getenv('HTTP_PROBE_COLD', 'false').lower() == 'true'
+
+        # Parcours synthétiques (login, catalogue, commandes, paiements) : désactivés sans compte dédié
+        self.synthetic_email = os.getenv('SYNTHETIC_EMAIL')
+        self.synthetic_password = os.getenv('SYNTHETIC_PASSWORD')
+        self.synthetic_interval = float(os.getenv('SYNTHETIC_INTERVAL_SECONDS', 300))
         
         # Seuils de surveillance
         self.disk_space_critical = int(os.getenv('DISK_SPACE_CRITICAL_THRESHOLD', 90))
@@ -46,10 +183,126 @@ class ChichaStoreMonitoring:
         self.system_load_critical = int(os.getenv('SYSTEM_LOAD_CRITICAL_THRESHOLD', 90))
         self.system_load_warning = int(os.getenv('SYSTEM_LOAD_WARNING_THRESHOLD', 70))
 
+        # Détection d'anomalies : écart robuste (en MAD) au-delà duquel une valeur est anormale
+        self.anomaly_detection = os.getenv('ANOMALY_DETECTION', 'true').lower() == 'true'
+        self.anomaly_threshold = float(os.getenv('ANOMALY_THRESHOLD', 4))
+
+        # Intervalle entre deux cycles en mode daemon (secondes)
+        self.check_interval = self.interval_override or float(os.getenv('MONITORING_INTERVAL_SECONDS', 30))
+
+        # Budget total d'un cycle de vérifications concurrentes (secondes)
+        self.cycle_timeout = float(os.getenv('MONITORING_CYCLE_TIMEOUT_SECONDS', 8))
+        # Surcharges par check (nom=secondes,...) : intervalle entre deux exécutions, délai maximal
+        self.check_intervals = {name: float(value) for name, value in parse_targets(os.getenv('CHECK_INTERVALS', ''))}
+        self.check_timeouts = {name: float(value) for name, value in parse_targets(os.getenv('CHECK_TIMEOUTS', ''))}
+
+        # Regroupement des alertes par sévérité : criticals par cycle (0) ou fenêtre courte, le reste en digest
+        self.alert_window = float(os.getenv('ALERT_COALESCE_WINDOW_SECONDS', 0))
+        self.digest_window = float(os.getenv('ALERT_DIGEST_WINDOW_SECONDS', 900))
+        self.alert_routes = parse_windows(os.getenv('ALERT_ROUTES'), {
+            'CRITICAL': self.alert_window, 'WARNING': self.digest_window,
+            'UNKNOWN': self.digest_window, 'RESOLVED': self.digest_window
+        })
+        # Webhook Slack ou Discord : canal le plus rapide pour les envois immédiats (l'email sinon)
+        self.webhook_url = os.getenv('ALERT_WEBHOOK_URL')
+
+        # Limites d'envoi (Gmail) : messages par minute et par canal, par heure et par destinataire,
+        # destinataires sur 24 h glissantes ; une fois épuisées, les conditions attendent le digest suivant
+        self.send_limits_file = os.getenv('SEND_LIMITS_STATE_FILE', '/tmp/chicha_store_send_limits.json')
+        self.send_rates = parse_rates(os.getenv('SEND_RATE_LIMITS'))
+        self.recipient_rate = float(os.getenv('SEND_RECIPIENT_RATE_PER_HOUR', 30))
+        self.daily_quota = int(os.getenv('EMAIL_DAILY_QUOTA', 400))
+        self.state_file = os.getenv('MONITORING_STATE_FILE', '/tmp/chicha_store_monitoring_state.json')
+        self.spool_dir = os.getenv('ALERT_SPOOL_DIR', '/tmp/chicha_store_alert_spool')
+
+        # Conteneurs : socket Docker et services attendus du fichier compose de production
+        self.docker_socket = os.getenv('DOCKER_SOCKET', '/var/run/docker.sock')
+        # Services attendus lus au premier check Docker (et relus après un rechargement)
+        self.compose_file = os.getenv('DOCKER_COMPOSE_FILE')
+        self.expected_containers = None
+
+        # Nombre de points conservés par métrique (172800 = 2 jours à 1 Hz, 16 octets par point)
+        self.history_capacity = int(os.getenv('MONITORING_HISTORY_CAPACITY', 172800))
+        # Historique sur disque : rétention en jours, appliquée à l'âge des points (secondes)
+        self.history_dir = os.getenv('MONITORING_HISTORY_DIR', '/tmp/chicha_store_metrics')
+        self.history_retention = float(os.getenv('MONITORING_HISTORY_RETENTION_DAYS', 7)) * 86400
+
+        # Endpoint Prometheus du backend à scraper (getMetricsEndpoint), désactivé si absent
+        self.backend_metrics_url = os.getenv('BACKEND_METRICS_URL')
+        self.backend_min_requests = int(os.getenv('BACKEND_MIN_REQUESTS', 20))
+        self.backend_error_rate_threshold = float(os.getenv('BACKEND_ERROR_RATE_THRESHOLD', 0.05))
+
+        # Processus suivis (backend Node, mongod, redis, nginx) : redémarrages tolérés sur 10 minutes
+        self.process_sampling = os.getenv('PROCESS_SAMPLING', 'true').lower() == 'true'
+        self.process_restart_threshold = int(os.getenv('PROCESS_RESTART_THRESHOLD', 3))
+
+        # Machine à états des alertes : durée avant déclenchement, hystérésis (points de %), rappels, instabilité
+        self.alert_for_seconds = float(os.getenv('ALERT_FOR_SECONDS', 0))
+        self.alert_hysteresis = float(os.getenv('ALERT_HYSTERESIS_PERCENT', 5))
+        self.alert_renotify = float(os.getenv('ALERT_RENOTIFY_SECONDS', 3600))
+        self.alert_flap_threshold = int(os.getenv('ALERT_FLAP_THRESHOLD', 4))
+        self.alert_flap_window = float(os.getenv('ALERT_FLAP_WINDOW_SECONDS', 3600))
+        self.alert_rules = self.build_alert_rules()
+
+        # Endpoint /metrics du daemon (0 = désactivé)
+        self.metrics_port = int(os.getenv('MONITORING_METRICS_PORT', 9105))
+        self.metrics_address = os.getenv('MONITORING_METRICS_ADDR', '127.0.0.1')
+
+        # Ressources par conteneur lues directement dans /sys/fs/cgroup
+        self.cgroup_root = os.getenv('CGROUP_ROOT', '/sys/fs/cgroup')
+        self.cgroup_services = os.getenv(
+            'CGROUP_SERVICES',
+            'chicha-store-backend,chicha-store-mongodb,chicha-store-redis,chicha-store-nginx'
+        ).split(',')
+
+    def build_alert_rules(self):
+        """Règles d'alerte à état ; les valeurs booléennes valent 1 quand la condition est active"""
+        common = {'renotify_seconds': self.alert_renotify, 'flap_threshold': self.alert_flap_threshold,
+                  'flap_window': self.alert_flap_window}
+        rules = [
+            AlertRule('disk', 'ALERTE ESPACE DISQUE', self.disk_space_warning, self.disk_space_critical,
+                      self.alert_hysteresis, self.alert_for_seconds, **common),
+            AlertRule('load', 'ALERTE CHARGE SYSTÈME', self.system_load_warning, self.system_load_critical,
+                      self.alert_hysteresis, self.alert_for_seconds, **common),
+            AlertRule('website', 'SERVEUR LOCAL INACCESSIBLE', **common),
+            AlertRule('endpoints', 'ENDPOINTS EN ÉCHEC', **common),
+            # 1 : conteneurs en mauvaise santé, 2 : conteneurs arrêtés
+            AlertRule('docker', 'CONTENEURS', warning=1, critical=2, **common),
+            AlertRule('restarts', 'REDÉMARRAGES EN BOUCLE', critical=self.process_restart_threshold, **common),
+            # Nombre d'étapes, de routes ou de conteneurs concernés
+            AlertRule('journeys', 'PARCOURS SYNTHÉTIQUES EN ÉCHEC', **common),
+            AlertRule('backend_latency', 'RÉGRESSION LATENCE BACKEND', warning=1, critical=float('inf'), **common),
+            AlertRule('backend_errors', 'ERREURS BACKEND', **common),
+            AlertRule('oom', 'OOM KILL', **common),
+        ]
+        # Anomalies : écart à la référence adaptative (en MAD), niveau WARNING uniquement
+        rules += [AlertRule(f'anomaly_{name}', f'ANOMALIE {label}', warning=self.anomaly_threshold,
+                            critical=float('inf'), hysteresis=1.0, for_seconds=self.alert_for_seconds, **common)
+                  for name, (label, _, _) in BASELINE_METRICS.items()]
+        return {rule.name: rule for rule in rules}
+
+    @property
+    def probes(self):
+        """Moteur de sondes HTTP partagé (site, endpoints, webhook)"""
+        if self._probes is None:
+            with self._lazy_lock:
+                if self._probes is None:
+                    self._probes = deferred_import('http_probes').ProbeEngine(timeout=5)
+        return self._probes
+
+    @property
+    def docker(self):
+        """Client Docker Engine API partagé par les checks conteneurs et ressources"""
+        if self._docker is None:
+            with self._lazy_lock:
+                if self._docker is None:
+                    self._docker = deferred_import('docker_engine').DockerEngineClient(self.docker_socket)
+        return self._docker
+
     def check_disk_space(self):
         """Vérification de l'espace disque"""
-        disk_usage = psutil.disk_usage('/')
-        disk_percent = disk_usage.percent
+        usage = disk_usage('/')
+        disk_percent = usage.percent
         
         status = "NORMAL"
         if disk_percent >= self.disk_space_critical:
@@ -59,21 +312,21 @@ class ChichaStoreMonitoring:
         
         return {
             'percent': disk_percent,
-            'total': disk_usage.total / (1024 * 1024 * 1024),  # Go
-            'free': disk_usage.free / (1024 * 1024 * 1024),    # Go
+            'total': usage.total / (1024 * 1024 * 1024),  # Go
+            'free': usage.free / (1024 * 1024 * 1024),    # Go
             'status': status
         }
 
     def check_system_load(self):
         """Vérification de la charge système"""
-        load_avg = os.getloadavg()[0]  # Charge moyenne sur 1 minute
-        num_cores = psutil.cpu_count()
+        load_avg = load_average()  # Charge moyenne sur 1 minute
+        num_cores = usable_cpus()
         load_percent = (load_avg / num_cores) * 100
         
         status = "NORMAL"
-        if load_percent >= 90:  # Seuil critique plus élevé
+        if load_percent >= self.system_load_critical:
             status = "CRITICAL"
-        elif load_percent >= 70:  # Seuil d'avertissement plus élevé
+        elif load_percent >= self.system_load_warning:
             status = "WARNING"
         
         return {
@@ -85,79 +338,198 @@ class ChichaStoreMonitoring:
 
     def check_website_status(self):
         """Vérification du statut du site web local"""
-        try:
-            # Vérification de localhost
-            response = requests.get(self.website_url, timeout=5)
+        if not self.website_url:
             return {
-                'status_code': response.status_code,
-                'is_online': 200 <= response.status_code < 400,
-                'response_time': response.elapsed.total_seconds(),
-                'local_server': True
+                'status_code': None,
+                'is_online': False,
+                'local_server': False,
+                'error': 'MONITORING_WEBSITE_URL non configurée'
             }
-        except requests.RequestException as e:
+        probe = self.probes.probe('frontend', self.website_url, cold=self.cold_probes)
+        if probe['status_code'] is None:
             return {
                 'status_code': None,
                 'is_online': False,
                 'local_server': False,
-                'error': str(e)
+                'error': probe['error']
             }
+        return {
+            'status_code': probe['status_code'],
+            'is_online': probe['ok'],
+            'response_time': probe['total'],
+            'local_server': True,
+            'timings': {key: probe[key] for key in ('dns', 'connect', 'tls', 'ttfb', 'transfer')},
+            'bytes': probe['bytes'],
+            'reused_connection': probe['reused']
+        }
+
+    def check_endpoints(self):
+        """Sondes concurrentes des endpoints complémentaires (API, CDN)"""
+        if not self.probe_targets:
+            return {'probes': [], 'failing': []}
+        probes = self.probes.probe_all(self.probe_targets, cold=self.cold_probes)
+        return {
+            'probes': probes,
+            'failing': [probe['name'] for probe in probes if not probe['ok']]
+        }
+
+    def check_journeys(self):
+        """Parcours synthétiques de l'API, exécutés au plus toutes les synthetic_interval secondes"""
+        if self.journeys is None or time.monotonic() < self._next_journeys:
+            return self._last_journeys
+        self._next_journeys = time.monotonic() + self.synthetic_interval
+        steps = self.journeys.run()
+        self._last_journeys = {'steps': steps, 'failing': [step['step'] for step in steps if not step['ok']]}
+        return dict(self._last_journeys, fresh=True)
+
+    def check_backend_metrics(self):
+        """Latences et erreurs du backend depuis le scrape précédent (histogrammes prom-client)"""
+        if self.backend_scraper is None:
+            return {'http': {}, 'database': {}, 'regressions': []}
+        stats = self.backend_scraper.scrape()
+        return {
+            'http': stats['http_request_duration_seconds'],
+            'database': stats['database_query_duration_seconds'],
+            'regressions': self.backend_scraper.evaluate(time.time(), stats)
+        }
+
+    def check_processes(self):
+        """RSS, CPU, descripteurs, threads et changements de contexte des processus des services"""
+        if not self.process_sampling:
+            return {'services': {}, 'restarts': {}}
+        if self.process_sampler is None:
+            self.process_sampler = deferred_import('process_sampler').ProcessSampler()
+            if self._process_state:
+                self.process_sampler.load_state(self._process_state)
+        return self.process_sampler.sample()
 
     def check_docker_containers(self):
-        """Vérification des conteneurs Docker"""
+        """Vérification des conteneurs Docker via l'API Engine (sans fork de la CLI)"""
+        docker_engine = deferred_import('docker_engine')
+        if self.expected_containers is None:
+            self.expected_containers = docker_engine.compose_container_names(
+                self.compose_file or docker_engine.DEFAULT_COMPOSE_FILE)
         try:
-            result = subprocess.run(['docker', 'ps', '-q'], capture_output=True, text=True)
-            containers = result.stdout.strip().split('\n')
-            return {
-                'total_containers': len(containers),
-                'running_containers': len(containers)
-            }
-        except Exception as e:
+            return self.docker.collect(self.expected_containers)
+        except (docker_engine.DockerEngineError, ValueError) as e:
             return {
                 'error': str(e),
                 'total_containers': 0,
                 'running_containers': 0
             }
 
+    def check_container_resources(self):
+        """CPU, mémoire, OOM kills, E/S et pression CPU par service, depuis cgroup v2"""
+        if self.cgroups is None:
+            self.cgroups = deferred_import('cgroup_reader').CgroupReader(self.cgroup_root)
+        if not self.cgroups.available():
+            return {'error': f"cgroup v2 indisponible sous {self.cgroup_root}", 'containers': {}}
+
+        if any(name not in self._container_ids for name in self.cgroup_services):
+            # Résolution nom -> identifiant seulement quand un service est inconnu ou recréé
+            docker_engine = deferred_import('docker_engine')
+            try:
+                running = [c for c in self.docker.list_containers() if c['state'] == 'running']
+            except docker_engine.DockerEngineError as e:
+                return {'error': str(e), 'containers': {}}
+            self._container_ids = {
+                c['name']: c['id'] for c in running if c['name'] in self.cgroup_services
+            }
+
+        containers = self.cgroups.collect(self._container_ids)
+        # Un conteneur introuvable dans les cgroups a été recréé : nouvelle résolution au prochain cycle
+        for name in list(self._container_ids):
+            if name not in containers:
+                del self._container_ids[name]
+        return {'containers': containers}
+
     def send_email_alert(self, subject, body):
-        """Envoi d'un email d'alerte"""
+        """Mise en file d'un email d'alerte (envoi par le spool, avec reprises)"""
         try:
-            message = MIMEMultipart()
-            message['From'] = self.sender_email
-            message['To'] = ', '.join(self.admin_emails)
-            message['Subject'] = subject
-            message.attach(MIMEText(body, 'plain'))
-
-            context = ssl.create_default_context()
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls(context=context)
-                server.login(self.sender_email, self.sender_password)
-                server.sendmail(self.sender_email, self.admin_emails, message.as_string())
-            
-            logging.info(f"Email alert sent: {subject}")
+            message = build_alert_message(self.sender_email, self.admin_emails, subject, body)
+            self.spool.enqueue(subject, message, self.sender_email, self.admin_emails)
+            logging.info(f"Email alert queued: {subject}")
+            return True
         except Exception as e:
-            logging.error(f"Failed to send email alert: {e}")
+            logging.error(f"Failed to queue email alert: {e}")
+            return False
+
+    def _deliver_alert(self, record):
+        """Envoi effectif d'une alerte du spool ; une exception déclenche une reprise"""
+        # Session SMTP persistante : STARTTLS et login ne sont pas rejoués à chaque alerte
+        transport = deferred_import('smtp_transport').get_transport(
+            self.smtp_server, self.smtp_port, self.sender_email, self.sender_password,
+            use_starttls=self.smtp_starttls, cafile=self.smtp_cafile
+        )
+        transport.send(record['message'], record['sender'], record['recipients'])
+        logging.info(f"Email alert sent: {record['subject']}")
+
+    def load_state(self):
+        """Lecture de l'état persistant (digest en attente, date du dernier rapport quotidien)"""
+        try:
+            with open(self.state_file) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable monitoring state {self.state_file}: {e}")
+            return
+        self.router.load_state(state.get('pending_alerts'))
+        self.alerts.load_state(state.get('alerts'), self.alert_flap_threshold)
+        last_daily = state.get('last_daily_report')
+        self._last_daily_report = datetime.fromisoformat(last_daily).date() if last_daily else None
+        self._baseline_state = state.get('baselines', {})
+        self._process_state = state.get('processes')
+        if self.backend_scraper is not None and state.get('backend'):
+            self.backend_scraper.load_state(state['backend'])
+        self._saved_state = state
+
+    def save_state(self):
+        """Écriture atomique de l'état, uniquement s'il a changé"""
+        state = {
+            'pending_alerts': self.router.to_state(),
+            'alerts': self.alerts.to_state(),
+            'last_daily_report': self._last_daily_report.isoformat() if self._last_daily_report else None,
+            'baselines': {name: baseline.to_state() for name, baseline in self.baselines.items()}
+        }
+        if self.backend_scraper is not None:
+            state['backend'] = self.backend_scraper.to_state()
+        if self.process_sampler is not None:
+            state['processes'] = self.process_sampler.to_state()
+        if state == self._saved_state:
+            return
+        tmp_path = f"{self.state_file}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_file)
+            self._saved_state = state
+        except OSError as e:
+            logging.error(f"Failed to save monitoring state: {e}")
 
-    def generate_system_report(self):
-        """Génération d'un rapport système complet"""
-        disk_info = self.check_disk_space()
-        load_info = self.check_system_load()
-        website_status = self.check_website_status()
-        docker_info = self.check_docker_containers()
+    def generate_system_report(self, snapshot=None):
+        """Génération d'un rapport système complet à partir d'un snapshot"""
+        if snapshot is None:
+            snapshot = self.collect_snapshot()
+        disk_info = snapshot.disk
+        load_info = snapshot.load
+        website_status = snapshot.website
+        docker_info = snapshot.docker
 
         report = f"""🚨 Rapport de Monitoring Chicha Store 🚨
-Date: {datetime.now()}
-Système: {platform.platform()}
+Date: {snapshot.timestamp}
+Système: {deferred_import('platform').platform()}
 
 📊 Espace Disque:
-- Utilisation: {disk_info['percent']}%
-- Total: {disk_info['total']:.2f} Go
-- Libre: {disk_info['free']:.2f} Go
+- Utilisation: {_fmt(disk_info.get('percent'), '')}%
+- Total: {_fmt(disk_info.get('total'), '.2f')} Go
+- Libre: {_fmt(disk_info.get('free'), '.2f')} Go
 - Statut: {disk_info['status']}
 
 💻 Charge Système:
-- Charge moyenne: {load_info['load_avg']}
-- Nombre de cœurs: {load_info['num_cores']}
-- Charge en %: {load_info['load_percent']:.2f}%
+- Charge moyenne: {_fmt(load_info.get('load_avg'), '')}
+- Nombre de cœurs: {_fmt(load_info.get('num_cores'), '')}
+- Charge en %: {_fmt(load_info.get('load_percent'), '.2f')}%
 - Statut: {load_info['status']}
 
 🌐 Serveur Local:
@@ -172,40 +544,614 @@ Système: {platform.platform()}
 - Total: {docker_info['total_containers']}
 - En cours d'exécution: {docker_info['running_containers']}
 """
+        if docker_info.get('error'):
+            report += f"- Erreur: {docker_info['error']}\n"
+        if docker_info.get('missing_services'):
+            report += f"- Services arrêtés ou absents: {', '.join(docker_info['missing_services'])}\n"
+        if docker_info.get('unhealthy'):
+            report += f"- Conteneurs en mauvaise santé: {', '.join(docker_info['unhealthy'])}\n"
+        for name, stats in sorted(docker_info.get('stats', {}).items()):
+            memory_mb = stats['memory_bytes'] / (1024 * 1024)
+            report += f"- {name}: CPU {_fmt(stats['cpu_percent'], '.1f')}% / Mémoire {memory_mb:.0f} Mo\n"
+
+        resources = snapshot.resources.get('containers', {})
+        if resources:
+            report += "\n📦 Ressources par service (cgroup v2):\n"
+            for name, sample in sorted(resources.items()):
+                io_read, io_write = sample['io_read_bytes_per_sec'], sample['io_write_bytes_per_sec']
+                read_kb = _fmt(None if io_read is None else io_read / 1024, '.0f')
+                write_kb = _fmt(None if io_write is None else io_write / 1024, '.0f')
+                report += (
+                    f"- {name}: CPU {_fmt(sample['cpu_percent'], '.1f')}%"
+                    f" / Mémoire {sample['memory_bytes'] / (1024 * 1024):.0f} Mo"
+                    f" / E/S {read_kb} Ko/s lus, {write_kb} Ko/s écrits"
+                    f" / Pression CPU {sample['cpu_pressure_avg10']:.1f}%"
+                    f" / OOM kills {sample['oom_kills_total']}\n"
+                )
+
+        probes = snapshot.endpoints.get('probes', [])
+        if probes:
+            report += "\n🔎 Sondes HTTP (DNS / TCP / TLS / TTFB / transfert, ms):\n"
+            for probe in probes:
+                if probe['status_code'] is None:
+                    report += f"- {probe['name']} ({probe['url']}): échec - {probe.get('error')}\n"
+                    continue
+                phases = ' / '.join(
+                    f"{probe[phase] * 1000:.0f}" for phase in ('dns', 'connect', 'tls', 'ttfb', 'transfer')
+                )
+                report += (f"- {probe['name']} ({probe['url']}): HTTP {probe['status_code']}, {phases}, "
+                           f"{probe['bytes']} octets{' (connexion réutilisée)' if probe['reused'] else ''}\n")
+
+        for title, key in (('Routes HTTP', 'http'), ('Requêtes base de données', 'database')):
+            groups = snapshot.backend.get(key, {})
+            if not groups:
+                continue
+            report += f"\n⚙️ Backend - {title} (p50 / p95 / p99 ms, erreurs, 10 plus lentes):\n"
+            slowest = sorted(groups.items(), key=lambda item: item[1]['p95'] or 0, reverse=True)[:10]
+            for group, entry in slowest:
+                quantiles = ' / '.join(
+                    _fmt(None if entry[q] is None else entry[q] * 1000, '.0f') for q in ('p50', 'p95', 'p99')
+                )
+                report += (f"- {' '.join(part for part in group if part)}: {entry['requests']:.0f} req, "
+                           f"{quantiles}, {entry['error_rate'] * 100:.1f}%\n")
+        if snapshot.backend.get('error'):
+            report += f"\n⚙️ Backend: métriques indisponibles - {snapshot.backend['error']}\n"
+
+        services = snapshot.processes.get('services', {})
+        if any(service['processes'] for service in services.values()):
+            report += "\n🧵 Processus (RSS / CPU / FD / threads / changements de contexte par s):\n"
+            for name, service in services.items():
+                if not service['processes']:
+                    continue
+                report += (f"- {name} ({service['processes']} processus): {service['rss_bytes'] / 1048576:.0f} Mo"
+                           f" / {_fmt(service['cpu_percent'], '.1f')}% / {service['open_fds']} / {service['threads']}"
+                           f" / {_fmt(service['ctx_switches_per_sec'], '.0f')}"
+                           f" / {snapshot.processes['restarts'].get(name, 0)} redémarrage(s) en 10 min\n")
+
+        steps = snapshot.journeys.get('steps', [])
+        if steps:
+            report += "\n🧭 Parcours synthétiques (p50 / p95 / SLO, ms):\n"
+            for step in steps:
+                status = '✅' if step['ok'] else '❌'
+                report += (f"- {status} {step['path']}: {step['requests']} requête(s), {step['failures']} échec(s), "
+                           f"{_fmt(step['p50_ms'], '.0f')} / {_fmt(step['p95_ms'], '.0f')} / {step['slo_ms']:.0f}"
+                           f"{' - ' + ', '.join(step['errors']) if step['errors'] else ''}\n")
         return report
 
+    def _failed_check_result(self, name, error):
+        """Résultat de substitution pour un check en erreur ou hors délai"""
+        if name == 'website':
+            return {
+                'status_code': None,
+                'is_online': False,
+                'local_server': False,
+                'error': error
+            }
+        if name == 'docker':
+            return {'error': error, 'total_containers': 0, 'running_containers': 0}
+        if name == 'resources':
+            return {'error': error, 'containers': {}}
+        if name in ('endpoints', 'journeys'):
+            return {'error': error, 'probes': [], 'steps': [], 'failing': []}
+        if name == 'backend':
+            return {'error': error, 'http': {}, 'database': {}, 'regressions': []}
+        if name == 'processes':
+            return {'error': error, 'services': {}, 'restarts': {}}
+        return {'status': 'UNKNOWN', 'error': error}
+
+    def build_checks(self):
+        """Enregistrement des checks : valeur principale, unité et sévérité résumées de leur détail"""
+        def counted(key, severity):
+            # Valeur = nombre d'éléments en échec, sévérité dès qu'il y en a un
+            return lambda r: (len(r.get(key, ())), UNKNOWN if r.get('error') else severity if r.get(key) else NORMAL,
+                              r.get('error', ''))
+
+        checks = CheckRegistry(self._failed_check_result)
+        # Appels système de quelques µs : exécutés sans thread
+        checks.register('disk', self.check_disk_space, '%', inline=True,
+                        summarize=lambda r: (r['percent'], SEVERITY_CODES[r['status']], ''))
+        checks.register('load', self.check_system_load, '%', inline=True,
+                        summarize=lambda r: (r['load_percent'], SEVERITY_CODES[r['status']], ''))
+        checks.register('website', self.check_website_status, 's',
+                        summarize=lambda r: (r.get('response_time'), NORMAL if r.get('is_online') else CRITICAL,
+                                             r.get('error', '')))
+        checks.register('docker', self.check_docker_containers, 'conteneurs',
+                        summarize=lambda r: (r['running_containers'],
+                                             UNKNOWN if r.get('error') else CRITICAL if r.get('missing_services')
+                                             else WARNING if r.get('unhealthy') else NORMAL, r.get('error', '')))
+        checks.register('resources', self.check_container_resources, 'conteneurs',
+                        summarize=lambda r: (len(r['containers']), UNKNOWN if r.get('error') else NORMAL,
+                                             r.get('error', '')))
+        checks.register('endpoints', self.check_endpoints, 'échecs', summarize=counted('failing', CRITICAL))
+        # Les parcours gardent leur propre cadence (synthetic_interval) pour signaler les résultats frais
+        checks.register('journeys', self.check_journeys, 'échecs', summarize=counted('failing', CRITICAL))
+        checks.register('backend', self.check_backend_metrics, 'régressions',
+                        summarize=counted('regressions', WARNING))
+        checks.register('processes', self.check_processes, 'services',
+                        summarize=lambda r: (len(r['services']), UNKNOWN if r.get('error') else NORMAL,
+                                             r.get('error', '')))
+        checks.configure(self.check_intervals, self.check_timeouts)
+        return checks
+
+    def collect_snapshot(self):
+        """Collecte unique de tous les checks du cycle"""
+        timestamp = datetime.now()
+        started = time.monotonic()
+        results = self.checks.run(self.cycle_timeout)
+        return SystemSnapshot.from_results(results, timestamp, time.monotonic() - started)
+
+    def _record(self, name, timestamp, value):
+        self.history.record(name, timestamp, value)
+        try:
+            if self.persistent_history is None:
+                self.persistent_history = deferred_import('metrics_history').MetricsHistory(
+                    self.history_dir, self.history_retention, self.check_interval)
+            self.persistent_history.append(name, timestamp, value)
+        except (OSError, ValueError) as e:
+            logging.error(f"Failed to persist metric {name}: {e}")
+
+    def snapshot_metrics(self, snapshot):
+        """Valeurs numériques du snapshot (historique local et échantillons envoyés au collecteur)"""
+        yield 'disk_percent', snapshot.disk.value
+        yield 'load_percent', snapshot.load.value
+        yield 'http_response_time', snapshot.website.get('response_time')
+        yield 'website_up', int(bool(snapshot.website.get('is_online')))
+        yield 'endpoints_failing', len(snapshot.endpoints.get('failing', []))
+        for probe in snapshot.endpoints.get('probes', []):
+            yield f"probe_{probe['name']}_total", probe['total']
+            yield f"probe_{probe['name']}_ttfb", probe['ttfb']
+        for name, service in snapshot.processes.get('services', {}).items():
+            if service['processes']:
+                yield f"process_{name}_rss", service['rss_bytes']
+                yield f"process_{name}_cpu", service['cpu_percent']
+        for name, count in snapshot.processes.get('restarts', {}).items():
+            yield f"process_{name}_restarts", count
+        if snapshot.journeys.get('fresh'):
+            for step in snapshot.journeys['steps']:
+                yield f"journey_{step['step']}_p95", step['p95_ms']
+        if not snapshot.docker.get('error'):
+            yield 'containers_total', snapshot.docker['total_containers']
+            yield 'containers_running', snapshot.docker['running_containers']
+            yield 'containers_missing', len(snapshot.docker.get('missing_services', []))
+            yield 'containers_unhealthy', len(snapshot.docker.get('unhealthy', []))
+
+    def record_history(self, snapshot):
+        """Ajout des valeurs du snapshot à l'historique (mémoire et disque)"""
+        timestamp = snapshot.timestamp.timestamp()
+        for name, value in self.snapshot_metrics(snapshot):
+            self._record(name, timestamp, value)
+
+    def load_history(self):
+        """Rechargement de l'historique disque dans les tampons mémoire (démarrage du daemon)"""
+        reader = deferred_import('metrics_history').MetricsHistoryReader(self.history_dir)
+        since = time.time() - self.history_retention
+        for name in reader.metrics():
+            try:
+                points = reader.read(name, since=since)
+            except (OSError, ValueError) as e:
+                logging.warning(f"Skipping unreadable history for {name}: {e}")
+                continue
+            for timestamp, value in points[-self.history_capacity:]:
+                self.history.record(name, timestamp, value)
+        logging.info(f"History loaded for {len(self.history.series)} metric(s)")
+
+    def _baseline(self, name):
+        """Référence d'une métrique : état sauvegardé, sinon initialisée sur l'historique disque"""
+        baseline = self.baselines.get(name)
+        if baseline is None:
+            _, min_scale, _ = BASELINE_METRICS[name]
+            baseline = self.baselines[name] = deferred_import('baselines').AdaptiveBaseline(
+                min_scale, threshold=self.anomaly_threshold)
+            if name in self._baseline_state:
+                baseline.load_state(self._baseline_state[name])
+            else:
+                try:
+                    points = deferred_import('metrics_history').MetricsHistoryReader(self.history_dir).read(
+                        name, since=time.time() - self.history_retention)
+                except (OSError, ValueError):
+                    points = []
+                baseline.fit([t for t, _ in points], [v for _, v in points])
+        return baseline
+
+    def evaluate_baselines(self, snapshot):
+        """Comparaison du snapshot aux références adaptatives (mise à jour incrémentale)"""
+        timestamp = snapshot.timestamp.timestamp()
+        values = {
+            'disk_percent': snapshot.disk.value,
+            'load_percent': snapshot.load.value,
+            'http_response_time': snapshot.website.get('response_time'),
+        }
+        for name, value in values.items():
+            if value is None:
+                continue
+            result = self._baseline(name).evaluate(timestamp, value)
+            label, _, unit = BASELINE_METRICS[name]
+            score = result['seasonal_score'] if result['seasonal_score'] is not None else result['score']
+            # Même machine à états que les seuils : déclenchement, rappel, résolution, instabilité
+            self._notify(self.alert_rules[f'anomaly_{name}'], score, snapshot.timestamp, lambda severity: (
+                f"📈 ANOMALIE {label} - {value:.2f}{unit} "
+                f"(habituel ~{result['expected']:.2f}{unit}, écart {score:.1f})"))
+
+    def publish_metrics(self, snapshot, cycle_duration):
+        """Mise à jour des métriques exportées ; seules les familles modifiées sont re-rendues"""
+        metrics = self.metrics
+        if metrics is None:
+            return
+        disk, load, website, docker = snapshot.disk, snapshot.load, snapshot.website, snapshot.docker
+
+        severities = {(result.name,): result.severity for result in snapshot.checks()}
+        metrics.gauge('chicha_monitor_check_severity',
+                      'Check result (0 normal, 1 warning, 2 critical, 3 unknown)', ('check',)).replace(severities)
+        metrics.gauge('chicha_monitor_check_duration_seconds', 'Last execution time of each check',
+                      ('check',)).replace({(result.name,): result.duration for result in snapshot.checks()})
+
+        metrics.gauge('chicha_monitor_disk_used_percent', 'Root filesystem usage').set(disk.value)
+        free = disk.get('free')
+        metrics.gauge('chicha_monitor_disk_free_bytes', 'Root filesystem free space').set(
+            None if free is None else free * 1024 ** 3)
+        metrics.gauge('chicha_monitor_load_percent', '1-minute load average per core').set(load.value)
+
+        metrics.gauge('chicha_monitor_website_up', 'Frontend reachable').set(int(bool(website.get('is_online'))))
+        metrics.gauge('chicha_monitor_website_response_seconds', 'Frontend response time').set(
+            website.get('response_time'))
+
+        probes = snapshot.endpoints.get('probes', [])
+        metrics.gauge('chicha_monitor_probe_up', 'HTTP probe success', ('probe',)).replace(
+            {(probe['name'],): int(probe['ok']) for probe in probes})
+        metrics.gauge('chicha_monitor_probe_phase_seconds', 'HTTP probe timing by phase', ('probe', 'phase')).replace(
+            {(probe['name'], phase): probe[phase] for probe in probes
+             for phase in ('dns', 'connect', 'tls', 'ttfb', 'transfer', 'total')})
+
+        metrics.gauge('chicha_monitor_containers', 'Docker containers by state', ('state',)).replace(
+            {} if docker.get('error') else
+            {('total',): docker['total_containers'], ('running',): docker['running_containers']})
+        containers = snapshot.resources.get('containers', {})
+        metrics.gauge('chicha_monitor_container_cpu_percent', 'Container CPU usage (cgroup v2)', ('service',)).replace(
+            {(name,): sample['cpu_percent'] for name, sample in containers.items()})
+        metrics.gauge('chicha_monitor_container_memory_bytes', 'Container memory usage (cgroup v2)',
+                      ('service',)).replace({(name,): sample['memory_bytes'] for name, sample in containers.items()})
+        metrics.counter('chicha_monitor_container_oom_kills_total', 'Container OOM kills (cgroup v2)',
+                        ('service',)).replace({(name,): sample['oom_kills_total'] for name, sample in containers.items()})
+
+        steps = snapshot.journeys.get('steps', [])
+        metrics.gauge('chicha_monitor_journey_p95_seconds', 'Synthetic journey step p95 latency', ('step',)).replace(
+            {(step['step'],): None if step['p95_ms'] is None else step['p95_ms'] / 1000 for step in steps})
+        metrics.gauge('chicha_monitor_journey_ok', 'Synthetic journey step within SLO and without failures',
+                      ('step',)).replace({(step['step'],): int(step['ok']) for step in steps})
+
+        backend_p95, backend_errors = {}, {}
+        for histogram in ('http', 'database'):
+            for group, entry in snapshot.backend.get(histogram, {}).items():
+                labels = (histogram, ' '.join(part for part in group if part))
+                backend_p95[labels] = entry['p95']
+                backend_errors[labels] = entry['error_rate']
+        metrics.gauge('chicha_monitor_backend_p95_seconds', 'Backend p95 latency since the previous scrape',
+                      ('histogram', 'group')).replace(backend_p95)
+        metrics.gauge('chicha_monitor_backend_error_ratio', 'Backend 5xx ratio since the previous scrape',
+                      ('histogram', 'group')).replace(backend_errors)
+
+        services = {name: service for name, service in snapshot.processes.get('services', {}).items()
+                    if service['processes']}
+        for field, family, help_text in (
+            ('processes', 'chicha_monitor_process_count', 'Running processes per service'),
+            ('rss_bytes', 'chicha_monitor_process_rss_bytes', 'Resident memory per service'),
+            ('cpu_percent', 'chicha_monitor_process_cpu_percent', 'CPU usage per service'),
+            ('open_fds', 'chicha_monitor_process_open_fds', 'Open file descriptors per service'),
+            ('threads', 'chicha_monitor_process_threads', 'Threads per service'),
+            ('ctx_switches_per_sec', 'chicha_monitor_process_context_switches_per_second',
+             'Context switches per second per service'),
+        ):
+            metrics.gauge(family, help_text, ('service',)).replace(
+                {(name,): service[field] for name, service in services.items()})
+        metrics.gauge('chicha_monitor_process_restarts', 'New PIDs per service in the restart window',
+                      ('service',)).replace({(name,): count for name, count
+                                             in snapshot.processes.get('restarts', {}).items()})
+
+        limits = self.limiter.snapshot()
+        metrics.gauge('chicha_monitor_send_tokens', 'Sends available now per channel (token bucket)',
+                      ('channel',)).replace({(channel,): tokens for channel, tokens in limits['channels'].items()})
+        metrics.gauge('chicha_monitor_send_recipient_tokens', 'Sends available now per recipient (token bucket)',
+                      ('recipient',)).replace({(name,): tokens for name, tokens in limits['recipients'].items()})
+        metrics.gauge('chicha_monitor_send_quota_used', 'Recipients used over the last 24 hours').set(
+            limits['quota_used'])
+        metrics.gauge('chicha_monitor_send_quota_limit', 'Recipients allowed over 24 hours').set(limits['quota_limit'])
+        metrics.counter('chicha_monitor_send_deferred_total', 'Sends deferred by rate limits or quota',
+                        ('channel',)).replace({(channel,): count for channel, count in limits['deferred'].items()})
+
+        spool = self.spool.stats()
+        metrics.gauge('chicha_monitor_alert_queue_depth', 'Alerts waiting in the spool').set(spool['queue_depth'])
+        metrics.gauge('chicha_monitor_alert_oldest_age_seconds', 'Age of the oldest queued alert').set(
+            spool['oldest_age_seconds'])
+        metrics.counter('chicha_monitor_alerts_sent_total', 'Alerts delivered').set(spool['sent_total'])
+        metrics.counter('chicha_monitor_alert_failed_attempts_total', 'Failed alert deliveries').set(
+            spool['failed_attempts_total'])
+        metrics.counter('chicha_monitor_alerts_dropped_total', 'Alerts dropped from the spool').set(
+            spool['dropped_total'])
+
+        self._cycles += 1
+        metrics.gauge('chicha_monitor_collection_seconds', 'Duration of the concurrent checks').set(
+            snapshot.collection_time)
+        metrics.gauge('chicha_monitor_cycle_seconds', 'Duration of the last monitoring cycle').set(cycle_duration)
+        metrics.gauge('chicha_monitor_last_cycle_timestamp_seconds', 'End of the last monitoring cycle').set(
+            snapshot.timestamp.timestamp() + cycle_duration)
+        metrics.counter('chicha_monitor_cycles_total', 'Monitoring cycles completed').set(self._cycles)
+        metrics.publish()
+
     def check_and_alert(self):
         """Vérification principale avec alertes"""
-        disk_info = self.check_disk_space()
-        load_info = self.check_system_load()
-        website_status = self.check_website_status()
-
-        # Alertes critiques
-        if disk_info['status'] != 'NORMAL':
-            subject = f"🚨 ALERTE ESPACE DISQUE - {disk_info['status']}"
-            self.send_email_alert(subject, self.generate_system_report())
+        started = time.monotonic()
+        # Les alertes et le rapport partagent le même snapshot : un seul passage par check
+        snapshot = self.collect_snapshot()
+        self.record_history(snapshot)
+        if self.anomaly_detection:
+            self.evaluate_baselines(snapshot)
+        disk_info = snapshot.disk
+        load_info = snapshot.load
+        website_status = snapshot.website
 
-        if load_info['status'] != 'NORMAL':
-            subject = f"🚨 ALERTE CHARGE SYSTÈME - {load_info['status']}"
-            self.send_email_alert(subject, self.generate_system_report())
+        # Alertes à état : notifiées au déclenchement, à l'aggravation, en rappel et à la résolution
+        rules = self.alert_rules
+        timestamp = snapshot.timestamp
+        for name, info in (('disk', disk_info), ('load', load_info)):
+            if info.severity == UNKNOWN:
+                self.router.add(name, f"🚨 {rules[name].title} - UNKNOWN", timestamp, 'UNKNOWN')
+        self._notify(rules['disk'], disk_info.value, timestamp,
+                     lambda severity: f"🚨 ALERTE ESPACE DISQUE - {severity}", track_peak=True)
+        self._notify(rules['load'], load_info.value, timestamp,
+                     lambda severity: f"🚨 ALERTE CHARGE SYSTÈME - {severity}", track_peak=True)
 
         # Alerte pour le serveur local
-        if not website_status.get('is_online', False):
-            subject = "🚨 SERVEUR LOCAL INACCESSIBLE"
-            self.send_email_alert(subject, self.generate_system_report())
+        self._notify(rules['website'], int(not website_status.get('is_online', False)), timestamp,
+                     lambda severity: "🚨 SERVEUR LOCAL INACCESSIBLE")
+
+        # Endpoints complémentaires (API, CDN) en échec ; un check en erreur laisse l'alerte en l'état
+        endpoints = snapshot.endpoints
+        failing = endpoints.get('failing', [])
+        self._notify(rules['endpoints'], None if endpoints.severity == UNKNOWN else endpoints.value, timestamp,
+                     lambda severity: f"🚨 ENDPOINTS EN ÉCHEC - {', '.join(failing)}")
+
+        # Parcours synthétiques en échec ou hors SLO (évalués uniquement à l'exécution qui les a mesurés)
+        journeys = snapshot.journeys
+        failing_steps = journeys.get('failing', [])
+        fresh = journeys.get('fresh') and journeys.severity != UNKNOWN
+        self._notify(rules['journeys'], len(failing_steps) if fresh else None, timestamp,
+                     lambda severity: f"🚨 PARCOURS SYNTHÉTIQUES EN ÉCHEC - {', '.join(failing_steps)}")
+
+        # Régressions du backend : latence anormale (p95) ou taux d'erreurs 5xx excessif
+        backend = snapshot.backend
+        regressions = backend.get('regressions', [])
+        slow = [r['group'] for r in regressions if r['kind'] == 'latency']
+        failing_routes = [r['group'] for r in regressions if r['kind'] == 'errors']
+        backend_known = backend.severity != UNKNOWN
+        self._notify(rules['backend_latency'], len(slow) if backend_known else None, timestamp,
+                     lambda severity: f"📈 RÉGRESSION LATENCE BACKEND - {', '.join(slow[:5])}")
+        self._notify(rules['backend_errors'], len(failing_routes) if backend_known else None, timestamp,
+                     lambda severity: f"🚨 ERREURS BACKEND - {', '.join(failing_routes[:5])}")
+
+        # Boucle de redémarrage : nouveaux PID répétés pour un même service
+        restarts = snapshot.processes.get('restarts', {})
+        restart_loops = [f"{name} ({count})" for name, count in restarts.items()
+                         if count >= self.process_restart_threshold]
+        worst_restarts = None if snapshot.processes.get('error') else max(restarts.values(), default=0)
+        self._notify(rules['restarts'], worst_restarts, timestamp,
+                     lambda severity: f"🚨 REDÉMARRAGES EN BOUCLE - {', '.join(restart_loops)}")
+
+        # Services du docker-compose de production arrêtés ou en mauvaise santé
+        docker_info = snapshot.docker
+        missing, unhealthy = docker_info.get('missing_services'), docker_info.get('unhealthy')
+        docker_level = None if docker_info.severity == UNKNOWN else docker_info.severity
+        self._notify(rules['docker'], docker_level, timestamp, lambda severity: (
+            f"🚨 CONTENEURS ARRÊTÉS - {', '.join(missing)}" if missing
+            else f"🚨 CONTENEURS EN MAUVAISE SANTÉ - {', '.join(unhealthy)}"))
+
+        # OOM kills détectés depuis le cycle précédent
+        resources = snapshot.resources
+        oom_killed = sorted(name for name, sample in resources.get('containers', {}).items()
+                            if sample['new_oom_kills'])
+        self._notify(rules['oom'], None if resources.severity == UNKNOWN else len(oom_killed), timestamp,
+                     lambda severity: f"🚨 OOM KILL - {', '.join(oom_killed)}")
 
         # Rapport périodique
         logging.info("Monitoring check completed successfully")
-        
-        # Envoi d'un rapport périodique une fois par jour
-        current_hour = datetime.now().hour
-        if current_hour == 0:  # À minuit
-            subject = "📋 Rapport Système Quotidien Chicha Store"
-            self.send_email_alert(subject, self.generate_system_report())
 
-def main():
+        # Rapport quotidien : une seule fois par jour, même sous cron ou après un redémarrage
+        now = snapshot.timestamp
+        daily_due = now.hour == 0 and self._last_daily_report != now.date()  # À minuit
+
+        due = self.router.due(now)
+        if daily_due or due:
+            self.send_digest(snapshot, due, daily_due)
+        self.save_state()
+        self.publish_metrics(snapshot, time.monotonic() - started)
+
+        spool_stats = self.spool.stats()
+        if spool_stats['queue_depth']:
+            logging.warning(
+                f"Alert spool backlog: {spool_stats['queue_depth']} pending, "
+                f"oldest {spool_stats['oldest_age_seconds']:.0f}s"
+            )
+
+    def _notify(self, rule, value, timestamp, subject, track_peak=False):
+        """Passage d'une valeur dans la machine à états ; subject(sévérité) n'est construit qu'en cas d'événement"""
+        event = self.alerts.evaluate(rule, timestamp.timestamp(), value)
+        if event is None:
+            if track_peak:
+                # Pas d'événement, mais le pic d'une condition en attente de digest reste à jour
+                self.router.observe(rule.name, value)
+            return
+        severity = 'RESOLVED' if event == RESOLVED else LEVEL_NAMES[max(self.alerts.level(rule.name), 1)]
+        self.router.add(rule.name, notification_subject(event, rule, subject(severity)), timestamp, severity,
+                        value if track_peak else None)
+
+    def send_digest(self, snapshot, digests, include_daily_report=False):
+        """Envoi des fenêtres échues : immédiates par webhook s'il est configuré, le reste en un seul email"""
+        if self.webhook_url:
+            for digest in [digest for digest in digests if digest.window <= 0]:
+                entries = digest.entries()
+                subject, header = digest.render(entries)
+                if not self.limiter.acquire('webhook'):
+                    continue
+                if post_webhook(self.probes, self.webhook_url, subject, header, worst_severity(entries)):
+                    digest.clear()
+                    digests.remove(digest)
+                else:
+                    # Échec : le jeton est rendu, la fenêtre repart au cycle suivant
+                    self.limiter.refund('webhook')
+            if not digests and not include_daily_report:
+                return
+
+        entries = self.router.entries(digests)
+        report = self.generate_system_report(snapshot)
+        if entries:
+            subject, header = self.router.render(entries)
+            body = f"{header}\n\n{report}"
+        else:
+            subject, body = "📋 Rapport Système Quotidien Chicha Store", report
+
+        # Limite atteinte ou échec d'envoi : les conditions restent en attente et rejoignent le digest suivant
+        if not self.limiter.acquire('email', self.admin_emails):
+            return
+        if self.send_email_alert(subject, body):
+            self.router.clear(digests)
+            if include_daily_report:
+                self._last_daily_report = snapshot.timestamp.date()
+        else:
+            self.limiter.refund('email', self.admin_emails)
+
+    def reload_config(self):
+        """Rechargement de .env.monitoring (SIGHUP)"""
+        load_env_file(ENV_FILE, override=True)
+        self.load_config()
+        self.checks.configure(self.check_intervals, self.check_timeouts)
+        self.router.configure(self.alert_routes)
+        self.limiter.configure(self.send_rates, self.recipient_rate, self.daily_quota)
+        if self.persistent_history is not None:
+            self.persistent_history.configure(self.history_retention, self.check_interval)
+        logging.info(f"Configuration reloaded (interval: {self.check_interval}s)")
+
+    def stop(self):
+        """Demande l'arrêt du daemon à la fin du cycle en cours"""
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def _handle_stop_signal(self, signum, frame):
+        logging.info(f"Received {signal.Signals(signum).name}, stopping monitoring daemon")
+        self.stop()
+
+    def _handle_reload_signal(self, signum, frame):
+        # Le rechargement est appliqué entre deux cycles, jamais pendant un check
+        self._reload_requested = True
+        self._wake_event.set()
+
+    def install_signal_handlers(self):
+        """SIGTERM/SIGINT arrêtent le daemon, SIGHUP recharge la configuration"""
+        signal.signal(signal.SIGTERM, self._handle_stop_signal)
+        signal.signal(signal.SIGINT, self._handle_stop_signal)
+        if hasattr(signal, 'SIGHUP'):
+            signal.signal(signal.SIGHUP, self._handle_reload_signal)
+
+    def close_clients(self):
+        """Fermeture des connexions et fichiers ouverts au premier besoin (Docker, sondes, scraper, historique)"""
+        for client in (self._docker, self.backend_scraper, self._probes, self.journeys, self.persistent_history):
+            if client is not None:
+                client.close()
+
+    def start_metrics_server(self):
+        """Ouverture de /metrics ; un port occupé n'arrête pas la surveillance, l'ouverture est retentée à chaque cycle"""
+        server = deferred_import('metrics_exporter').MetricsServer(self.metrics, self.metrics_address, self.metrics_port)
+        try:
+            server.start()
+        except OSError as e:
+            if not self._metrics_bind_failed:
+                logging.error(f"Port {self.metrics_address}:{self.metrics_port} indisponible pour /metrics ({e}) : "
+                              f"surveillance poursuivie sans export Prometheus, nouvelle tentative à chaque cycle")
+                self._metrics_bind_failed = True
+            return
+        self._metrics_bind_failed = False
+        self.metrics_server = server
+
+    def run_daemon(self, interval=None):
+        """Boucle résidente : un cycle de vérification toutes les `interval` secondes"""
+        if interval is not None:
+            self.interval_override = self.check_interval = interval
+        logging.info(f"Monitoring daemon started (interval: {self.check_interval}s)")
+        self.load_history()
+        self.spool.start()
+        if self.metrics_port:
+            self.metrics = deferred_import('metrics_exporter').MetricsRegistry()
+
+        next_run = time.monotonic()
+        while True:
+            if self.metrics is not None and self.metrics_server is None:
+                self.start_metrics_server()
+            try:
+                self.check_and_alert()
+            except Exception as e:
+                logging.error(f"Monitoring cycle failed: {e}")
+
+            # Planification à cadence fixe : un cycle lent ne décale pas les suivants
+            next_run += self.check_interval
+            now = time.monotonic()
+            if next_run < now:
+                next_run = now
+
+            while True:
+                self._wake_event.wait(next_run - time.monotonic())
+                # Effacé avant la lecture des demandes : un signal reçu ensuite réveille la boucle suivante
+                self._wake_event.clear()
+                if self._stop_event.is_set():
+                    if self.metrics_server is not None:
+                        self.metrics_server.close()
+                    self.spool.close()
+                    self.close_clients()
+                    _close_smtp_sessions()
+                    logging.info("Monitoring daemon stopped")
+                    return
+                if self._reload_requested:
+                    self._reload_requested = False
+                    self.reload_config()
+                    next_run = time.monotonic()
+                    break
+                if time.monotonic() >= next_run:
+                    break
+
+def _close_smtp_sessions():
+    # Aucune session n'existe si aucune alerte n'a été envoyée (module jamais importé)
+    if 'smtp_transport' in sys.modules:
+        sys.modules['smtp_transport'].close_all()
+
+def main(started_at=None):
+    # started_at : instant du lancement mesuré par le point d'entrée run_monitoring.py
+    started_at = started_at or STARTED
+    parser = argparse.ArgumentParser(description='Monitoring Chicha Store')
+    parser.add_argument('--daemon', action='store_true',
+                        help='Exécution résidente avec planificateur interne')
+    parser.add_argument('--interval', type=float, default=None,
+                        help='Intervalle entre deux cycles en secondes (mode daemon)')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='Affiche le profil de démarrage (imports, configuration, checks) en fin d\'exécution')
+    args = parser.parse_args()
+
+    phases = [('chargement des modules', time.perf_counter() - started_at)]
+    started = time.perf_counter()
     monitoring = ChichaStoreMonitoring()
-    monitoring.check_and_alert()
+    phases.append(('initialisation', time.perf_counter() - started))
+    if args.daemon:
+        monitoring.install_signal_handlers()
+        monitoring.run_daemon(args.interval)
+    else:
+        started = time.perf_counter()
+        monitoring.check_and_alert()
+        phases.append(('cycle de vérification', time.perf_counter() - started))
+        # Exécution unique : tentative d'envoi bornée, le reste repartira au prochain passage
+        remaining = monitoring.spool.flush(monitoring.cycle_timeout)
+        if remaining:
+            logging.warning(f"{remaining} alert(s) left in spool for the next run")
+        monitoring.spool.close()
+        monitoring.close_clients()
+        _close_smtp_sessions()
+        if args.profile_startup:
+            print(profile_report(phases, started_at))
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+from datetime import datetime
+
+
+def sort_entries(entries):
+    """Entrées les plus critiques en premier, puis par ancienneté"""
+    return sorted(entries, key=lambda entry: (entry['severity'] != 'CRITICAL', entry['first_seen']))
+
+
+class AlertDigest:
+    """Regroupement des conditions d'alerte d'un cycle (ou d'une fenêtre) en un seul message"""
+
+    def __init__(self, window=0):
+        # Fenêtre de regroupement en secondes (0 : un digest par cycle)
+        self.window = window
+        self.pending = {}
+
+    def add(self, key, subject, timestamp, severity='WARNING', value=None):
+        """Enregistre une condition active ; une condition répétée incrémente son compteur et garde son pic"""
+        entry = self.pending.get(key)
+        if entry is None:
+            self.pending[key] = {
+                'subject': subject,
+                'severity': severity,
+                'count': 1,
+                'first_seen': timestamp,
+                'last_seen': timestamp,
+                'peak': value
+            }
+        else:
+            entry['subject'] = subject
+            entry['severity'] = severity
+            entry['count'] += 1
+            entry['last_seen'] = timestamp
+            if value is not None and (entry.get('peak') is None or value > entry['peak']):
+                entry['peak'] = value
+
+    def is_due(self, now):
+        """Le digest doit partir quand la fenêtre ouverte par la première condition est écoulée"""
+        if not self.pending:
+            return False
+        if self.window <= 0:
+            return True
+        oldest = min(entry['first_seen'] for entry in self.pending.values())
+        return (now - oldest).total_seconds() >= self.window
+
+    def entries(self):
+        """Entrées en attente, les plus critiques en premier"""
+        return sort_entries(self.pending.values())
+
+    def clear(self, until=None):
+        """À appeler une fois le digest effectivement envoyé
+
+        Avec `until`, seules les entrées vues au plus tard à cet instant sont retirées :
+        une condition répétée depuis le rendu du digest reste en attente.
+        """
+        if until is None:
+            self.pending = {}
+        else:
+            self.pending = {key: entry for key, entry in self.pending.items() if entry['last_seen'] > until}
+
+    @staticmethod
+    def render(entries):
+        """Sujet et en-tête du message de digest"""
+        if len(entries) == 1:
+            subject = entries[0]['subject']
+        elif all(e['severity'] == 'RESOLVED' for e in entries):
+            subject = f"✅ ALERTES CHICHA STORE RÉSOLUES - {len(entries)} conditions"
+        else:
+            worst = 'CRITICAL' if any(e['severity'] == 'CRITICAL' for e in entries) else 'WARNING'
+            subject = f"🚨 ALERTES CHICHA STORE - {len(entries)} conditions ({worst})"
+
+        lines = ["⚠️ Conditions d'alerte:"]
+        for entry in entries:
+            peak = f", pic {entry['peak']:g}" if entry.get('peak') is not None else ''
+            lines.append(
+                f"- {entry['subject']} "
+                f"(x{entry['count']}, de {entry['first_seen']:%Y-%m-%d %H:%M:%S} "
+                f"à {entry['last_seen']:%Y-%m-%d %H:%M:%S}{peak})"
+            )
+        return subject, '\n'.join(lines)
+
+    def to_state(self):
+        """Forme sérialisable en JSON (persistance entre deux exécutions cron)"""
+        return {
+            key: dict(entry,
+                      first_seen=entry['first_seen'].isoformat(),
+                      last_seen=entry['last_seen'].isoformat())
+            for key, entry in self.pending.items()
+        }
+
+    def load_state(self, state):
+        self.pending = {
+            key: dict(entry,
+                      first_seen=datetime.fromisoformat(entry['first_seen']),
+                      last_seen=datetime.fromisoformat(entry['last_seen']))
+            for key, entry in (state or {}).items()
+        }
@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+
+from startup import deferred_import
+
+
+def build_alert_message(sender, recipients, subject, body):
+    """Message d'alerte sérialisé, prêt pour le spool (monitoring local et collecteur de flotte)"""
+    MIMEMultipart = deferred_import('email.mime.multipart').MIMEMultipart
+    MIMEText = deferred_import('email.mime.text').MIMEText
+    email_utils = deferred_import('email.utils')
+    message = MIMEMultipart()
+    message['From'] = sender
+    message['To'] = ', '.join(recipients)
+    message['Subject'] = subject
+    # Message-ID et date figés à la mise en file : identiques à chaque tentative
+    message['Message-ID'] = email_utils.make_msgid(domain='chicha-store.monitoring')
+    message['Date'] = email_utils.formatdate(localtime=True)
+    message.attach(MIMEText(body, 'plain'))
+    return message.as_string()
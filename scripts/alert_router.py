@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import fcntl
+import logging
+import argparse
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from alert_digest import AlertDigest, sort_entries
+from send_limits import SendLimiter, parse_rates
+
+# Fenêtre de regroupement par sévérité (secondes) ; 0 = envoi immédiat
+DEFAULT_WINDOWS = {'CRITICAL': 0, 'WARNING': 900, 'UNKNOWN': 900, 'RESOLVED': 900}
+# Suffixe de clé des résolutions, rangées à côté du déclenchement plutôt qu'à sa place
+RESOLVED_SUFFIX = ':resolved'
+
+# Couleurs des messages Discord (embeds) et Slack (attachments) par sévérité
+DISCORD_COLORS = {'critical': 16711680, 'warning': 16776960, 'info': 65280}
+SLACK_COLORS = {'critical': 'danger', 'warning': 'warning', 'info': 'good'}
+
+
+def parse_windows(value, defaults=DEFAULT_WINDOWS):
+    """« SÉVÉRITÉ=secondes,... » (variable ALERT_ROUTES), complété par les fenêtres par défaut"""
+    windows = dict(defaults)
+    for item in (value or '').split(','):
+        severity, _, seconds = item.strip().partition('=')
+        if severity and seconds:
+            windows[severity.upper()] = float(seconds)
+    return windows
+
+
+def worst_severity(entries):
+    """Sévérité d'un message regroupant plusieurs entrées (critical, warning ou info)"""
+    severities = {entry['severity'] for entry in entries}
+    if 'CRITICAL' in severities:
+        return 'critical'
+    return 'info' if severities <= {'RESOLVED'} else 'warning'
+
+
+class AlertRouter:
+    """Routage des conditions d'alerte par sévérité : envoi immédiat ou digest fenêtré
+
+    Chaque fenêtre a son propre AlertDigest ; une condition qui change de sévérité
+    change de fenêtre en gardant son compteur, sa première occurrence et son pic.
+    Une résolution a sa propre entrée : un avertissement déclenché puis résolu dans
+    la même fenêtre apparaît deux fois dans le digest (déclenchement, puis RÉSOLU).
+    """
+
+    def __init__(self, windows=None):
+        self.windows = dict(DEFAULT_WINDOWS if windows is None else windows)
+        self.digests = {}
+
+    def window_for(self, severity):
+        return self.windows.get(severity, self.windows.get('WARNING', 0))
+
+    def _digest(self, window):
+        digest = self.digests.get(window)
+        if digest is None:
+            digest = self.digests[window] = AlertDigest(window)
+        return digest
+
+    def add(self, key, subject, timestamp, severity='WARNING', value=None):
+        """Enregistre une condition dans la fenêtre de sa sévérité"""
+        if severity == 'RESOLVED':
+            key += RESOLVED_SUFFIX
+        digest = self._digest(self.window_for(severity))
+        if key not in digest.pending:
+            for other in self.digests.values():
+                if key in other.pending:
+                    digest.pending[key] = other.pending.pop(key)
+                    break
+        digest.add(key, subject, timestamp, severity, value)
+
+    def observe(self, key, value):
+        """Mise à jour du pic d'une condition en attente, sans nouvelle occurrence"""
+        for digest in self.digests.values():
+            entry = digest.pending.get(key)
+            if entry is not None:
+                if value is not None and (entry.get('peak') is None or value > entry['peak']):
+                    entry['peak'] = value
+                return
+
+    def configure(self, windows):
+        """Nouvelles fenêtres (rechargement de configuration) ; les conditions en attente sont reclassées"""
+        state = self.to_state()
+        self.windows = dict(windows)
+        self.load_state(state)
+
+    def due(self, now):
+        """Fenêtres échues, immédiates en premier"""
+        return [self.digests[window] for window in sorted(self.digests) if self.digests[window].is_due(now)]
+
+    render = staticmethod(AlertDigest.render)
+
+    def entries(self, digests):
+        return sort_entries(entry for digest in digests for entry in digest.pending.values())
+
+    def clear(self, digests):
+        """À appeler une fois les fenêtres effectivement envoyées"""
+        for digest in digests:
+            digest.clear()
+
+    def acknowledge(self, window, until):
+        """Livraison confirmée de la fenêtre `window` rendue à l'instant `until`"""
+        digest = self.digests.get(window)
+        if digest is not None:
+            digest.clear(until)
+
+    def to_state(self):
+        """Même forme que AlertDigest.to_state (persistance entre deux exécutions cron)"""
+        state = {}
+        for digest in self.digests.values():
+            state.update(digest.to_state())
+        return state
+
+    def load_state(self, state):
+        loaded = AlertDigest()
+        loaded.load_state(state)
+        self.digests = {}
+        for key, entry in loaded.pending.items():
+            self._digest(self.window_for(entry['severity'])).pending[key] = entry
+
+
+@contextmanager
+def locked_router(path, windows=None):
+    """Routeur chargé depuis `path` sous verrou exclusif, réécrit atomiquement à la sortie"""
+    with open(f"{path}.lock", 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        router = AlertRouter(windows)
+        try:
+            with open(path) as f:
+                router.load_state(json.load(f))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable alert routing state {path}: {e}")
+        yield router
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(router.to_state(), f)
+        os.replace(tmp_path, path)
+
+
+def webhook_payload(url, subject, body, severity):
+    """Corps JSON d'un webhook Discord (embeds) ou Slack (attachments), selon l'URL"""
+    if 'discord' in url:
+        payload = {'embeds': [{
+            'title': subject,
+            'description': body,
+            'color': DISCORD_COLORS[severity],
+            'timestamp': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        }]}
+    else:
+        payload = {'attachments': [{
+            'color': SLACK_COLORS[severity],
+            'title': subject,
+            'text': body,
+            'footer': 'Chicha Store Monitoring'
+        }]}
+    return json.dumps(payload).encode()
+
+
+def post_webhook(probes, url, subject, body, severity):
+    """Envoi sur un webhook par le client keep-alive des sondes ; False en cas d'échec"""
+    result = probes.probe('webhook', url, method='POST', body=webhook_payload(url, subject, body, severity),
+                          headers={'Content-Type': 'application/json'})
+    if not result['ok']:
+        logging.error(f"Webhook notification failed: {result.get('error') or result['status_code']}")
+    return result['ok']
+
+
+def delivery_id(digest, now):
+    """Identifiant d'un envoi dû, à repasser à la commande ack une fois la notification livrée"""
+    return f"{digest.window:g}@{now.timestamp():.6f}"
+
+
+def parse_delivery_id(value):
+    window, _, timestamp = value.partition('@')
+    # Marge d'une milliseconde : l'aller-retour par le texte arrondit l'instant du rendu
+    return float(window), datetime.fromtimestamp(float(timestamp)) + timedelta(milliseconds=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Routage des notifications des scripts shell : une ligne « identifiant<TAB>sévérité<TAB>message » "
+                    "par envoi dû, acquittée par la commande ack une fois la notification livrée"
+    )
+    parser.add_argument('--state', default=os.getenv('ALERT_ROUTER_STATE', '/tmp/chicha_store_alert_router.json'))
+    parser.add_argument('--routes', default=os.getenv('ALERT_ROUTES', ''), help='SÉVÉRITÉ=secondes,...')
+    parser.add_argument('--channel', default='webhook', help='Canal de livraison (seau à jetons de send_limits)')
+    commands = parser.add_subparsers(dest='command', required=True)
+    route = commands.add_parser('route', help='Enregistre une condition puis affiche les envois dus')
+    route.add_argument('key')
+    route.add_argument('severity', type=str.upper)
+    route.add_argument('message')
+    route.add_argument('--value', type=float)
+    commands.add_parser('flush', help='Affiche les envois dus')
+    ack = commands.add_parser('ack', help='Retire des envois dus une notification livrée')
+    ack.add_argument('ids', nargs='+', help='Identifiants affichés par route ou flush')
+    nack = commands.add_parser('nack', help="Échec de livraison : le jeton pris pour l'envoi est rendu")
+    nack.add_argument('ids', nargs='+', help='Identifiants affichés par route ou flush')
+    args = parser.parse_args()
+
+    limiter = SendLimiter(os.getenv('SEND_LIMITS_STATE_FILE', '/tmp/chicha_store_send_limits.json'),
+                          parse_rates(os.getenv('SEND_RATE_LIMITS')))
+    if args.command == 'nack':
+        # La fenêtre est restée en attente : seul le jeton du canal est à rendre
+        for _ in args.ids:
+            limiter.refund(args.channel)
+        return
+
+    now = datetime.now()
+    with locked_router(args.state, parse_windows(args.routes)) as router:
+        if args.command == 'ack':
+            for delivery in args.ids:
+                router.acknowledge(*parse_delivery_id(delivery))
+            return
+        if args.command == 'route':
+            router.add(args.key, args.message, now, args.severity, args.value)
+        # Seau vide : la fenêtre reste en attente et part avec le digest suivant ;
+        # le jeton pris ici est rendu par nack si la livraison échoue
+        due = [digest for digest in router.due(now) if limiter.acquire(args.channel)]
+        # Les fenêtres restent en attente jusqu'à l'ack : un envoi échoué repart au prochain appel
+        for digest in due:
+            entries = digest.entries()
+            subject, header = AlertDigest.render(entries)
+            text = entries[0]['subject'] if len(entries) == 1 and entries[0]['count'] == 1 else f"{subject}\n{header}"
+            # Sauts de ligne échappés : une notification par ligne, texte JSON prêt pour le webhook
+            print(f"{delivery_id(digest, now)}\t{worst_severity(entries)}\t{text}".replace('\n', '\\n'))
+
+
+if __name__ == '__main__':
+    main()
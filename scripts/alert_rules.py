@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+from collections import deque
+
+# Phases d'une alerte
+INACTIVE, PENDING, FIRING = 0, 1, 2
+LEVEL_NAMES = ('NORMAL', 'WARNING', 'CRITICAL')
+
+# Événements à notifier (None : rien de nouveau)
+FIRING_EVENT = 'firing'
+ESCALATED = 'escalated'
+RENOTIFY = 'renotify'
+RESOLVED = 'resolved'
+FLAPPING = 'flapping'
+
+
+class AlertRule:
+    """Seuils d'une alerte, avec bande d'hystérésis et durée minimale avant déclenchement
+
+    Une valeur franchit le seuil pour entrer dans un niveau, mais ne le quitte
+    qu'une fois repassée `hysteresis` en dessous : une métrique qui oscille
+    autour du seuil ne bascule pas à chaque cycle. Sans seuil WARNING, la règle
+    n'a qu'un niveau (CRITICAL).
+    """
+
+    __slots__ = ('name', 'title', 'warning', 'critical', 'hysteresis', 'for_seconds',
+                 'renotify_seconds', 'flap_threshold', 'flap_window')
+
+    def __init__(self, name, title, warning=None, critical=1, hysteresis=0.0, for_seconds=0.0,
+                 renotify_seconds=3600, flap_threshold=4, flap_window=3600):
+        self.name = name
+        self.title = title
+        self.warning = warning
+        self.critical = critical
+        self.hysteresis = hysteresis
+        self.for_seconds = for_seconds
+        # 0 : pas de rappel tant que l'alerte reste active
+        self.renotify_seconds = renotify_seconds
+        # Nombre de basculements dans flap_window au-delà duquel les notifications sont suspendues
+        self.flap_threshold = flap_threshold
+        self.flap_window = flap_window
+
+    def level(self, value, current):
+        """Niveau (0, 1, 2) de la valeur, compte tenu du niveau actuel"""
+        if value >= self.critical or (current == 2 and value > self.critical - self.hysteresis):
+            return 2
+        warning = self.warning
+        if warning is not None and (value >= warning or (current >= 1 and value > warning - self.hysteresis)):
+            return 1
+        return 0
+
+
+class AlertState:
+    __slots__ = ('phase', 'level', 'since', 'notified_at', 'flapping', 'transitions')
+
+    def __init__(self, flap_threshold):
+        self.phase = INACTIVE
+        self.level = 0
+        # Début de la phase en cours (pending ou firing)
+        self.since = 0.0
+        self.notified_at = 0.0
+        self.flapping = False
+        # Instants des derniers passages firing <-> résolu
+        self.transitions = deque(maxlen=max(flap_threshold, 1))
+
+
+class AlertEngine:
+    """Machine à états des alertes : inactive -> pending -> firing -> résolue
+
+    evaluate() ne retourne un événement que lorsqu'une notification est due :
+    déclenchement, aggravation, rappel périodique, résolution, ou entrée en
+    instabilité (flapping), après laquelle l'alerte reste silencieuse jusqu'à
+    ce qu'elle se stabilise pendant flap_window.
+    """
+
+    def __init__(self):
+        self.states = {}
+
+    def evaluate(self, rule, now, value, key=None):
+        """Nouvelle valeur d'une règle ; retourne l'événement à notifier ou None
+
+        Une valeur None (check en erreur) laisse l'alerte dans son état actuel.
+        """
+        key = key or rule.name
+        state = self.states.get(key)
+        if state is None:
+            if value is None or rule.level(value, 0) == 0:
+                # Chemin le plus fréquent : aucune alerte et rien à suivre, sans allocation
+                return None
+            state = self.states[key] = AlertState(rule.flap_threshold)
+        elif value is None:
+            return None
+
+        phase = state.phase
+        level = rule.level(value, state.level if phase == FIRING else 0)
+        event = None
+        if level == 0:
+            if phase == FIRING:
+                event = self._transition(rule, state, now, RESOLVED)
+            state.phase = INACTIVE
+            state.level = 0
+        elif phase == FIRING:
+            if level > state.level:
+                event = ESCALATED
+            elif (rule.renotify_seconds and now - state.notified_at >= rule.renotify_seconds
+                  and not state.flapping):
+                event = RENOTIFY
+            state.level = level
+        else:
+            if phase == INACTIVE:
+                state.phase = PENDING
+                state.since = now
+            state.level = max(state.level, level) if phase == PENDING else level
+            if now - state.since >= rule.for_seconds:
+                state.phase = FIRING
+                state.since = now
+                state.level = level
+                event = self._transition(rule, state, now, FIRING_EVENT)
+
+        if state.flapping and event is None and now - state.transitions[-1] > rule.flap_window:
+            # Fin d'instabilité : l'état stabilisé est annoncé une fois
+            state.flapping = False
+            event = FIRING_EVENT if state.phase == FIRING else RESOLVED
+        elif state.flapping and event in (ESCALATED, RENOTIFY):
+            event = None
+        if event is not None:
+            state.notified_at = now
+        elif state.phase == INACTIVE and not state.flapping and (
+                not state.transitions or now - state.transitions[-1] > rule.flap_window):
+            # Alerte résolue et historique de basculements expiré : plus rien à conserver
+            del self.states[key]
+        return event
+
+    def _transition(self, rule, state, now, event):
+        transitions = state.transitions
+        transitions.append(now)
+        if state.flapping:
+            return None
+        if (rule.flap_threshold and len(transitions) == transitions.maxlen
+                and now - transitions[0] <= rule.flap_window):
+            state.flapping = True
+            return FLAPPING
+        return event
+
+    def level(self, key):
+        state = self.states.get(key)
+        return 0 if state is None else state.level
+
+    def to_state(self):
+        """Forme compacte sérialisable : clé -> [phase, niveau, depuis, notifié, flapping, basculements]"""
+        return {
+            key: [state.phase, state.level, state.since, state.notified_at, int(state.flapping),
+                  list(state.transitions)]
+            for key, state in self.states.items()
+        }
+
+    def load_state(self, state, flap_threshold=4):
+        self.states = {}
+        for key, (phase, level, since, notified_at, flapping, transitions) in (state or {}).items():
+            entry = self.states[key] = AlertState(flap_threshold)
+            entry.phase, entry.level, entry.since, entry.notified_at = phase, level, since, notified_at
+            entry.flapping = bool(flapping)
+            entry.transitions.extend(transitions)
+
+
+def notification_subject(event, rule, subject, key=None):
+    """Sujet d'une notification à partir du sujet de déclenchement de la règle"""
+    if event == RESOLVED:
+        return f"✅ RÉSOLU - {key or rule.title}"
+    if event == FLAPPING:
+        return f"🔁 ALERTE INSTABLE - {key or rule.title} (notifications suspendues)"
+    if event == RENOTIFY:
+        return f"{subject} (toujours active)"
+    return subject
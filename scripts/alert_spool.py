@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import time
+import fcntl
+import random
+import logging
+import threading
+from contextlib import contextmanager
+
+
+class AlertSpool:
+    """File d'attente persistante des alertes sortantes (journal en ajout seul)
+
+    Chaque alerte est écrite dans le journal avant toute tentative d'envoi, puis
+    acquittée une fois acceptée par le serveur SMTP. Au redémarrage, le journal
+    est rejoué : les alertes non acquittées repartent avec leur nombre de
+    tentatives. Le journal est compacté quand il dépasse max_bytes.
+
+    Le daemon et les exécutions cron partagent le même répertoire : chaque
+    opération prend un verrou exclusif (flock) et relit d'abord les
+    enregistrements ajoutés par les autres processus ; un seul processus à la
+    fois envoie les alertes.
+    """
+
+    JOURNAL_NAME = 'alerts.journal'
+
+    def __init__(self, directory, deliver, max_bytes=5 * 1024 * 1024, max_pending=1000,
+                 fsync_interval=0.5, base_delay=5, max_delay=900, max_age=86400):
+        self.directory = directory
+        # deliver(record) envoie l'alerte et lève une exception en cas d'échec
+        self.deliver = deliver
+        self.max_bytes = max_bytes
+        self.max_pending = max_pending
+        self.fsync_interval = fsync_interval
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_age = max_age
+
+        self.path = os.path.join(directory, self.JOURNAL_NAME)
+        self.pending = {}
+        # Position du journal déjà appliquée à `pending`
+        self._offset = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._dirty = False
+        self._last_sync = time.monotonic()
+        self._sender = None
+        self._sending = threading.Lock()
+        self._stopping = False
+        # Après un échec, toute la file attend : le serveur SMTP est probablement indisponible
+        self._hold_until = 0.0
+
+        # Compteurs exposés comme métriques
+        self.sent = 0
+        self.failed_attempts = 0
+        self.dropped = 0
+
+        os.makedirs(directory, exist_ok=True)
+        # Verrous partagés entre processus : le journal (remplacé à la compaction) et l'envoi
+        self._lock_file = open(f"{self.path}.lock", 'a')
+        self._send_lock_file = open(f"{self.path}.send.lock", 'a')
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            self._offset = self._replay()
+            self._journal = open(self.path, 'a', encoding='utf-8')
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        if self.pending:
+            logging.info(f"Alert spool replayed: {len(self.pending)} pending alert(s)")
+
+    def _replay(self, offset=0):
+        """Application du journal à partir de `offset` ; une fin de fichier tronquée est ignorée
+
+        Retourne la position atteinte (fin du dernier enregistrement valide).
+        """
+        if not os.path.exists(self.path):
+            return 0
+        valid_size = offset
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    logging.warning(f"Truncated alert spool record ignored in {self.path}")
+                    break
+                valid_size += len(line)
+                op = entry.pop('op')
+                if op == 'enqueue':
+                    self.pending[entry['id']] = entry
+                elif op == 'retry' and entry['id'] in self.pending:
+                    self.pending[entry['id']].update(entry)
+                elif op in ('ack', 'drop'):
+                    self.pending.pop(entry['id'], None)
+        if valid_size < os.path.getsize(self.path):
+            os.truncate(self.path, valid_size)
+        return valid_size
+
+    def _catch_up(self):
+        """Enregistrements ajoutés par les autres processus depuis la dernière opération"""
+        try:
+            current = os.stat(self.path)
+        except FileNotFoundError:
+            current = None
+        if current is None or current.st_ino != os.fstat(self._journal.fileno()).st_ino:
+            # Journal compacté par un autre processus : relecture complète
+            self._journal.close()
+            self.pending = {}
+            self._offset = self._replay()
+            self._journal = open(self.path, 'a', encoding='utf-8')
+            self._dirty = False
+        elif current.st_size != self._offset:
+            self._offset = self._replay(self._offset)
+
+    @contextmanager
+    def _locked(self):
+        """Verrou du processus et verrou du journal, avec l'état des autres processus rattrapé"""
+        with self._lock:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                self._catch_up()
+                yield
+            finally:
+                self._offset = os.fstat(self._journal.fileno()).st_size
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _append(self, op, entry):
+        self._journal.write(json.dumps(dict(entry, op=op)) + '\n')
+        self._journal.flush()
+        self._dirty = True
+
+    def _sync(self, force=False):
+        """fsync groupé : au plus une fois par fsync_interval, sauf si forcé"""
+        if not self._dirty:
+            return
+        now = time.monotonic()
+        if force or now - self._last_sync >= self.fsync_interval:
+            os.fsync(self._journal.fileno())
+            self._dirty = False
+            self._last_sync = now
+
+    def _compact(self):
+        """Réécriture du journal avec les seules alertes en attente"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in self.pending.values():
+                f.write(json.dumps(dict(entry, op='enqueue')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal.close()
+        os.replace(tmp_path, self.path)
+        self._journal = open(self.path, 'a', encoding='utf-8')
+        self._dirty = False
+
+    def enqueue(self, subject, message, sender, recipients):
+        """Ajout d'une alerte au journal ; retourne son identifiant
+
+        `message` est le message déjà sérialisé : il porte son propre Message-ID,
+        identique à chaque tentative, ce qui permet aux serveurs et clients de
+        messagerie d'écarter un doublon si un crash survient entre l'envoi et
+        l'écriture de l'acquittement.
+        """
+        with self._locked():
+            record = {
+                'id': os.urandom(16).hex(),
+                'subject': subject,
+                'message': message,
+                'sender': sender,
+                'recipients': recipients,
+                'created': time.time(),
+                'attempts': 0,
+                'next_attempt': 0
+            }
+            # Occupation disque bornée : les alertes les plus anciennes sont abandonnées
+            while len(self.pending) >= self.max_pending:
+                oldest = min(self.pending.values(), key=lambda entry: entry['created'])
+                self._drop(oldest, 'spool full')
+            self.pending[record['id']] = record
+            self._append('enqueue', record)
+            self._sync()
+            self._wakeup.notify()
+            return record['id']
+
+    def _drop(self, record, reason):
+        logging.error(f"Alert dropped from spool ({reason}): {record['subject']}")
+        self.pending.pop(record['id'], None)
+        self._append('drop', {'id': record['id']})
+        self.dropped += 1
+
+    def _backoff(self, attempts):
+        """Backoff exponentiel plafonné, avec jitter sur la moitié du délai"""
+        delay = min(self.max_delay, self.base_delay * 2 ** attempts)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _due_records(self, now):
+        if now < self._hold_until:
+            return []
+        return sorted(
+            (entry for entry in self.pending.values() if entry['next_attempt'] <= now),
+            key=lambda entry: entry['created']
+        )
+
+    def _claim_sender(self):
+        """Droit d'envoi exclusif (threads et processus) ; False si un autre envoi est en cours"""
+        if not self._sending.acquire(blocking=False):
+            return False
+        try:
+            fcntl.flock(self._send_lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._sending.release()
+            return False
+        return True
+
+    def _release_sender(self):
+        fcntl.flock(self._send_lock_file, fcntl.LOCK_UN)
+        self._sending.release()
+
+    def process_due(self):
+        """Une passe d'envoi sur les alertes arrivées à échéance ; retourne le nombre envoyé
+
+        None si un autre processus (ou thread) envoie déjà : il relira nos alertes dans le journal.
+        """
+        if not self._claim_sender():
+            return None
+        try:
+            return self._process_due()
+        finally:
+            self._release_sender()
+
+    def _process_due(self):
+        with self._locked():
+            now = time.time()
+            for record in list(self.pending.values()):
+                if now - record['created'] > self.max_age:
+                    self._drop(record, 'expired')
+            due = self._due_records(now)
+            # Tout ce qui va partir doit être durable avant l'envoi
+            self._sync(force=True)
+
+        delivered = 0
+        for record in due:
+            try:
+                self.deliver(record)
+            except Exception as e:
+                with self._locked():
+                    # Entrée rechargée si un autre processus a compacté le journal entre-temps
+                    record = self.pending.get(record['id'], record)
+                    record['attempts'] += 1
+                    record['next_attempt'] = time.time() + self._backoff(record['attempts'])
+                    self._append('retry', {
+                        'id': record['id'],
+                        'attempts': record['attempts'],
+                        'next_attempt': record['next_attempt']
+                    })
+                    self.failed_attempts += 1
+                    self._hold_until = record['next_attempt']
+                logging.warning(f"Alert delivery failed (attempt {record['attempts']}): {e}")
+                break
+            with self._locked():
+                self.pending.pop(record['id'], None)
+                self._append('ack', {'id': record['id']})
+                # L'acquittement est rendu durable immédiatement pour ne pas renvoyer au redémarrage
+                self._sync(force=True)
+                self.sent += 1
+            delivered += 1
+
+        with self._locked():
+            self._sync(force=True)
+            if os.path.getsize(self.path) > self.max_bytes:
+                self._compact()
+        return delivered
+
+    def flush(self, timeout):
+        """Mode one-shot : tentatives d'envoi jusqu'à vider la file ou atteindre timeout"""
+        deadline = time.monotonic() + timeout
+        while self.pending and time.monotonic() < deadline:
+            if self.process_due() is None:
+                # Envoi en cours dans un autre processus (daemon) : il partira avec sa passe
+                time.sleep(0.1)
+                continue
+            with self._locked():
+                if not self._due_records(time.time()):
+                    break
+        with self._locked():
+            return len(self.pending)
+
+    def _next_wakeup(self):
+        if not self.pending:
+            return None
+        next_attempt = min(entry['next_attempt'] for entry in self.pending.values())
+        return max(0.0, max(next_attempt, self._hold_until) - time.time())
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._stopping:
+                    return
+                self._wakeup.wait(self._next_wakeup())
+                if self._stopping:
+                    return
+            try:
+                if self.process_due() is None:
+                    time.sleep(1)
+            except Exception as e:
+                logging.error(f"Alert spool sender error: {e}")
+                time.sleep(self.base_delay)
+
+    def start(self):
+        """Démarrage de l'envoi en tâche de fond (mode daemon)"""
+        if self._sender is None:
+            self._sender = threading.Thread(target=self._run, name='alert-spool', daemon=True)
+            self._sender.start()
+
+    def close(self, timeout=5):
+        with self._lock:
+            self._stopping = True
+            self._wakeup.notify()
+        if self._sender is not None:
+            self._sender.join(timeout)
+        with self._lock:
+            self._sync(force=True)
+            self._journal.close()
+            self._lock_file.close()
+            self._send_lock_file.close()
+
+    def stats(self):
+        """Métriques de la file : profondeur, âge de la plus ancienne alerte, taille du journal"""
+        with self._lock:
+            oldest = min((entry['created'] for entry in self.pending.values()), default=None)
+            return {
+                'queue_depth': len(self.pending),
+                'oldest_age_seconds': time.time() - oldest if oldest else 0.0,
+                'journal_bytes': os.path.getsize(self.path),
+                'sent_total': self.sent,
+                'failed_attempts_total': self.failed_attempts,
+                'dropped_total': self.dropped
+            }
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import importlib.util
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Corps d'alerte de taille réaliste (digest + rapport système, ~2 Ko)
+ALERT_BODY = "⚠️ Conditions d'alerte:\n" + ''.join(
+    f"- 🚨 CONDITION {index} (x3, de 2026-01-01 00:00:00 à 2026-01-01 00:15:00, pic {80 + index})\n"
+    for index in range(5)
+) + "\n📊 Rapport Système Chicha Store\n" + "- Métrique: valeur\n" * 80
+
+
+def harness_environment(directory, sink):
+    """Configuration isolée : spool et état temporaires, envoi vers le puits SMTP local"""
+    environment = {
+        'MONITORING_ENV_FILE': os.path.join(directory, 'absent.env'),
+        'MONITORING_STATE_FILE': os.path.join(directory, 'state.json'),
+        'MONITORING_HISTORY_DIR': os.path.join(directory, 'history'),
+        'ALERT_SPOOL_DIR': os.path.join(directory, 'spool'),
+        'EMAIL_MONITORING_STATE_FILE': os.path.join(directory, 'email_state.json'),
+        'SEND_LIMITS_STATE_FILE': os.path.join(directory, 'send_limits.json'),
+        'MONITORING_METRICS_PORT': '0',
+        'DOCKER_SOCKET': os.path.join(directory, 'docker.sock'),
+        'EMAIL_SMTP_SERVER': '127.0.0.1',
+        'EMAIL_SMTP_PORT': str(sink.port),
+        'EMAIL_SMTP_STARTTLS': 'true' if sink.starttls else 'false',
+        'EMAIL_SENDER': 'monitoring@chicha-store.test',
+        'EMAIL_PASSWORD': 'harness',
+        'ADMIN_EMAILS': 'admin@chicha-store.test,ops@chicha-store.test',
+        'PROCESS_SAMPLING': 'false',
+        'ANOMALY_DETECTION': 'false',
+    }
+    if sink.starttls:
+        environment['EMAIL_SMTP_CAFILE'] = sink.certfile
+    return environment
+
+
+def latency_summary(samples):
+    """Médiane, queue de distribution et maximum (ms)"""
+    samples = sorted(samples)
+
+    def rank(fraction):
+        return samples[min(len(samples) - 1, int(len(samples) * fraction))] * 1000
+
+    return {'p50_ms': rank(0.5), 'p95_ms': rank(0.95), 'p99_ms': rank(0.99), 'max_ms': samples[-1] * 1000}
+
+
+def drive(send, messages, rate, sink):
+    """Envois successifs au rythme cible `rate` (msg/s, 0 = au plus vite) : débit, latences, connexions"""
+    received, connections, tls_sessions = sink.received, sink.connections, sink.tls_sessions
+    interval = 1 / rate if rate else 0
+    latencies, failures = [], 0
+    clock = time.perf_counter
+    started = clock()
+    for index in range(messages):
+        if interval:
+            delay = started + index * interval - clock()
+            if delay > 0:
+                time.sleep(delay)
+        sent = clock()
+        if send(index) is False:
+            failures += 1
+        latencies.append(clock() - sent)
+    elapsed = clock() - started
+
+    delivered = sink.received - received
+    opened = sink.connections - connections
+    return dict({
+        'messages': messages,
+        'delivered': delivered,
+        'failures': failures,
+        'messages_per_second': delivered / elapsed,
+        'elapsed_seconds': elapsed,
+        'smtp_connections': opened,
+        'tls_sessions': sink.tls_sessions - tls_sessions,
+        'messages_per_connection': delivered / opened if opened else None
+    }, **latency_summary(latencies))
+
+
+def load_email_monitoring():
+    spec = importlib.util.spec_from_file_location('email_monitoring', os.path.join(SCRIPTS_DIR, 'email-monitoring.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_harness(messages, rate, starttls, burst):
+    from smtp_sink import SMTPSink
+
+    directory = tempfile.mkdtemp(prefix='chicha_alert_throughput_')
+    sink = SMTPSink(keep_messages=False, starttls=starttls).start()
+    os.environ.update(harness_environment(directory, sink))
+
+    results = {}
+    try:
+        sys.path.insert(0, SCRIPTS_DIR)
+        import smtp_transport
+        import advanced_monitoring
+        monitoring = advanced_monitoring.ChichaStoreMonitoring()
+
+        # Chemin complet du daemon : mise en file durable puis envoi par le spool
+        def send_alert(index):
+            queued = monitoring.send_email_alert(f"🚨 ALERTE DÉBIT {index}", ALERT_BODY)
+            return queued and monitoring.spool.flush(10) == 0
+
+        smtp_transport.close_all()
+        results['send_email_alert'] = drive(send_alert, messages, rate, sink)
+
+        if burst:
+            # Rafale : toutes les alertes en file d'abord, puis vidage du spool d'un seul tenant
+            smtp_transport.close_all()
+            received, connections, tls_sessions = sink.received, sink.connections, sink.tls_sessions
+            burst_result = drive(
+                lambda index: monitoring.send_email_alert(f"🚨 RAFALE {index}", ALERT_BODY), messages, 0, sink)
+            started = time.perf_counter()
+            monitoring.spool.flush(60)
+            elapsed = time.perf_counter() - started
+            delivered, opened = sink.received - received, sink.connections - connections
+            # Latences de la mise en file ; débit de bout en bout et débit du seul vidage
+            burst_result.update({
+                'delivered': delivered,
+                'messages_per_second': delivered / (burst_result['elapsed_seconds'] + elapsed),
+                'elapsed_seconds': burst_result['elapsed_seconds'] + elapsed,
+                'smtp_connections': opened,
+                'tls_sessions': sink.tls_sessions - tls_sessions,
+                'messages_per_connection': delivered / opened if opened else None,
+                'drain_messages_per_second': delivered / elapsed
+            })
+            results['spool_burst'] = burst_result
+
+        email_monitoring = load_email_monitoring().EmailMonitoring()
+        smtp_transport.close_all()
+        results['send_monitoring_email'] = drive(
+            lambda index: email_monitoring.send_monitoring_email(f"Alertes Système {index}", ALERT_BODY, 'warning'),
+            messages, rate, sink)
+
+        monitoring.spool.close()
+        monitoring.close_clients()
+        smtp_transport.close_all()
+    finally:
+        sink.close()
+    return results
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s: %(message)s')
+    parser = argparse.ArgumentParser(description="Débit de la livraison des alertes contre un puits SMTP local")
+    parser.add_argument('--messages', type=int, default=500, help='Messages envoyés par scénario')
+    parser.add_argument('--rate', type=float, default=0, help='Rythme cible en msg/s (0 = au plus vite)')
+    parser.add_argument('--starttls', action='store_true', help='Session STARTTLS (certificat auto-signé)')
+    parser.add_argument('--burst', action='store_true', help='Ajoute le scénario de rafale (vidage du spool)')
+    parser.add_argument('--json', help='Écrit les résultats dans ce fichier')
+    args = parser.parse_args()
+
+    results = run_harness(args.messages, args.rate, args.starttls, args.burst)
+
+    print(f"📨 Livraison des alertes : {args.messages} message(s) par scénario"
+          f"{' (STARTTLS)' if args.starttls else ''}")
+    problems = []
+    for scenario, result in results.items():
+        print(f"- {scenario}: {result['messages_per_second']:.0f} msg/s, "
+              f"p50 {result['p50_ms']:.2f} / p95 {result['p95_ms']:.2f} / p99 {result['p99_ms']:.2f} "
+              f"/ max {result['max_ms']:.2f} ms, {result['smtp_connections']} connexion(s) SMTP"
+              f"{' (STARTTLS)' if result['tls_sessions'] else ''}")
+        if 'drain_messages_per_second' in result:
+            print(f"  vidage du spool : {result['drain_messages_per_second']:.0f} msg/s")
+        if result['delivered'] != result['messages'] or result['failures']:
+            problems.append(f"{scenario}: {result['delivered']}/{result['messages']} reçu(s)")
+        # Une session persistante par scénario : toute reconnexion est une régression
+        if result['smtp_connections'] > 1:
+            problems.append(f"{scenario}: {result['smtp_connections']} connexions SMTP")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if problems:
+        print(f"❌ {'; '.join(problems)}")
+        sys.exit(1)
+    print('✅ Aucun message perdu, session SMTP réutilisée')
+
+
+if __name__ == '__main__':
+    main()
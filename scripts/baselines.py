@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+
+import math
+import time
+from array import array
+
+# Facteur de cohérence entre MAD et écart-type pour une distribution normale
+MAD_SCALE = 1.4826
+HOURS_PER_WEEK = 168
+
+
+class EWMA:
+    """Moyenne et variance à décroissance exponentielle, mises à jour en O(1)"""
+
+    __slots__ = ('alpha', 'mean', 'variance', 'count')
+
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.mean = 0.0
+        self.variance = 0.0
+        self.count = 0
+
+    def update(self, value):
+        if self.count == 0:
+            self.mean = value
+        else:
+            diff = value - self.mean
+            increment = self.alpha * diff
+            self.mean += increment
+            self.variance = (1 - self.alpha) * (self.variance + diff * increment)
+        self.count += 1
+
+
+class StreamingMedian:
+    """Médiane et MAD approchées en flux (pas proportionnel à la dispersion), en O(1)
+
+    L'estimation exacte sur l'historique sert de point de départ (fit) ; chaque
+    nouvel échantillon déplace ensuite la médiane et la MAD d'un petit pas vers lui.
+    """
+
+    __slots__ = ('rate', 'min_scale', 'median', 'mad', 'count')
+
+    def __init__(self, rate, min_scale):
+        self.rate = rate
+        self.min_scale = min_scale
+        self.median = 0.0
+        self.mad = 0.0
+        self.count = 0
+
+    def fit(self, values):
+        ordered = sorted(values)
+        if not ordered:
+            return
+        self.median = _middle(ordered)
+        self.mad = _middle(sorted(abs(value - self.median) for value in ordered))
+        self.count = len(ordered)
+
+    def update(self, value):
+        if self.count == 0:
+            self.median = value
+        else:
+            step = self.rate * max(self.mad, self.min_scale)
+            if value > self.median:
+                self.median += min(step, value - self.median)
+            elif value < self.median:
+                self.median -= min(step, self.median - value)
+            deviation = abs(value - self.median)
+            mad_step = self.rate * max(self.mad, self.min_scale)
+            if deviation > self.mad:
+                self.mad += min(mad_step, deviation - self.mad)
+            else:
+                self.mad -= min(mad_step, self.mad - deviation)
+        self.count += 1
+
+    def scale(self):
+        return max(MAD_SCALE * self.mad, self.min_scale)
+
+
+class SeasonalProfile:
+    """Moyenne et variance par heure de la semaine (168 compartiments EWMA)
+
+    Les échantillons d'une heure sont d'abord agrégés (moyenne, dispersion) ;
+    le compartiment n'est mis à jour qu'une fois l'heure écoulée, quelle que soit
+    la cadence des checks. Chaque heure de la semaine ne revenant qu'une fois par
+    semaine, `counts` est le nombre de semaines observées.
+    """
+
+    __slots__ = ('alpha', 'means', 'variances', 'counts', 'hour')
+
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.means = array('d', bytes(8 * HOURS_PER_WEEK))
+        self.variances = array('d', bytes(8 * HOURS_PER_WEEK))
+        self.counts = array('L', bytes(array('L').itemsize * HOURS_PER_WEEK))
+        # Heure en cours d'agrégation : [heure absolue, compartiment, échantillons, somme, somme des carrés]
+        self.hour = [None, 0, 0, 0.0, 0.0]
+
+    @staticmethod
+    def bucket(timestamp):
+        local = time.localtime(timestamp)
+        return local.tm_wday * 24 + local.tm_hour
+
+    def _fold(self):
+        """Mise à jour du compartiment de l'heure écoulée avec sa moyenne et sa dispersion"""
+        _, bucket, samples, total, squares = self.hour
+        if not samples:
+            return
+        mean = total / samples
+        spread = max(0.0, squares / samples - mean * mean)
+        if self.counts[bucket] == 0:
+            self.means[bucket] = mean
+            self.variances[bucket] = spread
+        else:
+            diff = mean - self.means[bucket]
+            increment = self.alpha * diff
+            self.means[bucket] += increment
+            self.variances[bucket] = ((1 - self.alpha) * (self.variances[bucket] + diff * increment)
+                                      + self.alpha * spread)
+        self.counts[bucket] += 1
+
+    def update(self, timestamp, value):
+        hour = int(timestamp // 3600)
+        if hour != self.hour[0]:
+            self._fold()
+            self.hour = [hour, self.bucket(timestamp), 0, 0.0, 0.0]
+        current = self.hour
+        current[2] += 1
+        current[3] += value
+        current[4] += value * value
+
+    def expected(self, timestamp):
+        bucket = self.bucket(timestamp)
+        return self.means[bucket], math.sqrt(self.variances[bucket]), self.counts[bucket]
+
+
+def _middle(ordered):
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+
+class AdaptiveBaseline:
+    """Référence adaptative d'une métrique : EWMA, médiane/MAD et profil hebdomadaire
+
+    Dès que le compartiment de l'heure de la semaine est renseigné, l'écart est
+    mesuré par rapport au niveau habituel de cette heure : les pics quotidiens
+    attendus ne déclenchent pas d'alerte, une hausse en heure creuse si. Avant
+    cela, l'écart est mesuré en MAD par rapport à la médiane récente.
+    """
+
+    def __init__(self, min_scale, alpha=0.05, seasonal_alpha=0.2, threshold=4.0,
+                 min_samples=30, min_seasonal_weeks=2, direction='up'):
+        self.threshold = threshold
+        self.min_samples = min_samples
+        # Le profil hebdomadaire n'est utilisé qu'après plusieurs semaines distinctes pour cette heure
+        self.min_seasonal_weeks = min_seasonal_weeks
+        self.min_scale = min_scale
+        # 'up' : seules les hausses sont anormales (charge, disque, latence)
+        self.direction = direction
+        self.ewma = EWMA(alpha)
+        self.robust = StreamingMedian(alpha, min_scale)
+        self.seasonal = SeasonalProfile(seasonal_alpha)
+
+    def fit(self, timestamps, values):
+        """Initialisation à partir de l'historique stocké"""
+        self.robust.fit(values)
+        for timestamp, value in zip(timestamps, values):
+            self.ewma.update(value)
+            self.seasonal.update(timestamp, value)
+
+    def _signed(self, deviation):
+        return deviation if self.direction == 'up' else abs(deviation)
+
+    def evaluate(self, timestamp, value):
+        """Score de l'échantillon par rapport à la référence, puis mise à jour de celle-ci"""
+        result = {
+            'value': value,
+            'expected': self.robust.median,
+            'ewma': self.ewma.mean,
+            'score': 0.0,
+            'seasonal_score': None,
+            'anomalous': False
+        }
+        if self.robust.count >= self.min_samples:
+            result['score'] = self._signed(value - self.robust.median) / self.robust.scale()
+            seasonal_mean, seasonal_std, seasonal_count = self.seasonal.expected(timestamp)
+            if seasonal_count >= self.min_seasonal_weeks:
+                result['expected'] = seasonal_mean
+                result['seasonal_score'] = (
+                    self._signed(value - seasonal_mean) / max(seasonal_std, self.min_scale)
+                )
+                result['anomalous'] = result['seasonal_score'] >= self.threshold
+            else:
+                result['anomalous'] = result['score'] >= self.threshold
+
+        self.ewma.update(value)
+        self.robust.update(value)
+        self.seasonal.update(timestamp, value)
+        return result
+
+    def to_state(self):
+        return {
+            'ewma': [self.ewma.mean, self.ewma.variance, self.ewma.count],
+            'robust': [self.robust.median, self.robust.mad, self.robust.count],
+            'seasonal': [list(self.seasonal.means), list(self.seasonal.variances), list(self.seasonal.counts),
+                         self.seasonal.hour]
+        }
+
+    def load_state(self, state):
+        self.ewma.mean, self.ewma.variance, self.ewma.count = state['ewma']
+        self.robust.median, self.robust.mad, self.robust.count = state['robust']
+        if len(state['seasonal']) < 4:
+            # Ancien profil mis à jour à chaque échantillon : ses compteurs ne sont pas des semaines
+            return
+        means, variances, counts, hour = state['seasonal']
+        self.seasonal.means = array('d', means)
+        self.seasonal.variances = array('d', variances)
+        self.seasonal.counts = array('L', counts)
+        self.seasonal.hour = list(hour)
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import resource
+import tempfile
+import threading
+import subprocess
+import importlib.util
+from datetime import datetime, timezone
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BUDGETS_FILE = os.path.join(SCRIPTS_DIR, 'benchmark_budgets.json')
+RESULTS_FILE = os.getenv('BENCHMARK_RESULTS_FILE', os.path.join(SCRIPTS_DIR, 'benchmark_results.json'))
+
+# Exécution cron complète avec la configuration par défaut (sondes HTTP, Docker, cgroups, échantillonnage
+# des processus, détection d'anomalies) : démarrage, cycle de vérification sans alerte, fermeture
+ONESHOT_COMMAND = ('run_monitoring.py',)
+# Interpréteur seul (site-packages compris) : part de l'exécution qui ne dépend pas du monitoring
+INTERPRETER_COMMAND = ('-c', 'pass')
+CHECKS = ('check_disk_space', 'check_system_load', 'check_website_status', 'check_docker_containers')
+
+
+def git_revision():
+    """SHA du commit mesuré, suffixé de -dirty si l'arbre de travail est modifié"""
+    try:
+        sha = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=SCRIPTS_DIR, capture_output=True,
+                             text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'diff', '--quiet', 'HEAD', '--', '.'], cwd=SCRIPTS_DIR).returncode != 0
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return f"{sha}-dirty" if dirty else sha
+
+
+def timings(function, iterations, warmup=3):
+    """Médiane, p95 et maximum (µs) de `iterations` appels, après quelques appels d'échauffement"""
+    for _ in range(warmup):
+        function()
+    samples = []
+    clock = time.perf_counter_ns
+    for _ in range(iterations):
+        started = clock()
+        function()
+        samples.append(clock() - started)
+    samples.sort()
+    return {
+        'median_us': samples[len(samples) // 2] / 1000,
+        'p95_us': samples[min(len(samples) - 1, int(len(samples) * 0.95))] / 1000,
+        'max_us': samples[-1] / 1000
+    }
+
+
+def start_docker_standin(directory):
+    """Stand-in de l'API Docker Engine de test-docker-engine.py, sur un socket Unix temporaire
+
+    Conteneurs tous démarrés et sains, décrits par un docker-compose voisin : le
+    cycle mesuré ne déclenche aucune alerte Docker.
+    """
+    spec = importlib.util.spec_from_file_location('docker_engine_standin',
+                                                  os.path.join(SCRIPTS_DIR, 'test-docker-engine.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.FakeEngineHandler.containers = [dict(container, State='running', Status='Up 2 hours (healthy)')
+                                           for container in module.FAKE_CONTAINERS]
+    compose_file = os.path.join(directory, 'docker-compose.yml')
+    with open(compose_file, 'w') as f:
+        f.write('services:\n' + ''.join(
+            f"  {container['Names'][0][1:]}:\n    container_name: {container['Names'][0][1:]}\n"
+            for container in module.FAKE_CONTAINERS))
+    socket_path = os.path.join(directory, 'docker.sock')
+    server = module.FakeEngineServer(socket_path, module.FakeEngineHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, socket_path, compose_file
+
+
+def benchmark_environment(directory, website_url, docker_socket, compose_file, smtp_port):
+    """Configuration isolée : fichiers d'état temporaires, stand-ins locaux, pas de .env.monitoring"""
+    return {
+        'MONITORING_ENV_FILE': os.path.join(directory, 'absent.env'),
+        'MONITORING_STATE_FILE': os.path.join(directory, 'state.json'),
+        'MONITORING_HISTORY_DIR': os.path.join(directory, 'history'),
+        'ALERT_SPOOL_DIR': os.path.join(directory, 'spool'),
+        'MONITORING_WEBSITE_URL': f"{website_url}/api/health",
+        'MONITORING_PROBE_URLS': f"products={website_url}/api/products",
+        'MONITORING_METRICS_PORT': '0',
+        'DOCKER_SOCKET': docker_socket,
+        'DOCKER_COMPOSE_FILE': compose_file,
+        'EMAIL_SMTP_SERVER': '127.0.0.1',
+        'EMAIL_SMTP_PORT': str(smtp_port),
+        'EMAIL_SMTP_STARTTLS': 'false',
+        'EMAIL_SENDER': 'monitoring@chicha-store.test',
+        'EMAIL_PASSWORD': 'benchmark',
+        'ADMIN_EMAILS': 'admin@chicha-store.test',
+        # Exécution mesurée sans alerte : seuils hors d'atteinte de la machine de CI
+        'DISK_SPACE_WARNING_THRESHOLD': '100',
+        'DISK_SPACE_CRITICAL_THRESHOLD': '100',
+        'SYSTEM_LOAD_WARNING_THRESHOLD': '10000',
+        'SYSTEM_LOAD_CRITICAL_THRESHOLD': '10000',
+    }
+
+
+def measure_oneshot(runs, environment, command=ONESHOT_COMMAND):
+    """Exécutions uniques dans un interpréteur neuf, du lancement à la sortie : durée médiane et RSS maximal"""
+    durations, peak_rss = [], 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        process = subprocess.Popen([sys.executable, *command], cwd=SCRIPTS_DIR, env=environment,
+                                   stdout=subprocess.DEVNULL)
+        # wait4 : ressources consommées par ce seul processus fils (RSS maximal)
+        _, status, usage = os.wait4(process.pid, 0)
+        durations.append(time.perf_counter() - started)
+        exit_code = os.waitstatus_to_exitcode(status)
+        if exit_code != 0:
+            raise RuntimeError(f"one-shot run failed with exit code {exit_code}")
+        peak_rss = max(peak_rss, usage.ru_maxrss)
+    durations.sort()
+    return {'median_ms': durations[len(durations) // 2] * 1000, 'peak_rss_kb': peak_rss}
+
+
+def run_suite(iterations, cold_runs, alerts):
+    from smtp_sink import SMTPSink
+    from synthetic_journeys import start_standin
+
+    directory = tempfile.mkdtemp(prefix='chicha_benchmark_')
+    api, website_url = start_standin()
+    docker, docker_socket, compose_file = start_docker_standin(directory)
+    sink = SMTPSink(keep_messages=False).start()
+    environment = benchmark_environment(directory, website_url, docker_socket, compose_file, sink.port)
+    os.environ.update(environment)
+
+    results = {}
+    try:
+        # Exécution d'échauffement : bytecode compilé, état et historique créés, comme sous cron
+        measure_oneshot(1, dict(os.environ))
+        oneshot = measure_oneshot(cold_runs, dict(os.environ))
+        if sink.received:
+            raise RuntimeError(f"one-shot runs sent {sink.received} alert(s); the measured run must be alert-free")
+        results['oneshot_run_ms'] = oneshot['median_ms']
+        results['oneshot_peak_rss_kb'] = oneshot['peak_rss_kb']
+        # Sans budget : distingue un interpréteur lent (fichiers .pth, disque) d'une régression du monitoring
+        results['interpreter_start_ms'] = measure_oneshot(cold_runs, dict(os.environ), INTERPRETER_COMMAND)['median_ms']
+
+        sys.path.insert(0, SCRIPTS_DIR)
+        import advanced_monitoring
+        monitoring = advanced_monitoring.ChichaStoreMonitoring()
+
+        for name in CHECKS:
+            results[f"{name}_us"] = timings(getattr(monitoring, name), iterations)['median_us']
+
+        snapshot = monitoring.collect_snapshot()
+        results['report_render_us'] = timings(lambda: monitoring.generate_system_report(snapshot),
+                                              iterations)['median_us']
+
+        # Mise en file puis envoi par le spool, session SMTP réutilisée comme en production
+        started = time.perf_counter()
+        for index in range(alerts):
+            monitoring.send_email_alert(f"🚨 BENCHMARK {index}", monitoring.generate_system_report(snapshot))
+            monitoring.spool.flush(10)
+        elapsed = time.perf_counter() - started
+        if sink.received != alerts:
+            raise RuntimeError(f"SMTP stand-in received {sink.received}/{alerts} alerts")
+        results['alert_dispatch_ms'] = elapsed / alerts * 1000
+        results['alert_smtp_connections'] = sink.connections
+
+        monitoring.spool.close()
+        monitoring.close_clients()
+        advanced_monitoring._close_smtp_sessions()
+        results['peak_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    finally:
+        sink.close()
+        docker.shutdown()
+        api.shutdown()
+    return results
+
+
+def load_results(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_results(path, history, revision, results):
+    history[revision] = {
+        'recorded_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(history, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def previous_run(history, revision):
+    """Dernière mesure enregistrée pour un autre commit (référence de comparaison)"""
+    others = [entry for sha, entry in history.items() if sha != revision]
+    return max(others, key=lambda entry: entry['recorded_at'], default=None)
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s: %(message)s')
+    parser = argparse.ArgumentParser(description='Benchmarks du pipeline de monitoring Chicha Store')
+    parser.add_argument('--iterations', type=int, default=200, help='Appels mesurés par check')
+    parser.add_argument('--cold-runs', type=int, default=15, help='Exécutions uniques mesurées (interpréteur neuf)')
+    parser.add_argument('--alerts', type=int, default=20, help='Alertes envoyées au puits SMTP')
+    parser.add_argument('--results', default=RESULTS_FILE)
+    parser.add_argument('--budgets', default=BUDGETS_FILE)
+    parser.add_argument('--no-save', action='store_true', help='Ne pas enregistrer les résultats')
+    args = parser.parse_args()
+
+    revision = git_revision()
+    results = run_suite(args.iterations, args.cold_runs, args.alerts)
+    with open(args.budgets) as f:
+        budgets = json.load(f)
+    history = load_results(args.results)
+    previous = previous_run(history, revision)
+
+    print(f"📊 Benchmarks monitoring @ {revision[:12]}")
+    over_budget = []
+    for name, value in results.items():
+        budget = budgets.get(name)
+        line = f"- {name}: {value:.1f}"
+        if previous is not None and previous['results'].get(name):
+            change = (value - previous['results'][name]) / previous['results'][name] * 100
+            line += f" ({change:+.0f}%)"
+        if budget is not None:
+            line += f" / budget {budget}"
+            if value > budget:
+                over_budget.append(name)
+                line += ' ❌'
+        print(line)
+
+    if not args.no_save:
+        save_results(args.results, history, revision, results)
+    if over_budget:
+        print(f"❌ Budget dépassé : {', '.join(over_budget)}")
+        sys.exit(1)
+    print('✅ Tous les budgets sont respectés')
+
+
+if __name__ == '__main__':
+    main()
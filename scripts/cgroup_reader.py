@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+
+import os
+import time
+
+DEFAULT_ROOT = '/sys/fs/cgroup'
+
+# Emplacements possibles du cgroup d'un conteneur selon le driver cgroup de Docker
+_CANDIDATES = (
+    'system.slice/docker-{id}.scope',   # driver systemd
+    'docker/{id}',                      # driver cgroupfs
+    'system.slice/docker/{id}',
+)
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read().decode()
+
+
+def _read_keyed(path):
+    """Fichiers « clé valeur » par ligne (cpu.stat, memory.events)"""
+    values = {}
+    for line in _read(path).splitlines():
+        key, _, value = line.partition(' ')
+        values[key] = int(value)
+    return values
+
+
+def _read_io(path):
+    """Somme des octets lus/écrits de io.stat sur tous les périphériques"""
+    rbytes = wbytes = 0
+    for line in _read(path).splitlines():
+        for field in line.split()[1:]:
+            key, _, value = field.partition('=')
+            if key == 'rbytes':
+                rbytes += int(value)
+            elif key == 'wbytes':
+                wbytes += int(value)
+    return rbytes, wbytes
+
+
+def _read_pressure(path):
+    """Ligne « some » de cpu.pressure : avg10 (%) et total (µs cumulées)"""
+    for line in _read(path).splitlines():
+        if line.startswith('some '):
+            fields = dict(field.split('=') for field in line.split()[1:])
+            return float(fields['avg10']), int(fields['total'])
+    return 0.0, 0
+
+
+class CgroupReader:
+    """Lecture directe des compteurs cgroup v2 des conteneurs, sans passer par docker stats
+
+    Chaque appel à sample() lit quelques petits fichiers de /sys/fs/cgroup et
+    calcule les deltas depuis l'échantillon précédent du même conteneur.
+    """
+
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+        self._paths = {}
+        self._previous = {}
+
+    def available(self):
+        """cgroup v2 (hiérarchie unifiée) monté sur root"""
+        return os.path.exists(os.path.join(self.root, 'cgroup.controllers'))
+
+    def locate(self, container_id):
+        """Répertoire cgroup d'un conteneur (mis en cache)"""
+        path = self._paths.get(container_id)
+        if path is not None and os.path.isdir(path):
+            return path
+        for pattern in _CANDIDATES:
+            candidate = os.path.join(self.root, pattern.format(id=container_id))
+            if os.path.isdir(candidate):
+                self._paths[container_id] = candidate
+                return candidate
+        self._paths.pop(container_id, None)
+        return None
+
+    def _raw(self, path):
+        cpu = _read_keyed(os.path.join(path, 'cpu.stat'))
+        events = _read_keyed(os.path.join(path, 'memory.events'))
+        rbytes, wbytes = _read_io(os.path.join(path, 'io.stat'))
+        try:
+            pressure_avg10, pressure_total = _read_pressure(os.path.join(path, 'cpu.pressure'))
+        except FileNotFoundError:
+            # PSI désactivé dans le noyau (psi=0)
+            pressure_avg10, pressure_total = 0.0, 0
+        return {
+            'time': time.monotonic(),
+            'usage_usec': cpu.get('usage_usec', 0),
+            'throttled_usec': cpu.get('throttled_usec', 0),
+            'memory_current': int(_read(os.path.join(path, 'memory.current'))),
+            'oom_kill': events.get('oom_kill', 0),
+            'rbytes': rbytes,
+            'wbytes': wbytes,
+            'pressure_avg10': pressure_avg10,
+            'pressure_total': pressure_total
+        }
+
+    def sample(self, container_id):
+        """Échantillon d'un conteneur ; les taux sont None au premier passage"""
+        path = self.locate(container_id)
+        if path is None:
+            return None
+        raw = self._raw(path)
+        previous = self._previous.get(container_id)
+        self._previous[container_id] = raw
+
+        result = {
+            'memory_bytes': raw['memory_current'],
+            'oom_kills_total': raw['oom_kill'],
+            'new_oom_kills': 0,
+            'cpu_pressure_avg10': raw['pressure_avg10'],
+            'cpu_percent': None,
+            'cpu_throttled_percent': None,
+            'cpu_pressure_percent': None,
+            'io_read_bytes_per_sec': None,
+            'io_write_bytes_per_sec': None
+        }
+        if previous is None:
+            return result
+
+        elapsed = raw['time'] - previous['time']
+        if elapsed <= 0:
+            return result
+        elapsed_usec = elapsed * 1_000_000
+        result.update({
+            # Un compteur qui recule signale un conteneur recréé avec le même identifiant
+            'new_oom_kills': max(0, raw['oom_kill'] - previous['oom_kill']),
+            'cpu_percent': max(0, raw['usage_usec'] - previous['usage_usec']) / elapsed_usec * 100,
+            'cpu_throttled_percent': max(0, raw['throttled_usec'] - previous['throttled_usec']) / elapsed_usec * 100,
+            'cpu_pressure_percent': max(0, raw['pressure_total'] - previous['pressure_total']) / elapsed_usec * 100,
+            'io_read_bytes_per_sec': max(0, raw['rbytes'] - previous['rbytes']) / elapsed,
+            'io_write_bytes_per_sec': max(0, raw['wbytes'] - previous['wbytes']) / elapsed
+        })
+        return result
+
+    def collect(self, containers):
+        """Échantillons par nom de conteneur à partir d'un mapping {nom: identifiant}"""
+        samples = {}
+        for name, container_id in containers.items():
+            try:
+                sample = self.sample(container_id)
+            except (OSError, ValueError):
+                # Conteneur arrêté entre la découverte et la lecture
+                self._paths.pop(container_id, None)
+                continue
+            if sample is not None:
+                samples[name] = sample
+        live_ids = set(containers.values())
+        for container_id in list(self._previous):
+            if container_id not in live_ids:
+                del self._previous[container_id]
+        return samples
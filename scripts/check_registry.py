@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+
+import time
+import logging
+import threading
+from types import MappingProxyType
+
+# Sévérité numérique d'un check (exportée telle quelle dans chicha_monitor_check_severity)
+NORMAL, WARNING, CRITICAL, UNKNOWN = 0, 1, 2, 3
+SEVERITY_NAMES = ('NORMAL', 'WARNING', 'CRITICAL', 'UNKNOWN')
+SEVERITY_CODES = {name: code for code, name in enumerate(SEVERITY_NAMES)}
+
+_NO_DETAILS = MappingProxyType({})
+
+
+class CheckResult:
+    """Résultat typé d'un check : valeur principale, unité, sévérité et durée d'exécution
+
+    `details` garde le détail propre au check (rapport, métriques) en lecture seule ;
+    get() et [] y accèdent directement. Les attributs ne sont plus modifiables après
+    construction (classe à __slots__ : dataclasses et inspect coûtent ~10 ms au démarrage).
+    """
+
+    __slots__ = ('name', 'value', 'unit', 'severity', 'duration', 'message', 'details')
+
+    def __init__(self, name, value, unit, severity, duration, message='', details=_NO_DETAILS):
+        assign = object.__setattr__
+        assign(self, 'name', name)
+        assign(self, 'value', value)
+        assign(self, 'unit', unit)
+        assign(self, 'severity', severity)
+        assign(self, 'duration', duration)
+        assign(self, 'message', message)
+        assign(self, 'details', details)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"CheckResult is read-only ({name})")
+
+    def __repr__(self):
+        return (f"CheckResult(name={self.name!r}, value={self.value!r}, unit={self.unit!r}, "
+                f"severity={self.status}, duration={self.duration:.6f})")
+
+    @property
+    def status(self):
+        return SEVERITY_NAMES[self.severity]
+
+    def get(self, key, default=None):
+        return self.details.get(key, default)
+
+    def __getitem__(self, key):
+        return self.details[key]
+
+    def to_dict(self):
+        """Forme sérialisable (corps JSON des emails, journaux)"""
+        return {
+            'check': self.name,
+            'value': self.value,
+            'unit': self.unit,
+            'severity': self.status.lower(),
+            'message': self.message,
+            'duration_ms': round(self.duration * 1000, 3)
+        }
+
+
+def summarize_status(details):
+    """Résumé par défaut : clés value, status et message du détail renvoyé par le check"""
+    return (details.get('value'), SEVERITY_CODES.get(details.get('status'), UNKNOWN),
+            details.get('message') or details.get('error', ''))
+
+
+class CheckPlugin:
+    """Check enregistré : fonction, unité, intervalle et délai propres, dernier résultat"""
+
+    __slots__ = ('name', 'function', 'unit', 'interval', 'timeout', 'inline', 'summarize',
+                 'next_due', 'last', 'thread')
+
+    def __init__(self, name, function, unit, interval, timeout, inline, summarize):
+        self.name = name
+        self.function = function
+        self.unit = unit
+        self.interval = interval
+        self.timeout = timeout
+        self.inline = inline
+        self.summarize = summarize
+        self.next_due = 0.0
+        self.last = None
+        self.thread = None
+
+
+class CheckRegistry:
+    """Registre de checks partagé par les moniteurs ; exécution concurrente avec échéance par cycle
+
+    Un check renvoie soit un tuple (valeur, sévérité, message), sans allocation de détail,
+    soit un dict de détail résumé par la fonction `summarize` du plugin.
+    """
+
+    def __init__(self, failed_details=None):
+        self.plugins = {}
+        # (nom, erreur) -> détail de substitution d'un check en erreur ou hors délai
+        self.failed_details = failed_details
+
+    def register(self, name, function, unit='', interval=0.0, timeout=None, inline=False,
+                 summarize=summarize_status):
+        """Ajout d'un check ; interval=0 l'exécute à chaque cycle, inline=True dans le thread appelant"""
+        self.plugins[name] = CheckPlugin(name, function, unit, interval, timeout, inline, summarize)
+        return function
+
+    def configure(self, intervals=None, timeouts=None):
+        """Surcharges d'intervalle et de délai par check (configuration)"""
+        for name, interval in (intervals or {}).items():
+            if name in self.plugins:
+                self.plugins[name].interval = interval
+        for name, timeout in (timeouts or {}).items():
+            if name in self.plugins:
+                self.plugins[name].timeout = timeout
+
+    def _failure(self, plugin, error, duration):
+        details = self.failed_details(plugin.name, error) if self.failed_details else {'error': error}
+        return CheckResult(plugin.name, None, plugin.unit, UNKNOWN, duration, error, MappingProxyType(details))
+
+    def _execute(self, plugin, results):
+        started = time.perf_counter()
+        try:
+            output = plugin.function()
+            if isinstance(output, tuple):
+                value, severity, message = output
+                details = _NO_DETAILS
+            else:
+                value, severity, message = plugin.summarize(output)
+                details = MappingProxyType(output)
+            result = CheckResult(plugin.name, value, plugin.unit, severity,
+                                 time.perf_counter() - started, message, details)
+        except Exception as e:
+            logging.error(f"Check {plugin.name} failed: {e}")
+            result = self._failure(plugin, str(e), time.perf_counter() - started)
+        results[plugin.name] = result
+
+    def run(self, budget, names=None):
+        """Exécution des checks dus ; les autres gardent leur dernier résultat (aucune allocation)"""
+        started = time.monotonic()
+        deadline = started + budget
+        results = {}
+        running = []
+
+        plugins = [self.plugins[name] for name in names] if names else self.plugins.values()
+        for plugin in plugins:
+            if plugin.last is not None and started < plugin.next_due:
+                continue
+            if plugin.thread is not None and plugin.thread.is_alive():
+                # Le check du cycle précédent est toujours bloqué : on ne l'empile pas
+                continue
+            plugin.next_due = started + plugin.interval
+            if plugin.inline:
+                self._execute(plugin, results)
+                continue
+            # Threads daemon : un check bloqué n'empêche jamais l'arrêt du processus
+            plugin.thread = threading.Thread(target=self._execute, args=(plugin, results),
+                                             name=f'check-{plugin.name}', daemon=True)
+            plugin.thread.start()
+            running.append(plugin)
+
+        for plugin in running:
+            limit = deadline if plugin.timeout is None else min(deadline, started + plugin.timeout)
+            plugin.thread.join(max(0.0, limit - time.monotonic()))
+
+        collected = {}
+        for plugin in plugins:
+            result = results.get(plugin.name)
+            if result is None:
+                if plugin in running or plugin.last is None:
+                    logging.warning(f"Check {plugin.name} exceeded its time budget, result discarded")
+                    result = self._failure(plugin, 'Timeout: check abandonné après le budget du cycle',
+                                           time.monotonic() - started)
+                else:
+                    result = plugin.last
+            plugin.last = result
+            collected[plugin.name] = result
+
+        logging.info(f"Checks completed in {time.monotonic() - started:.3f}s")
+        return collected
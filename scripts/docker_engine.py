@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+
+import os
+import re
+import json
+import socket
+import threading
+import http.client
+from urllib.parse import quote
+
+DEFAULT_SOCKET = '/var/run/docker.sock'
+DEFAULT_COMPOSE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                    '..', 'docker-compose.production.yml')
+
+
+class DockerEngineError(Exception):
+    pass
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """Connexion HTTP/1.1 sur socket unix (keep-alive géré par http.client)"""
+
+    def __init__(self, socket_path, timeout):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+def parse_health(status):
+    """Santé du conteneur extraite du champ Status de /containers/json"""
+    if '(healthy)' in status:
+        return 'healthy'
+    if '(unhealthy)' in status:
+        return 'unhealthy'
+    if '(health: starting)' in status:
+        return 'starting'
+    return None
+
+
+def compose_container_names(compose_file=DEFAULT_COMPOSE_FILE):
+    """Noms des conteneurs attendus (container_name) d'un fichier docker-compose"""
+    try:
+        with open(compose_file) as f:
+            return re.findall(r'^\s+container_name:\s*["\']?([\w.-]+)', f.read(), re.MULTILINE)
+    except OSError:
+        return []
+
+
+class DockerEngineClient:
+    """Client minimal de l'API Docker Engine, sans fork de la CLI docker"""
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, timeout=3):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._connection = None
+        self._lock = threading.Lock()
+        # Dernier échantillon CPU par conteneur pour le calcul des deltas
+        self._previous_cpu = {}
+
+    def _request(self, path):
+        """GET JSON sur la connexion persistante ; une reconnexion si elle est tombée"""
+        with self._lock:
+            for attempt in (1, 2):
+                if self._connection is None:
+                    self._connection = _UnixHTTPConnection(self.socket_path, self.timeout)
+                try:
+                    self._connection.request('GET', path, headers={'Host': 'docker'})
+                    response = self._connection.getresponse()
+                    body = response.read()
+                    break
+                except (http.client.HTTPException, ConnectionError, BrokenPipeError) as e:
+                    self._connection.close()
+                    self._connection = None
+                    if attempt == 2:
+                        raise DockerEngineError(f"Docker Engine API unreachable: {e}") from e
+                except OSError as e:
+                    # Socket absent ou permissions insuffisantes : inutile de réessayer
+                    self._connection.close()
+                    self._connection = None
+                    raise DockerEngineError(f"Docker Engine API unreachable: {e}") from e
+        if response.status != 200:
+            raise DockerEngineError(f"GET {path}: HTTP {response.status} {body[:200]!r}")
+        return json.loads(body)
+
+    def list_containers(self):
+        """Tous les conteneurs (arrêtés compris) avec état et santé"""
+        containers = []
+        for item in self._request('/containers/json?all=1'):
+            names = item.get('Names') or ['']
+            containers.append({
+                'id': item['Id'],
+                'name': names[0].lstrip('/'),
+                'image': item.get('Image'),
+                'state': item.get('State'),
+                'health': parse_health(item.get('Status', ''))
+            })
+        return containers
+
+    def container_stats(self, container_id):
+        """CPU et mémoire d'un conteneur ; le CPU est un delta depuis l'appel précédent"""
+        stats = self._request(f'/containers/{quote(container_id)}/stats?stream=false&one-shot=true')
+        cpu_stats = stats.get('cpu_stats', {})
+        total_usage = cpu_stats.get('cpu_usage', {}).get('total_usage', 0)
+        system_usage = cpu_stats.get('system_cpu_usage', 0)
+        online_cpus = cpu_stats.get('online_cpus') or len(cpu_stats.get('cpu_usage', {}).get('percpu_usage') or [1])
+
+        cpu_percent = None
+        previous = self._previous_cpu.get(container_id)
+        if previous is not None:
+            cpu_delta = total_usage - previous[0]
+            system_delta = system_usage - previous[1]
+            if system_delta > 0 and cpu_delta >= 0:
+                cpu_percent = cpu_delta / system_delta * online_cpus * 100
+        self._previous_cpu[container_id] = (total_usage, system_usage)
+
+        memory = stats.get('memory_stats', {})
+        memory_detail = memory.get('stats', {})
+        # Même calcul que `docker stats` : le cache de pages n'est pas compté
+        cache = memory_detail.get('inactive_file', memory_detail.get('cache', 0))
+        return {
+            'cpu_percent': cpu_percent,
+            'memory_bytes': max(0, memory.get('usage', 0) - cache),
+            'memory_limit': memory.get('limit')
+        }
+
+    def collect(self, expected_names=()):
+        """Inventaire complet : conteneurs, services attendus absents, statistiques"""
+        containers = self.list_containers()
+        running = [c for c in containers if c['state'] == 'running']
+        running_names = {c['name'] for c in running}
+
+        stats = {}
+        for container in running:
+            try:
+                stats[container['name']] = self.container_stats(container['id'])
+            except DockerEngineError:
+                continue
+
+        # Les conteneurs disparus ne doivent pas garder un échantillon CPU obsolète
+        live_ids = {c['id'] for c in running}
+        for container_id in list(self._previous_cpu):
+            if container_id not in live_ids:
+                del self._previous_cpu[container_id]
+
+        return {
+            'total_containers': len(containers),
+            'running_containers': len(running),
+            'containers': containers,
+            'missing_services': [name for name in expected_names if name not in running_names],
+            'unhealthy': [c['name'] for c in containers if c['health'] == 'unhealthy'],
+            'stats': stats
+        }
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
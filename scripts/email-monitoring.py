@@ -1,14 +1,15 @@
 #!/usr/bin/env python3
 
 import os
-import smtplib
-import ssl
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import sys
 import logging
-import subprocess
-import json
 from datetime import datetime
+# email.mime et smtplib ne sont importés que si un email part réellement
+from startup import deferred_import
+from system_stats import disk_usage, load_average, usable_cpus
+from check_registry import CheckRegistry, NORMAL, WARNING, CRITICAL
+from alert_router import locked_router, parse_windows, worst_severity
+from send_limits import SendLimiter, parse_rates
 
 # Configuration du logging
 logging.basicConfig(
@@ -22,17 +23,56 @@ class EmailMonitoring:
         # Configuration de l'email
         self.smtp_server = os.getenv('EMAIL_SMTP_SERVER', 'smtp.gmail.com')
         self.smtp_port = int(os.getenv('EMAIL_SMTP_PORT', 587))
+        self.smtp_starttls = os.getenv('EMAIL_SMTP_STARTTLS', 'true').lower() == 'true'
+        self.smtp_cafile = os.getenv('EMAIL_SMTP_CAFILE')
         self.sender_email = os.getenv('EMAIL_SENDER', 'monitoring@chicha-store.com')
         self.sender_password = os.getenv('EMAIL_PASSWORD', '')
         self.recipient_emails = os.getenv('ADMIN_EMAILS', '').split(',')
-        
-        # Configuration SSL/TLS
-        self.context = ssl.create_default_context()
+        self.website_url = os.getenv('PUBLIC_WEBSITE_URL', 'https://chicha-store.com')
+
+        # Routage par sévérité : criticals à chaque exécution, avertissements regroupés (fenêtres persistées)
+        self.alert_routes = parse_windows(os.getenv('ALERT_ROUTES'))
+        self.state_file = os.getenv('EMAIL_MONITORING_STATE_FILE', '/tmp/chicha_store_email_monitoring_state.json')
+        # Débits et quota Gmail, partagés avec advanced_monitoring.py (même fichier d'état)
+        self.limiter = SendLimiter(
+            os.getenv('SEND_LIMITS_STATE_FILE', '/tmp/chicha_store_send_limits.json'),
+            parse_rates(os.getenv('SEND_RATE_LIMITS')),
+            float(os.getenv('SEND_RECIPIENT_RATE_PER_HOUR', 30)),
+            int(os.getenv('EMAIL_DAILY_QUOTA', 400))
+        )
+
+        self._transport = None
+        self._probes = None
+
+        # Checks : tuple (valeur, sévérité, message), y compris quand tout va bien
+        self.checks = CheckRegistry()
+        self.checks.register('Disk Space', self._check_disk_space, '%', inline=True)
+        self.checks.register('System Load', self._check_system_load, '%', inline=True)
+        self.checks.register('Website Status', self._check_website_status, 'HTTP', timeout=15)
+
+    @property
+    def transport(self):
+        """Session SMTP partagée (STARTTLS + login une seule fois par processus), ouverte au premier envoi"""
+        if self._transport is None:
+            self._transport = deferred_import('smtp_transport').get_transport(
+                self.smtp_server, self.smtp_port, self.sender_email, self.sender_password,
+                use_starttls=self.smtp_starttls, cafile=self.smtp_cafile
+            )
+        return self._transport
+
+    @property
+    def probes(self):
+        """Client HTTP keep-alive en processus (remplace curl), créé à la première vérification du site"""
+        if self._probes is None:
+            self._probes = deferred_import('http_probes').ProbeEngine(timeout=10, max_workers=1)
+        return self._probes
 
     def send_monitoring_email(self, subject, body, severity='info'):
         """Envoi d'un email de monitoring"""
         try:
             # Création du message
+            MIMEMultipart = deferred_import('email.mime.multipart').MIMEMultipart
+            MIMEText = deferred_import('email.mime.text').MIMEText
             message = MIMEMultipart()
             message['From'] = self.sender_email
             message['To'] = ', '.join(self.recipient_emails)
@@ -54,119 +94,75 @@ class EmailMonitoring:
             
             message.attach(MIMEText(html_body, 'html'))
 
-            # Connexion et envoi
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls(context=self.context)
-                server.login(self.sender_email, self.sender_password)
-                server.sendmail(
-                    self.sender_email, 
-                    self.recipient_emails, 
-                    message.as_string()
-                )
-            
+            # Envoi sur la session persistante
+            self.transport.send(message, self.sender_email, self.recipient_emails)
+
             logging.info(f"Email envoyé : {subject}")
+            return True
 
         except Exception as e:
             logging.error(f"Erreur d'envoi d'email : {e}")
+            return False
 
     def check_system_health(self):
         """Vérifications système"""
-        checks = [
-            self._check_disk_space(),
-            self._check_system_load(),
-            self._check_website_status()
-        ]
-        
-        critical_checks = [check for check in checks if check['severity'] == 'critical']
-        warning_checks = [check for check in checks if check['severity'] == 'warning']
-        
-        if critical_checks:
-            self.send_monitoring_email(
-                "Alertes Critiques Système", 
-                json.dumps(critical_checks, indent=2),
-                'critical'
-            )
-        
-        if warning_checks:
-            self.send_monitoring_email(
-                "Alertes Système", 
-                json.dumps(warning_checks, indent=2),
-                'warning'
-            )
+        results = self.checks.run(budget=20).values()
+        now = datetime.now()
+
+        # Un check en erreur (UNKNOWN) est journalisé par le registre, sans email
+        with locked_router(self.state_file, self.alert_routes) as router:
+            for result in results:
+                if result.severity in (WARNING, CRITICAL):
+                    router.add(result.name, f"{result.name} : {result.message}", now, result.status, result.value)
+
+            # Une fenêtre échue = un email ; elle reste en attente (digest suivant) si la limite est atteinte
+            for digest in router.due(now):
+                entries = digest.entries()
+                subject, header = digest.render(entries)
+                if not self.limiter.acquire('email', self.recipient_emails):
+                    continue
+                if self.send_monitoring_email(subject, header, worst_severity(entries)):
+                    digest.clear()
+                else:
+                    # Échec d'envoi : jeton et quota rendus, la fenêtre reste en attente
+                    self.limiter.refund('email', self.recipient_emails)
 
     def _check_disk_space(self):
         """Vérification de l'espace disque"""
-        try:
-            result = subprocess.run(['df', '-h', '/'], capture_output=True, text=True)
-            usage = int(result.stdout.split('\n')[1].split()[4].rstrip('%'))
-            
-            if usage > 90:
-                return {
-                    'check': 'Disk Space',
-                    'value': f'{usage}%',
-                    'severity': 'critical',
-                    'message': 'Espace disque critique'
-                }
-            elif usage > 80:
-                return {
-                    'check': 'Disk Space',
-                    'value': f'{usage}%',
-                    'severity': 'warning',
-                    'message': 'Espace disque presque saturé'
-                }
-            return None
-        except Exception as e:
-            logging.error(f"Erreur vérification espace disque : {e}")
-            return None
+        usage = disk_usage('/').percent
+
+        if usage > 90:
+            return usage, CRITICAL, 'Espace disque critique'
+        elif usage > 80:
+            return usage, WARNING, 'Espace disque presque saturé'
+        return usage, NORMAL, ''
 
     def _check_system_load(self):
         """Vérification de la charge système"""
-        try:
-            result = subprocess.run(['uptime'], capture_output=True, text=True)
-            load = float(result.stdout.split('load average:')[1].split(',')[0].strip())
-            cores = int(subprocess.run(['nproc'], capture_output=True, text=True).stdout.strip())
-            load_percentage = (load / cores) * 100
-            
-            if load_percentage > 90:
-                return {
-                    'check': 'System Load',
-                    'value': f'{load_percentage:.2f}%',
-                    'severity': 'critical',
-                    'message': 'Charge système critique'
-                }
-            elif load_percentage > 70:
-                return {
-                    'check': 'System Load',
-                    'value': f'{load_percentage:.2f}%',
-                    'severity': 'warning',
-                    'message': 'Charge système élevée'
-                }
-            return None
-        except Exception as e:
-            logging.error(f"Erreur vérification charge système : {e}")
-            return None
+        load_percentage = round(load_average() / usable_cpus() * 100, 2)
+
+        if load_percentage > 90:
+            return load_percentage, CRITICAL, 'Charge système critique'
+        elif load_percentage > 70:
+            return load_percentage, WARNING, 'Charge système élevée'
+        return load_percentage, NORMAL, ''
 
     def _check_website_status(self):
         """Vérification du statut du site web"""
-        try:
-            result = subprocess.run(['curl', '-s', '-o', '/dev/null', '-w', '%{http_code}', 'https://chicha-store.com'], capture_output=True, text=True)
-            status_code = int(result.stdout)
-            
-            if status_code != 200:
-                return {
-                    'check': 'Website Status',
-                    'value': str(status_code),
-                    'severity': 'critical',
-                    'message': 'Site web indisponible'
-                }
-            return None
-        except Exception as e:
-            logging.error(f"Erreur vérification site web : {e}")
-            return None
+        probe = self.probes.probe('website', self.website_url)
+        status_code = probe['status_code']
+
+        if status_code != 200:
+            return status_code, CRITICAL, f"Site web indisponible{' : ' + probe['error'] if probe.get('error') else ''}"
+        return status_code, NORMAL, ''
 
 def main():
     monitoring = EmailMonitoring()
     monitoring.check_system_health()
+    if monitoring._probes is not None:
+        monitoring._probes.close()
+    if 'smtp_transport' in sys.modules:
+        sys.modules['smtp_transport'].close_all()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+
+import os
+import ssl
+import socket
+import struct
+import logging
+import argparse
+import threading
+from collections import deque
+
+import fleet_protocol as protocol
+
+
+class FleetAgent:
+    """Envoi par lots des échantillons locaux vers le collecteur central
+
+    Les échantillons attendent dans un tampon borné : si le collecteur est lent
+    ou injoignable, les plus anciens sont abandonnés (et comptés) plutôt que de
+    faire grossir la mémoire de l'agent. Un seul lot est en vol à la fois : le
+    suivant ne part qu'après l'acquittement du précédent.
+
+    Le jeton partagé est présenté dans le HELLO ; avec `ssl_context`, la
+    connexion est chiffrée et le certificat du collecteur vérifié.
+    """
+
+    def __init__(self, address, instance, interval, token=None, ssl_context=None,
+                 max_buffer=20000, max_batch=1000, timeout=10):
+        self.address = address
+        self.instance = instance
+        self.interval = interval
+        self.token = token
+        self.ssl_context = ssl_context
+        self.max_batch = min(max_batch, protocol.MAX_BATCH)
+        self.timeout = timeout
+        self.buffer = deque(maxlen=max_buffer)
+        self.names = {}
+        self._unsent_names = []
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._stopping = False
+        # Attente de reconnexion : interrompue par close() seulement, pas par les ajouts de add()
+        self._closed = threading.Event()
+        self._sock = None
+        self._sequence = 0
+        self._thread = None
+
+        # Compteurs exposés dans les journaux
+        self.sent = 0
+        self.dropped = 0
+
+    def add(self, timestamp, metrics):
+        """Ajout des valeurs d'un cycle ; ne bloque jamais, même collecteur indisponible"""
+        with self._lock:
+            for name, value in metrics:
+                if value is None:
+                    continue
+                metric_id = self.names.get(name)
+                if metric_id is None:
+                    metric_id = self.names[name] = len(self.names)
+                    self._unsent_names.append([metric_id, name])
+                if len(self.buffer) == self.buffer.maxlen:
+                    self.dropped += 1
+                self.buffer.append((metric_id, timestamp, float(value)))
+            self._ready.notify()
+
+    def _connect(self):
+        sock = socket.create_connection(self.address, timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if self.ssl_context is not None:
+            try:
+                sock = self.ssl_context.wrap_socket(sock, server_hostname=self.address[0])
+            except OSError:
+                sock.close()
+                raise
+        sock.sendall(protocol.encode_json(protocol.HELLO, {
+            'instance': self.instance, 'interval': self.interval, 'version': 1, 'token': self.token
+        }))
+        with self._lock:
+            # Nouvelle connexion : le collecteur reçoit le dictionnaire complet des métriques
+            self._unsent_names = [[metric_id, name] for name, metric_id in self.names.items()]
+        self._sock = sock
+
+    def _receive_ack(self):
+        header = self._recv_exactly(protocol.FRAME.size)
+        kind, length = protocol.decode_header(header)
+        kind, payload = protocol.decode_payload(kind, self._recv_exactly(length))
+        if kind != protocol.ACK:
+            raise protocol.ProtocolError(f"unexpected frame type {kind}")
+        return protocol.ACK_PAYLOAD.unpack(payload)[0]
+
+    def _recv_exactly(self, size):
+        chunks = []
+        while size:
+            chunk = self._sock.recv(size)
+            if not chunk:
+                raise ConnectionError('collector closed the connection')
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+
+    def _take_batch(self):
+        with self._lock:
+            while not self.buffer and not self._stopping:
+                self._ready.wait()
+            names, self._unsent_names = self._unsent_names, []
+            batch = [self.buffer.popleft() for _ in range(min(self.max_batch, len(self.buffer)))]
+            return names, batch
+
+    def _requeue(self, names, batch):
+        """Remise en tête de tampon d'un lot non acquitté (les plus anciens cèdent si plein)"""
+        with self._lock:
+            self._unsent_names = names + self._unsent_names
+            room = self.buffer.maxlen - len(self.buffer)
+            if room < len(batch):
+                self.dropped += len(batch) - room
+                batch = batch[len(batch) - room:]
+            self.buffer.extendleft(reversed(batch))
+
+    def _send_loop(self):
+        backoff = 1
+        while not self._stopping:
+            if self._sock is None:
+                try:
+                    self._connect()
+                    logging.info(f"Connected to fleet collector {self.address[0]}:{self.address[1]}")
+                except OSError as e:
+                    logging.warning(f"Fleet collector unreachable ({e}), retry in {backoff}s")
+                    self._closed.wait(backoff)
+                    backoff = min(backoff * 2, 60)
+                    continue
+
+            names, batch = self._take_batch()
+            if not batch and not names:
+                continue
+            try:
+                names_frame = protocol.encode_json(protocol.NAMES, names) if names else None
+                sequence = (self._sequence + 1) & 0xFFFFFFFF
+                batch_frame = protocol.encode_batch(sequence, batch) if batch else None
+            except (struct.error, ValueError, TypeError, OverflowError) as e:
+                # Lot non encodable (écart hors plage, valeur invalide) : abandonné et compté,
+                # le thread d'envoi continue avec les lots suivants
+                logging.error(f"Fleet batch of {len(batch)} sample(s) dropped, cannot be encoded: {e}")
+                with self._lock:
+                    self._unsent_names = names + self._unsent_names
+                    self.dropped += len(batch)
+                continue
+            try:
+                if names_frame:
+                    self._sock.sendall(names_frame)
+                if batch_frame:
+                    self._sequence = sequence
+                    self._sock.sendall(batch_frame)
+                    if self._receive_ack() != sequence:
+                        raise protocol.ProtocolError('acknowledgement out of sequence')
+                    self.sent += len(batch)
+                    backoff = 1
+            except (OSError, protocol.ProtocolError) as e:
+                # Connexion refusée par le collecteur (jeton, plafonds) : même attente croissante
+                logging.warning(f"Fleet batch failed ({e}), reconnecting in {backoff}s")
+                self._requeue(names, batch)
+                self._sock.close()
+                self._sock = None
+                self._closed.wait(backoff)
+                backoff = min(backoff * 2, 60)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._send_loop, name='fleet-agent', daemon=True)
+        self._thread.start()
+
+    def close(self, timeout=5):
+        with self._lock:
+            self._stopping = True
+            self._ready.notify_all()
+        self._closed.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+def parse_address(value, default_port=9106):
+    host, _, port = value.rpartition(':')
+    return (host, int(port)) if host else (value, default_port)
+
+
+def client_ssl_context(cafile):
+    """Contexte TLS de l'agent : certificat du collecteur vérifié contre `cafile` (ou les AC du système)"""
+    return ssl.create_default_context(cafile=cafile or None)
+
+
+def main():
+    from advanced_monitoring import ChichaStoreMonitoring
+
+    parser = argparse.ArgumentParser(description='Agent de monitoring Chicha Store (mode flotte)')
+    parser.add_argument('--collector', default=os.getenv('FLEET_COLLECTOR_ADDR', 'localhost:9106'))
+    parser.add_argument('--instance', default=os.getenv('FLEET_INSTANCE', socket.gethostname()))
+    parser.add_argument('--interval', type=float, default=None)
+    args = parser.parse_args()
+
+    monitoring = ChichaStoreMonitoring()
+    interval = args.interval or monitoring.check_interval
+    tls = os.getenv('FLEET_TLS', 'false').lower() == 'true'
+    agent = FleetAgent(parse_address(args.collector), args.instance, interval,
+                       token=os.getenv('FLEET_TOKEN'),
+                       ssl_context=client_ssl_context(os.getenv('FLEET_TLS_CAFILE')) if tls else None)
+    monitoring.install_signal_handlers()
+    agent.start()
+    logging.info(f"Fleet agent {args.instance} started (interval: {interval}s)")
+
+    # Les checks tournent localement ; alertes et rapports sont produits par le collecteur
+    while True:
+        snapshot = monitoring.collect_snapshot()
+        agent.add(snapshot.timestamp.timestamp(), monitoring.snapshot_metrics(snapshot))
+        monitoring._wake_event.wait(interval)
+        monitoring._wake_event.clear()
+        # Arrêt prioritaire : un SIGTERM reçu juste après un SIGHUP n'est pas perdu
+        if monitoring._stop_event.is_set():
+            break
+        if monitoring._reload_requested:
+            monitoring._reload_requested = False
+            monitoring.reload_config()
+
+    agent.close()
+    monitoring.close_clients()
+    logging.info(f"Fleet agent stopped ({agent.sent} samples sent, {agent.dropped} dropped)")
+
+
+if __name__ == '__main__':
+    main()
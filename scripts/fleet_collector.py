@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import hmac
+import json
+import signal
+import time
+import asyncio
+import logging
+import argparse
+import ipaddress
+from datetime import datetime
+
+import fleet_protocol as protocol
+from alert_digest import AlertDigest
+from alert_message import build_alert_message
+from alert_rules import AlertEngine, AlertRule, LEVEL_NAMES, RESOLVED, notification_subject
+from alert_spool import AlertSpool
+from send_limits import SendLimiter, parse_rates
+from startup import deferred_import
+from timeseries import TimeSeriesStore
+
+# Longueur maximale d'un nom d'instance ou de métrique annoncé par un agent
+MAX_NAME_LENGTH = 200
+
+
+class AgentState:
+    """Dernières valeurs et historique court d'une instance (production, staging, Render, Koyeb)"""
+
+    __slots__ = ('instance', 'interval', 'names', 'latest', 'history', 'last_seen', 'connected',
+                 'samples_total', 'unknown_total')
+
+    def __init__(self, instance, interval, history_capacity):
+        self.instance = instance
+        self.interval = interval
+        # Identifiant -> nom, propre à la connexion en cours (renvoyé par l'agent à chaque reconnexion)
+        self.names = {}
+        # Nom -> (timestamp, valeur) du dernier échantillon
+        self.latest = {}
+        self.history = TimeSeriesStore(history_capacity)
+        self.last_seen = time.monotonic()
+        self.connected = False
+        self.samples_total = 0
+        self.unknown_total = 0
+
+    def declare(self, names, max_metrics):
+        """Nouvelles métriques annoncées (trame NAMES), dans la limite de `max_metrics` noms et identifiants"""
+        known = set(self.latest).union(self.names.values())
+        for metric_id, name in names:
+            if not isinstance(metric_id, int) or not isinstance(name, str) or len(name) > MAX_NAME_LENGTH:
+                raise protocol.ProtocolError('invalid metric declaration')
+            known.add(name)
+            if metric_id not in self.names and len(self.names) >= max_metrics or len(known) > max_metrics:
+                raise protocol.ProtocolError(f"too many metrics (limit {max_metrics})")
+            self.names[metric_id] = name
+
+    def store(self, samples):
+        names, latest, history = self.names, self.latest, self.history
+        for metric_id, timestamp, value in samples:
+            name = names.get(metric_id)
+            if name is None:
+                self.unknown_total += 1
+                continue
+            history.record(name, timestamp, value)
+            latest[name] = (timestamp, value)
+            self.samples_total += 1
+        self.last_seen = time.monotonic()
+
+    def value(self, name):
+        sample = self.latest.get(name)
+        return None if sample is None else sample[1]
+
+
+class FleetCollector:
+    """Collecteur central : réception asyncio des agents, évaluation unique des alertes de la flotte
+
+    Chaque lot est acquitté après avoir été stocké, et l'acquittement n'est
+    écrit qu'une fois le tampon d'envoi vidé (drain) : un collecteur chargé
+    ralentit ses agents au lieu d'accumuler leurs lots en mémoire.
+
+    La mémoire est bornée : un agent doit présenter le jeton partagé dans son
+    HELLO, le nombre d'instances et de métriques par instance est plafonné, et
+    une instance silencieuse depuis `evict_seconds` est oubliée.
+    """
+
+    def __init__(self, history_capacity=2880, stale_factor=3, disk_warning=80, disk_critical=90,
+                 load_warning=70, load_critical=90, restart_threshold=3, token=None,
+                 max_agents=64, max_metrics=512, evict_seconds=86400):
+        self.history_capacity = history_capacity
+        self.token = token
+        self.max_agents = max_agents
+        self.max_metrics = max_metrics
+        self.evict_seconds = evict_seconds
+        self.stale_factor = stale_factor
+        self.disk_warning = disk_warning
+        self.disk_critical = disk_critical
+        self.load_warning = load_warning
+        self.load_critical = load_critical
+        self.restart_threshold = restart_threshold
+        self.agents = {}
+        self.connections = 0
+        self.batches_total = 0
+        self.protocol_errors = 0
+        self.rejected_total = 0
+
+    def _authenticate(self, hello):
+        """Instance annoncée par un HELLO valide, porteur du jeton partagé"""
+        if self.token is not None:
+            token = hello.get('token')
+            if not isinstance(token, str) or not hmac.compare_digest(token.encode(), self.token.encode()):
+                raise PermissionError('invalid fleet token')
+        instance = hello['instance']
+        if not isinstance(instance, str) or not instance or len(instance) > MAX_NAME_LENGTH:
+            raise protocol.ProtocolError('invalid instance name')
+        return instance
+
+    async def handle_connection(self, reader, writer):
+        agent = None
+        self.connections += 1
+        peer = writer.get_extra_info('peername')
+        try:
+            while True:
+                # Avant authentification, seules de petites trames sont lues
+                limit = protocol.MAX_HELLO if agent is None else protocol.MAX_PAYLOAD
+                kind, length = protocol.decode_header(await reader.readexactly(protocol.FRAME.size), limit)
+                kind, payload = protocol.decode_payload(kind, await reader.readexactly(length), limit)
+                if kind == protocol.HELLO and agent is None:
+                    hello = json.loads(payload)
+                    instance = self._authenticate(hello)
+                    interval = float(hello['interval'])
+                    agent = self.agents.get(instance)
+                    if agent is None:
+                        if len(self.agents) >= self.max_agents:
+                            raise protocol.ProtocolError(f"too many agents (limit {self.max_agents})")
+                        agent = self.agents[instance] = AgentState(instance, interval, self.history_capacity)
+                        logging.info(f"New fleet agent {instance} from {peer}")
+                    agent.interval = interval
+                    agent.names = {}
+                    agent.connected = True
+                    agent.last_seen = time.monotonic()
+                elif agent is None:
+                    raise protocol.ProtocolError('frame received before HELLO')
+                elif kind == protocol.NAMES:
+                    agent.declare(json.loads(payload), self.max_metrics)
+                elif kind == protocol.BATCH:
+                    sequence, samples = protocol.iter_batch(payload)
+                    agent.store(samples)
+                    self.batches_total += 1
+                    writer.write(protocol.encode_ack(sequence))
+                    await writer.drain()
+                else:
+                    raise protocol.ProtocolError(f"unexpected frame type {kind}")
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except PermissionError as e:
+            self.rejected_total += 1
+            logging.warning(f"Rejecting fleet connection from {peer}: {e}")
+        except (protocol.ProtocolError, ValueError, KeyError, TypeError, AttributeError) as e:
+            self.protocol_errors += 1
+            logging.warning(f"Dropping fleet connection from {peer}: {e}")
+        finally:
+            self.connections -= 1
+            if agent is not None:
+                agent.connected = False
+            writer.close()
+
+    def evict(self, now=None):
+        """Oubli des instances déconnectées et silencieuses depuis plus de `evict_seconds`"""
+        now = time.monotonic() if now is None else now
+        for instance, agent in list(self.agents.items()):
+            if not agent.connected and now - agent.last_seen > self.evict_seconds:
+                del self.agents[instance]
+                logging.info(f"Fleet agent {instance} evicted after {now - agent.last_seen:.0f}s of silence")
+
+    def evaluate(self, now=None):
+        """Conditions d'alerte de toute la flotte : liste de (clé, sujet, sévérité)"""
+        now = time.monotonic() if now is None else now
+        conditions = []
+        for instance, agent in sorted(self.agents.items()):
+            silent_for = now - agent.last_seen
+            if silent_for > self.stale_factor * agent.interval:
+                conditions.append((f"{instance}:silent",
+                                   f"🚨 AGENT SILENCIEUX - {instance} (depuis {silent_for:.0f}s)", 'CRITICAL'))
+                continue
+
+            disk = agent.value('disk_percent')
+            if disk is not None and disk >= self.disk_warning:
+                severity = 'CRITICAL' if disk >= self.disk_critical else 'WARNING'
+                conditions.append((f"{instance}:disk",
+                                   f"🚨 ALERTE ESPACE DISQUE - {instance} {disk:.1f}% ({severity})", severity))
+            load = agent.value('load_percent')
+            if load is not None and load >= self.load_warning:
+                severity = 'CRITICAL' if load >= self.load_critical else 'WARNING'
+                conditions.append((f"{instance}:load",
+                                   f"🚨 ALERTE CHARGE SYSTÈME - {instance} {load:.1f}% ({severity})", severity))
+            if agent.value('website_up') == 0:
+                conditions.append((f"{instance}:website", f"🚨 SERVEUR INACCESSIBLE - {instance}", 'CRITICAL'))
+            failing = agent.value('endpoints_failing')
+            if failing:
+                conditions.append((f"{instance}:endpoints",
+                                   f"🚨 ENDPOINTS EN ÉCHEC - {instance} ({failing:.0f})", 'CRITICAL'))
+            missing = agent.value('containers_missing')
+            if missing:
+                conditions.append((f"{instance}:docker",
+                                   f"🚨 CONTENEURS ARRÊTÉS - {instance} ({missing:.0f})", 'CRITICAL'))
+            elif agent.value('containers_unhealthy'):
+                conditions.append((f"{instance}:docker",
+                                   f"🚨 CONTENEURS EN MAUVAISE SANTÉ - {instance}", 'WARNING'))
+            # Copie : l'évaluation tourne dans un thread pendant que la boucle asyncio stocke les lots
+            restart_loops = [f"{name[8:-9]} ({value:.0f})" for name, (_, value) in list(agent.latest.items())
+                             if name.startswith('process_') and name.endswith('_restarts')
+                             and value >= self.restart_threshold]
+            if restart_loops:
+                conditions.append((f"{instance}:restarts",
+                                   f"🚨 REDÉMARRAGES EN BOUCLE - {instance}: {', '.join(restart_loops)}",
+                                   'CRITICAL'))
+        return conditions
+
+    def report(self, now=None):
+        """État de chaque instance de la flotte"""
+        now = time.monotonic() if now is None else now
+        lines = [f"🛰️ Flotte Chicha Store - {len(self.agents)} instance(s)"]
+        for instance, agent in sorted(self.agents.items()):
+            disk, load = agent.value('disk_percent'), agent.value('load_percent')
+            website = agent.value('website_up')
+            lines.append(
+                f"- {instance}: disque {'N/A' if disk is None else f'{disk:.1f}%'}, "
+                f"charge {'N/A' if load is None else f'{load:.1f}%'}, "
+                f"site {'N/A' if website is None else 'en ligne' if website else 'hors ligne'}, "
+                f"dernier lot il y a {now - agent.last_seen:.0f}s"
+                f"{'' if agent.connected else ' (déconnecté)'}"
+            )
+        return '\n'.join(lines)
+
+    def publish_metrics(self, metrics):
+        now = time.monotonic()
+        agents = self.agents
+        metrics.gauge('chicha_fleet_agent_connected', 'Agent connected to the collector', ('instance',)).replace(
+            {(name,): int(agent.connected) for name, agent in agents.items()})
+        metrics.gauge('chicha_fleet_agent_last_seen_seconds', 'Seconds since the last batch', ('instance',)).replace(
+            {(name,): now - agent.last_seen for name, agent in agents.items()})
+        metrics.counter('chicha_fleet_samples_total', 'Samples received', ('instance',)).replace(
+            {(name,): agent.samples_total for name, agent in agents.items()})
+        metrics.gauge('chicha_fleet_value', 'Latest value reported by each agent', ('instance', 'metric')).replace(
+            {(name, metric): value for name, agent in agents.items()
+             for metric, (_, value) in agent.latest.items()})
+        metrics.gauge('chicha_fleet_connections', 'Open agent connections').set(self.connections)
+        metrics.counter('chicha_fleet_batches_total', 'Batches received').set(self.batches_total)
+        metrics.counter('chicha_fleet_protocol_errors_total', 'Connections dropped on protocol errors').set(
+            self.protocol_errors)
+        metrics.counter('chicha_fleet_rejected_total', 'Connections rejected for an invalid token').set(
+            self.rejected_total)
+        metrics.publish()
+
+
+class FleetAlerter:
+    """Alertes à état, digest et spool de la flotte (SMTP et limites d'envoi du monitoring local)"""
+
+    def __init__(self, collector, window, spool_dir, state_file, rule):
+        self.collector = collector
+        self.digest = AlertDigest(window)
+        # Une seule règle à trois niveaux pour toutes les conditions, par clé instance:condition
+        self.rule = rule
+        self.alerts = AlertEngine()
+        self.state_file = state_file
+        self._saved_state = None
+        self.smtp_server = os.getenv('EMAIL_SMTP_SERVER')
+        self.smtp_port = int(os.getenv('EMAIL_SMTP_PORT', 587))
+        self.smtp_starttls = os.getenv('EMAIL_SMTP_STARTTLS', 'true').lower() == 'true'
+        self.smtp_cafile = os.getenv('EMAIL_SMTP_CAFILE')
+        self.sender_email = os.getenv('EMAIL_SENDER')
+        self.sender_password = os.getenv('EMAIL_PASSWORD')
+        self.admin_emails = os.getenv('ADMIN_EMAILS', '').split(',')
+        # Débits et quota d'envoi partagés avec le monitoring local quand ils tournent sur le même hôte
+        self.limiter = SendLimiter(os.getenv('SEND_LIMITS_STATE_FILE', '/tmp/chicha_store_send_limits.json'),
+                                   parse_rates(os.getenv('SEND_RATE_LIMITS')),
+                                   float(os.getenv('SEND_RECIPIENT_RATE_PER_HOUR', 30)),
+                                   int(os.getenv('EMAIL_DAILY_QUOTA', 400)))
+        self.spool = AlertSpool(spool_dir, self._deliver)
+        self.load_state()
+
+    def _deliver(self, record):
+        transport = deferred_import('smtp_transport').get_transport(
+            self.smtp_server, self.smtp_port, self.sender_email, self.sender_password,
+            use_starttls=self.smtp_starttls, cafile=self.smtp_cafile
+        )
+        transport.send(record['message'], record['sender'], record['recipients'])
+        logging.info(f"Fleet alert sent: {record['subject']}")
+
+    def load_state(self):
+        try:
+            with open(self.state_file) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable fleet state {self.state_file}: {e}")
+            return
+        self.alerts.load_state(state.get('alerts'), self.rule.flap_threshold)
+        self.digest.load_state(state.get('pending_alerts'))
+        self._saved_state = state
+
+    def save_state(self):
+        state = {'alerts': self.alerts.to_state(), 'pending_alerts': self.digest.to_state()}
+        if state == self._saved_state:
+            return
+        tmp_path = f"{self.state_file}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_file)
+            self._saved_state = state
+        except OSError as e:
+            logging.error(f"Failed to save fleet state: {e}")
+
+    def evaluate(self):
+        now = datetime.now()
+        timestamp = now.timestamp()
+        active = {key: (subject, severity) for key, subject, severity in self.collector.evaluate()}
+        # Conditions actives et alertes suivies : une condition disparue est résolue
+        for key in active.keys() | self.alerts.states.keys():
+            subject, severity = active.get(key, (None, 'NORMAL'))
+            event = self.alerts.evaluate(self.rule, timestamp, LEVEL_NAMES.index(severity), key)
+            if event is None:
+                continue
+            severity = 'RESOLVED' if event == RESOLVED else LEVEL_NAMES[max(self.alerts.level(key), 1)]
+            self.digest.add(key, notification_subject(event, self.rule, subject, key), now, severity)
+
+        # Limite atteinte ou échec de mise en file : les conditions restent en attente jusqu'au cycle suivant
+        if self.digest.is_due(now) and self.limiter.acquire('email', self.admin_emails):
+            subject, header = self.digest.render(self.digest.entries())
+            body = f"{header}\n\n{self.collector.report()}"
+            try:
+                message = build_alert_message(self.sender_email, self.admin_emails, subject, body)
+                self.spool.enqueue(subject, message, self.sender_email, self.admin_emails)
+                self.digest.clear()
+            except Exception as e:
+                logging.error(f"Failed to queue fleet alert: {e}")
+                self.limiter.refund('email', self.admin_emails)
+        self.save_state()
+
+
+async def serve(collector, host, port, evaluate_interval, alerter=None, metrics=None, ssl_context=None):
+    server = await asyncio.start_server(collector.handle_connection, host, port, backlog=1024, ssl=ssl_context)
+    logging.info(f"Fleet collector listening on {host}:{server.sockets[0].getsockname()[1]}")
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stopping.set)
+    async with server:
+        while not stopping.is_set():
+            try:
+                await asyncio.wait_for(stopping.wait(), evaluate_interval)
+                break
+            except asyncio.TimeoutError:
+                pass
+            collector.evict()
+            # Une seule évaluation pour toute la flotte, quel que soit le nombre d'agents ; hors de la
+            # boucle (fichier d'état, spool, limites d'envoi) pour ne pas retarder la réception des lots
+            if alerter is not None:
+                await loop.run_in_executor(None, alerter.evaluate)
+            if metrics is not None:
+                collector.publish_metrics(metrics)
+
+
+def is_loopback(host):
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def server_ssl_context(certfile, keyfile):
+    """Contexte TLS du collecteur (certificat et clé PEM)"""
+    import ssl
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(certfile, keyfile)
+    return context
+
+
+def main():
+    from fleet_agent import parse_address
+
+    parser = argparse.ArgumentParser(description='Collecteur central du monitoring Chicha Store')
+    parser.add_argument('--listen', default=os.getenv('FLEET_LISTEN', '127.0.0.1:9106'))
+    parser.add_argument('--evaluate-interval', type=float,
+                        default=float(os.getenv('FLEET_EVALUATE_SECONDS', 30)))
+    args = parser.parse_args()
+
+    host, port = parse_address(args.listen)
+    token = os.getenv('FLEET_TOKEN') or None
+    # Hors boucle locale, un agent inconnu ne doit pas pouvoir remplir la mémoire ni déclencher d'alertes
+    if token is None and not is_loopback(host):
+        parser.error(f"FLEET_TOKEN est requis pour écouter sur {host} (hors boucle locale)")
+    certfile = os.getenv('FLEET_TLS_CERT')
+    ssl_context = server_ssl_context(certfile, os.getenv('FLEET_TLS_KEY') or None) if certfile else None
+    if ssl_context is None and not is_loopback(host):
+        logging.warning(f"Fleet collector listening on {host} without TLS: the token travels in clear text")
+
+    collector = FleetCollector(
+        history_capacity=int(os.getenv('FLEET_HISTORY_CAPACITY', 2880)),
+        stale_factor=float(os.getenv('FLEET_STALE_FACTOR', 3)),
+        disk_warning=int(os.getenv('DISK_SPACE_WARNING_THRESHOLD', 80)),
+        disk_critical=int(os.getenv('DISK_SPACE_CRITICAL_THRESHOLD', 90)),
+        load_warning=int(os.getenv('SYSTEM_LOAD_WARNING_THRESHOLD', 70)),
+        load_critical=int(os.getenv('SYSTEM_LOAD_CRITICAL_THRESHOLD', 90)),
+        restart_threshold=int(os.getenv('PROCESS_RESTART_THRESHOLD', 3)),
+        token=token,
+        max_agents=int(os.getenv('FLEET_MAX_AGENTS', 64)),
+        max_metrics=int(os.getenv('FLEET_MAX_METRICS', 512)),
+        evict_seconds=float(os.getenv('FLEET_EVICT_SECONDS', 86400)),
+    )
+    rule = AlertRule('fleet', 'FLOTTE', warning=1, critical=2,
+                     renotify_seconds=float(os.getenv('ALERT_RENOTIFY_SECONDS', 3600)),
+                     flap_threshold=int(os.getenv('ALERT_FLAP_THRESHOLD', 4)),
+                     flap_window=float(os.getenv('ALERT_FLAP_WINDOW_SECONDS', 3600)))
+    alerter = FleetAlerter(collector, float(os.getenv('ALERT_COALESCE_WINDOW_SECONDS', 0)),
+                           os.getenv('FLEET_SPOOL_DIR', '/tmp/chicha_store_fleet_spool'),
+                           os.getenv('FLEET_STATE_FILE', '/tmp/chicha_store_fleet_state.json'), rule)
+    alerter.spool.start()
+
+    metrics = server = None
+    metrics_port = int(os.getenv('FLEET_METRICS_PORT', 9107))
+    if metrics_port:
+        metrics_exporter = deferred_import('metrics_exporter')
+        metrics = metrics_exporter.MetricsRegistry()
+        server = metrics_exporter.MetricsServer(metrics, os.getenv('MONITORING_METRICS_ADDR', '127.0.0.1'),
+                                                metrics_port)
+        server.start()
+
+    try:
+        asyncio.run(serve(collector, host, port, args.evaluate_interval, alerter, metrics, ssl_context))
+    finally:
+        if server is not None:
+            server.close()
+        alerter.spool.close()
+        if 'smtp_transport' in sys.modules:
+            sys.modules['smtp_transport'].close_all()
+        logging.info("Fleet collector stopped")
+
+
+if __name__ == '__main__':
+    main()
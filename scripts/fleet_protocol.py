@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+import json
+import zlib
+import struct
+
+# Trame : magic, type, longueur de la charge utile
+FRAME = struct.Struct('<2sBI')
+MAGIC = b'CF'
+MAX_PAYLOAD = 4 * 1024 * 1024
+
+HELLO = 1    # JSON : instance, intervalle, version, jeton partagé
+NAMES = 2    # JSON : [[id, nom], ...] nouvelles métriques
+BATCH = 3    # binaire : séquence, instant de base, échantillons
+ACK = 4      # binaire : séquence acquittée
+COMPRESSED = 0x80  # bit du type : charge utile compressée (zlib)
+
+BATCH_HEADER = struct.Struct('<IdH')
+# Échantillon : identifiant de métrique, décalage signé en ms depuis l'instant de base, valeur
+# (signé : un instant antérieur à la base, horloge recalée, reste décodable)
+SAMPLE = struct.Struct('<Hid')
+ACK_PAYLOAD = struct.Struct('<I')
+MAX_BATCH = 0xFFFF
+# Une trame HELLO ne dépasse jamais quelques centaines d'octets : borne avant authentification
+MAX_HELLO = 4096
+# En dessous de cette taille, la compression coûte plus qu'elle ne rapporte
+COMPRESS_THRESHOLD = 512
+
+
+class ProtocolError(Exception):
+    """Trame invalide reçue d'un pair"""
+
+
+def encode_frame(kind, payload):
+    if len(payload) >= COMPRESS_THRESHOLD:
+        payload = zlib.compress(payload, 1)
+        kind |= COMPRESSED
+    return FRAME.pack(MAGIC, kind, len(payload)) + payload
+
+
+def decode_header(header, limit=MAX_PAYLOAD):
+    """Type et longueur d'une trame à partir de son en-tête"""
+    magic, kind, length = FRAME.unpack(header)
+    if magic != MAGIC:
+        raise ProtocolError(f"bad magic {magic!r}")
+    if length > limit:
+        raise ProtocolError(f"frame too large ({length} bytes)")
+    return kind, length
+
+
+def decode_payload(kind, payload, limit=MAX_PAYLOAD):
+    if kind & COMPRESSED:
+        # Taille décompressée bornée elle aussi : une trame ne peut pas dépasser `limit`
+        decompressor = zlib.decompressobj()
+        try:
+            payload = decompressor.decompress(payload, limit)
+        except zlib.error as e:
+            raise ProtocolError(f"corrupt compressed frame: {e}")
+        if decompressor.unconsumed_tail:
+            raise ProtocolError('decompressed frame too large')
+    return kind & ~COMPRESSED, payload
+
+
+def encode_json(kind, value):
+    return encode_frame(kind, json.dumps(value, separators=(',', ':')).encode())
+
+
+def encode_batch(sequence, samples):
+    """Lot d'échantillons (id, timestamp, valeur) ; les instants sont relatifs au plus ancien
+
+    struct.error si un écart dépasse la plage du décalage (environ 24 jours) ou si un
+    identifiant sort de 16 bits : le lot ne peut pas être encodé.
+    """
+    base = min(timestamp for _, timestamp, _ in samples)
+    parts = [BATCH_HEADER.pack(sequence, base, len(samples))]
+    parts.extend(SAMPLE.pack(metric_id, int((timestamp - base) * 1000), value)
+                 for metric_id, timestamp, value in samples)
+    return encode_frame(BATCH, b''.join(parts))
+
+
+def iter_batch(payload):
+    """Séquence du lot et générateur des échantillons (id, timestamp, valeur)"""
+    if len(payload) < BATCH_HEADER.size:
+        raise ProtocolError('truncated batch')
+    sequence, base, count = BATCH_HEADER.unpack_from(payload, 0)
+    if len(payload) != BATCH_HEADER.size + count * SAMPLE.size:
+        raise ProtocolError('truncated batch')
+
+    def samples():
+        for metric_id, offset, value in SAMPLE.iter_unpack(payload[BATCH_HEADER.size:]):
+            yield metric_id, base + offset / 1000, value
+    return sequence, samples()
+
+
+def encode_ack(sequence):
+    return encode_frame(ACK, ACK_PAYLOAD.pack(sequence))
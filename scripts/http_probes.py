@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+
+import ssl
+import time
+import socket
+import threading
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+USER_AGENT = 'ChichaStoreMonitoring/1.0'
+# Seules méthodes rejouées après la coupure d'une connexion keep-alive réutilisée
+IDEMPOTENT_METHODS = ('GET', 'HEAD')
+
+
+class _TimedConnection(http.client.HTTPConnection):
+    """Connexion HTTP(S) qui mesure séparément DNS, TCP et TLS à l'ouverture"""
+
+    def __init__(self, host, port, timeout, ssl_context=None):
+        super().__init__(host, port, timeout=timeout)
+        self.ssl_context = ssl_context
+        self.timings = {'dns': 0.0, 'connect': 0.0, 'tls': 0.0}
+
+    def connect(self):
+        started = time.perf_counter()
+        # Nom ASCII passé en octets : getaddrinfo n'a pas à charger le codec idna (~5 ms au démarrage)
+        host = self.host.encode('ascii') if self.host.isascii() else self.host
+        addresses = socket.getaddrinfo(host, self.port, type=socket.SOCK_STREAM)
+        resolved = time.perf_counter()
+
+        error = None
+        for family, socktype, proto, _, address in addresses:
+            sock = socket.socket(family, socktype, proto)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(address)
+                break
+            except OSError as e:
+                sock.close()
+                error = e
+        else:
+            raise error or OSError(f"no address for {self.host}")
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connected = time.perf_counter()
+
+        if self.ssl_context is not None:
+            sock = self.ssl_context.wrap_socket(sock, server_hostname=self.host)
+        handshaked = time.perf_counter()
+
+        self.sock = sock
+        self.timings = {
+            'dns': resolved - started,
+            'connect': connected - resolved,
+            'tls': handshaked - connected if self.ssl_context is not None else 0.0
+        }
+
+
+class ProbeEngine:
+    """Sondes HTTP concurrentes sur des connexions keep-alive réutilisées
+
+    En mode normal, une connexion ouverte par une sonde est rendue au pool et
+    réutilisée au cycle suivant : seuls TTFB et transfert sont alors mesurés.
+    Le mode cold ouvre une connexion neuve par sonde pour mesurer le parcours
+    complet d'un nouveau visiteur (DNS + TCP + TLS).
+    """
+
+    def __init__(self, timeout=5, max_workers=8):
+        self.timeout = timeout
+        # Contexte TLS créé à la première sonde HTTPS (chargement des certificats : plusieurs dizaines de ms)
+        self._ssl_context = None
+        self._pool = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='http-probe')
+
+    @property
+    def ssl_context(self):
+        if self._ssl_context is None:
+            self._ssl_context = ssl.create_default_context()
+        return self._ssl_context
+
+    def _acquire(self, scheme, host, port, cold):
+        key = (scheme, host, port)
+        if not cold:
+            with self._lock:
+                idle = self._pool.get(key)
+                if idle:
+                    return idle.pop(), True
+        context = self.ssl_context if scheme == 'https' else None
+        return _TimedConnection(host, port, self.timeout, context), False
+
+    def _release(self, scheme, host, port, connection):
+        with self._lock:
+            self._pool.setdefault((scheme, host, port), []).append(connection)
+
+    def probe(self, name, url, cold=False, method='GET', body=None, headers=None, keep_body=False):
+        """Sonde d'une URL ; retourne le détail des temps (secondes) et la taille du corps
+
+        method, body et headers permettent les requêtes des parcours synthétiques ;
+        keep_body conserve le corps de la réponse dans result['body'].
+        """
+        parts = urlsplit(url)
+        scheme = parts.scheme or 'http'
+        host = parts.hostname
+        port = parts.port or (443 if scheme == 'https' else 80)
+        path = parts.path or '/'
+        if parts.query:
+            path = f"{path}?{parts.query}"
+
+        result = {
+            'name': name, 'url': url, 'status_code': None, 'ok': False, 'reused': False,
+            'dns': 0.0, 'connect': 0.0, 'tls': 0.0, 'ttfb': None, 'transfer': None,
+            'total': None, 'bytes': 0
+        }
+        for attempt in (1, 2):
+            connection, reused = self._acquire(scheme, host, port, cold)
+            started = time.perf_counter()
+            try:
+                if connection.sock is None:
+                    connection.connect()
+                    result.update(connection.timings)
+                else:
+                    result.update(dns=0.0, connect=0.0, tls=0.0)
+                request_sent = time.perf_counter()
+                connection.request(method, path, body=body,
+                                   headers=dict(headers or {}, **{'User-Agent': USER_AGENT}))
+                response = connection.getresponse()
+                first_byte = time.perf_counter()
+                payload = response.read()
+                finished = time.perf_counter()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as e:
+                connection.close()
+                if reused and attempt == 1 and method in IDEMPOTENT_METHODS:
+                    # Connexion keep-alive fermée côté serveur entre deux cycles : nouvelle tentative.
+                    # Jamais pour un POST : la requête a pu être traitée avant la coupure
+                    continue
+                result['error'] = str(e)
+                return result
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                result['error'] = str(e)
+                return result
+
+            result.update({
+                'status_code': response.status,
+                'ok': 200 <= response.status < 400,
+                'reused': reused,
+                'ttfb': first_byte - request_sent,
+                'transfer': finished - first_byte,
+                'total': finished - started,
+                'bytes': len(payload)
+            })
+            if keep_body:
+                result['body'] = payload
+            if cold or response.will_close:
+                connection.close()
+            else:
+                self._release(scheme, host, port, connection)
+            return result
+
+    def submit(self, function, *args):
+        """Exécution d'une tâche (parcours synthétique, etc.) sur le pool de sondes"""
+        return self._executor.submit(function, *args)
+
+    def probe_all(self, targets, cold=False):
+        """Sondes concurrentes d'une liste de (nom, url), dans l'ordre de la liste"""
+        futures = [self._executor.submit(self.probe, name, url, cold) for name, url in targets]
+        return [future.result() for future in futures]
+
+    def close(self):
+        with self._lock:
+            for connections in self._pool.values():
+                for connection in connections:
+                    connection.close()
+            self._pool = {}
+        self._executor.shutdown(wait=False)
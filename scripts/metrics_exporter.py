@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+
+import gzip
+import math
+import threading
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    value = float(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(int(value)) if value.is_integer() and abs(value) < 1e15 else repr(value)
+
+
+class MetricFamily:
+    """Famille de métriques Prometheus ; son texte n'est recalculé que si ses valeurs changent"""
+
+    __slots__ = ('name', 'kind', 'help', 'labelnames', 'samples', 'text')
+
+    def __init__(self, name, kind, help_text, labelnames=()):
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        # Valeurs indexées par tuple de labels, dans l'ordre de labelnames
+        self.samples = {}
+        self.text = None
+
+    def set(self, value, *labels):
+        if value is None:
+            return self.remove(*labels)
+        if self.samples.get(labels) != value:
+            self.samples[labels] = value
+            self.text = None
+
+    def remove(self, *labels):
+        if self.samples.pop(labels, None) is not None:
+            self.text = None
+
+    def replace(self, samples):
+        """Remplacement de toutes les séries (les séries absentes disparaissent de l'export)"""
+        samples = {labels: value for labels, value in samples.items() if value is not None}
+        if samples != self.samples:
+            self.samples = samples
+            self.text = None
+
+    def render(self):
+        if self.text is None:
+            lines = [f"# HELP {self.name} {_escape(self.help)}", f"# TYPE {self.name} {self.kind}"]
+            for labels, value in self.samples.items():
+                if labels:
+                    pairs = ','.join(f'{name}="{_escape(label)}"' for name, label in zip(self.labelnames, labels))
+                    lines.append(f"{self.name}{{{pairs}}} {_format_value(value)}")
+                else:
+                    lines.append(f"{self.name} {_format_value(value)}")
+            self.text = '\n'.join(lines) + '\n'
+        return self.text
+
+
+class MetricsRegistry:
+    """Ensemble des familles exportées et corps de réponse pré-rendu
+
+    Le corps est reconstruit une fois par cycle (publish), à partir du texte en
+    cache des familles inchangées : un scrape ne fait que renvoyer des octets.
+    """
+
+    def __init__(self):
+        self.families = {}
+        self._lock = threading.Lock()
+        self._body = b''
+        self._gzipped = None
+
+    def family(self, name, kind, help_text, labelnames=()):
+        family = self.families.get(name)
+        if family is None:
+            family = self.families[name] = MetricFamily(name, kind, help_text, labelnames)
+        return family
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self.family(name, 'gauge', help_text, labelnames)
+
+    def counter(self, name, help_text, labelnames=()):
+        return self.family(name, 'counter', help_text, labelnames)
+
+    def publish(self):
+        """Rendu des familles modifiées et remplacement atomique du corps servi"""
+        with self._lock:
+            body = ''.join(family.render() for family in self.families.values() if family.samples).encode()
+            if body != self._body:
+                self._body = body
+                self._gzipped = None
+
+    def body(self, compressed=False):
+        if not compressed:
+            return self._body
+        with self._lock:
+            if self._gzipped is None:
+                self._gzipped = gzip.compress(self._body, compresslevel=5)
+            return self._gzipped
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        compressed = 'gzip' in self.headers.get('Accept-Encoding', '')
+        body = self.server.registry.body(compressed)
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        if compressed:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MetricsServer:
+    """Endpoint /metrics servi par un thread dédié, indépendant des cycles de vérification"""
+
+    def __init__(self, registry, host='127.0.0.1', port=9105):
+        self.registry = registry
+        self.address = (host, port)
+        self._server = None
+
+    def start(self):
+        self._server = ThreadingHTTPServer(self.address, _MetricsHandler)
+        self._server.daemon_threads = True
+        self._server.registry = self.registry
+        threading.Thread(target=self._server.serve_forever, name='metrics-server', daemon=True).start()
+        logging.info(f"Metrics endpoint listening on http://{self.address[0]}:{self._server.server_address[1]}/metrics")
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import mmap
+import struct
+import argparse
+import time
+
+MAGIC = b'CHMTS001'
+# En-tête : magic, capacité, prochaine position d'écriture, nombre de points valides
+HEADER = struct.Struct('<8sQQQ')
+RECORD_SIZE = 16  # timestamp (double) + valeur (double)
+SUFFIX = '.ts'
+
+
+class SeriesFile:
+    """Série temporelle circulaire à enregistrements fixes, projetée en mémoire
+
+    Les écritures se font directement dans la projection (pas de copie ni
+    d'appel write), les lectures sont en accès direct par index. Plusieurs
+    lecteurs peuvent ouvrir le fichier en lecture seule pendant que le daemon écrit.
+    """
+
+    def __init__(self, path, capacity=None, writable=False):
+        self.path = path
+        self.writable = writable
+        if writable and not os.path.exists(path):
+            if not capacity:
+                raise ValueError(f"capacity required to create {path}")
+            with open(path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, capacity, 0, 0))
+                f.truncate(HEADER.size + capacity * RECORD_SIZE)
+
+        self._file = open(path, 'r+b' if writable else 'rb')
+        access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+        self._map = mmap.mmap(self._file.fileno(), 0, access=access)
+        magic, self.capacity, _, _ = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a metrics history file")
+        # Vue sur les enregistrements : timestamp en 2*i, valeur en 2*i+1
+        self._records = memoryview(self._map)[HEADER.size:].cast('d')
+
+    def _state(self):
+        _, _, head, count = HEADER.unpack_from(self._map, 0)
+        return head, count
+
+    def append(self, timestamp, value):
+        head, count = self._state()
+        self._records[2 * head] = timestamp
+        self._records[2 * head + 1] = value
+        # L'en-tête est mis à jour après l'enregistrement : un lecteur ne voit jamais un point à moitié écrit
+        HEADER.pack_into(self._map, 0, MAGIC, self.capacity,
+                         (head + 1) % self.capacity, min(count + 1, self.capacity))
+
+    def expire(self, before):
+        """Oubli des points antérieurs à `before` ; retourne le nombre de points retirés"""
+        head, count = self._state()
+        if not count or self._timestamp(head, count, 0) >= before:
+            return 0
+        expired = self._search(head, count, before)
+        HEADER.pack_into(self._map, 0, MAGIC, self.capacity, head, count - expired)
+        return expired
+
+    def __len__(self):
+        return self._state()[1]
+
+    def _timestamp(self, head, count, index):
+        return self._records[2 * ((head - count + index) % self.capacity)]
+
+    def _search(self, head, count, since):
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if self._timestamp(head, count, middle) < since:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def read(self, since=None, until=None):
+        """Points (timestamp, valeur) dans [since, until], du plus ancien au plus récent"""
+        head, count = self._state()
+        start = 0 if since is None else self._search(head, count, since)
+        stop = count if until is None else self._search(head, count, until + 1e-9)
+        points = []
+        for index in range(start, stop):
+            position = (head - count + index) % self.capacity
+            points.append((self._records[2 * position], self._records[2 * position + 1]))
+        return points
+
+    def flush(self):
+        if self.writable:
+            self._map.flush()
+
+    def close(self):
+        if getattr(self, '_records', None) is not None:
+            self._records.release()
+            self._records = None
+        self._map.close()
+        self._file.close()
+
+
+class MetricsHistory:
+    """Historique persistant : un fichier projeté par métrique dans `directory`
+
+    La rétention est un âge (secondes) : les points plus anciens sont oubliés à
+    chaque écriture, quelle que soit la cadence réelle (daemon ou cron). La
+    capacité des fichiers est dimensionnée pour un point toutes les `interval`
+    secondes ; un fichier créé avec une autre capacité est redimensionné à
+    l'ouverture.
+    """
+
+    def __init__(self, directory, retention, interval):
+        self.directory = directory
+        self._series = {}
+        self.configure(retention, interval)
+        os.makedirs(directory, exist_ok=True)
+
+    def configure(self, retention, interval):
+        """Nouvelle rétention ou nouvel intervalle (--interval, rechargement de la configuration)"""
+        self.retention = retention
+        capacity = int(retention / interval) + 1
+        if capacity != getattr(self, 'capacity', capacity):
+            # Fichiers rouverts (et redimensionnés) à la prochaine écriture
+            self.close()
+        self.capacity = capacity
+
+    def _resize(self, series):
+        """Recopie des points encore dans la rétention vers un fichier à la capacité courante"""
+        points = series.read(since=time.time() - self.retention)[-self.capacity:]
+        path = series.path
+        series.close()
+        tmp_path = f"{path}.tmp"
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        resized = SeriesFile(tmp_path, self.capacity, writable=True)
+        for timestamp, value in points:
+            resized.append(timestamp, value)
+        resized.flush()
+        resized.close()
+        os.replace(tmp_path, path)
+        return SeriesFile(path, writable=True)
+
+    def _series_file(self, name):
+        series = self._series.get(name)
+        if series is None:
+            path = os.path.join(self.directory, name + SUFFIX)
+            series = SeriesFile(path, self.capacity, writable=True)
+            if series.capacity != self.capacity:
+                series = self._resize(series)
+            self._series[name] = series
+        return series
+
+    def append(self, name, timestamp, value):
+        if value is None:
+            return
+        series = self._series_file(name)
+        series.expire(timestamp - self.retention)
+        series.append(timestamp, value)
+
+    def flush(self):
+        for series in self._series.values():
+            series.flush()
+
+    def close(self):
+        for series in self._series.values():
+            series.flush()
+            series.close()
+        self._series = {}
+
+
+class MetricsHistoryReader:
+    """Accès en lecture seule à l'historique, utilisable pendant que le daemon écrit"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def metrics(self):
+        try:
+            return sorted(name[:-len(SUFFIX)] for name in os.listdir(self.directory) if name.endswith(SUFFIX))
+        except FileNotFoundError:
+            return []
+
+    def read(self, name, since=None, until=None):
+        series = SeriesFile(os.path.join(self.directory, name + SUFFIX))
+        try:
+            return series.read(since, until)
+        finally:
+            series.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lecture de l'historique des métriques de monitoring")
+    parser.add_argument('--dir', default=os.getenv('MONITORING_HISTORY_DIR', '/tmp/chicha_store_metrics'))
+    parser.add_argument('--metric', help='Métrique à exporter (liste des métriques si absent)')
+    parser.add_argument('--since', type=float, default=3600, help='Fenêtre en secondes (défaut : 1 h)')
+    args = parser.parse_args()
+
+    reader = MetricsHistoryReader(args.dir)
+    if not args.metric:
+        print('\n'.join(reader.metrics()))
+        return
+    for timestamp, value in reader.read(args.metric, since=time.time() - args.since):
+        sys.stdout.write(f"{timestamp:.3f},{value}\n")
+
+
+if __name__ == '__main__':
+    main()
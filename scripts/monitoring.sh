@@ -7,6 +7,10 @@ SLACK_WEBHOOK_URL="${SLACK_WEBHOOK_URL}"
 HEALTH_CHECK_URL="https://chicha-store.com/health"
 ERROR_LOG_PATH="/var/log/chicha-store/error.log"
 PERFORMANCE_LOG_PATH="/var/log/chicha-store/performance.log"
+# Routage par sévérité : criticals immédiats, avertissements regroupés (ALERT_ROUTES, MONITORING_ROUTER_STATE)
+ALERT_ROUTER="$(dirname "$0")/alert_router.py"
+# État propre à ce script : monitoring.sh et advanced-monitoring.sh routent les mêmes clés (site, disk, load)
+export ALERT_ROUTER_STATE="${MONITORING_ROUTER_STATE:-/tmp/chicha_store_monitoring_router.json}"
 
 # Fonction d'envoi de notification Slack
 send_slack_notification() {
@@ -26,7 +30,35 @@ send_slack_notification() {
 EOF
 )
 
-    curl -X POST -H 'Content-type: application/json' --data "$payload" "$SLACK_WEBHOOK_URL"
+    curl -fsS -X POST -H 'Content-type: application/json' --data "$payload" "$SLACK_WEBHOOK_URL"
+}
+
+# Passage d'une condition par le routeur ; seuls les envois dus partent sur Slack
+notify() {
+    local key="$1"
+    local message="$2"
+    local severity="$3"
+    local value="$4"
+
+    python3 "$ALERT_ROUTER" route "$key" "$severity" "$message" ${value:+--value "$value"} | deliver_notifications
+}
+
+# Une notification n'est acquittée (retirée des envois dus) qu'une fois livrée ;
+# en cas d'échec, son jeton d'envoi est rendu et elle repart au prochain appel du routeur
+deliver_notifications() {
+    local id severity text color
+    while IFS=$'\t' read -r id severity text; do
+        case "$severity" in
+            "critical") color="danger" ;;
+            "warning")  color="warning" ;;
+            *)          color="good" ;;
+        esac
+        if send_slack_notification "$text" "$color"; then
+            python3 "$ALERT_ROUTER" ack "$id" < /dev/null
+        else
+            python3 "$ALERT_ROUTER" nack "$id" < /dev/null
+        fi
+    done
 }
 
 # Vérification de la santé du site
@@ -34,7 +66,7 @@ check_site_health() {
     local response=$(curl -s -o /dev/null -w "%{http_code}" "$HEALTH_CHECK_URL")
     
     if [ "$response" -ne 200 ]; then
-        send_slack_notification "Site Unavailable! HTTP Status: $response" "danger"
+        notify site "Site Unavailable! HTTP Status: $response" critical
     fi
 }
 
@@ -43,7 +75,7 @@ check_error_logs() {
     local recent_errors=$(tail -n 50 "$ERROR_LOG_PATH" | grep -E "ERROR|CRITICAL")
     
     if [ ! -z "$recent_errors" ]; then
-        send_slack_notification "Recent Errors Detected:\n$recent_errors" "warning"
+        notify error_logs "Recent Errors Detected:\n$recent_errors" warning
     fi
 }
 
@@ -52,7 +84,7 @@ check_performance() {
     local avg_response_time=$(awk '{sum+=$1} END {print sum/NR}' "$PERFORMANCE_LOG_PATH")
     
     if (( $(echo "$avg_response_time > 1000" | bc -l) )); then
-        send_slack_notification "High Response Time: $avg_response_time ms" "warning"
+        notify performance "High Response Time: $avg_response_time ms" warning "$avg_response_time"
     fi
 }
 
@@ -61,7 +93,7 @@ check_disk_space() {
     local disk_usage=$(df -h / | awk '/\// {print $5}' | sed 's/%//')
     
     if [ "$disk_usage" -gt 80 ]; then
-        send_slack_notification "Disk Space Low: $disk_usage% used" "warning"
+        notify disk "Disk Space Low: $disk_usage% used" warning "$disk_usage"
     fi
 }
 
@@ -72,7 +104,7 @@ check_system_load() {
     local load_percentage=$(echo "scale=2; ($load / $cores) * 100" | bc)
     
     if (( $(echo "$load_percentage > 80" | bc -l) )); then
-        send_slack_notification "High System Load: $load_percentage%" "warning"
+        notify load "High System Load: $load_percentage%" warning "$load_percentage"
     fi
 }
 
@@ -83,6 +115,8 @@ main() {
     check_performance
     check_disk_space
     check_system_load
+    # Digests dont la fenêtre s'est écoulée sans nouvelle condition
+    python3 "$ALERT_ROUTER" flush | deliver_notifications
 }
 
 main
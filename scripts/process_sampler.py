@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+import os
+import time
+import argparse
+from collections import deque
+
+import psutil
+
+# Services suivis : noms d'exécutable acceptés et fragment de ligne de commande requis
+PROCESS_GROUPS = {
+    'backend': ({'node', 'nodejs'}, 'server.js'),
+    'mongodb': ({'mongod'}, None),
+    'redis': ({'redis-server'}, None),
+    'nginx': ({'nginx'}, None),
+}
+
+DISCOVERY_ATTRS = ['pid', 'name', 'cmdline']
+
+
+class ProcessSampler:
+    """Échantillonnage par processus (RSS, CPU, FD, threads, changements de contexte)
+
+    Les handles psutil.Process sont conservés d'un cycle à l'autre : le CPU et
+    les taux de changements de contexte sont calculés par différence avec
+    l'échantillon précédent, et le parcours complet de /proc (process_iter) n'a
+    lieu qu'au démarrage, périodiquement ou quand un processus suivi disparaît.
+    Un service déjà vu dont de nouveaux PID apparaissent compte un redémarrage
+    par parcours, quel que soit le nombre de PID remplacés : un reload nginx ou
+    le respawn des workers pm2/gunicorn n'est compté qu'une fois.
+
+    En mode cron, to_state()/load_state() transmettent d'une exécution à l'autre
+    les échantillons (PID, date de démarrage, temps CPU, changements de contexte),
+    les services déjà vus et les redémarrages récents. Sans échantillon précédent,
+    les taux valent None.
+    """
+
+    def __init__(self, groups=PROCESS_GROUPS, rescan_interval=60, restart_window=600):
+        self.groups = groups
+        self.rescan_interval = rescan_interval
+        self.restart_window = restart_window
+        # pid -> (service, Process)
+        self._handles = {}
+        # pid -> (date de démarrage, instant, temps CPU cumulé, changements de contexte cumulés)
+        # de l'échantillon précédent ; la date de démarrage écarte un PID réutilisé
+        self._previous = {}
+        self._next_scan = 0.0
+        self._seen_groups = set()
+        # Instants (time.time) des redémarrages détectés
+        self._starts = {name: deque() for name in groups}
+
+    def _match(self, info):
+        name = info['name'] or ''
+        for group, (names, fragment) in self.groups.items():
+            if name not in names:
+                continue
+            if fragment is None or any(fragment in part for part in info['cmdline'] or ()):
+                return group
+        return None
+
+    def _scan(self, now):
+        """Découverte des processus ; les handles déjà connus sont conservés"""
+        found_groups = set()
+        restarted = set()
+        for process in psutil.process_iter(DISCOVERY_ATTRS):
+            group = self._match(process.info)
+            if group is None:
+                continue
+            found_groups.add(group)
+            if process.pid not in self._handles:
+                self._handles[process.pid] = (group, process)
+                previous = self._previous.get(process.pid)
+                try:
+                    # Processus déjà échantillonné par l'exécution précédente (état rechargé) : pas un redémarrage
+                    known = previous is not None and previous[0] == process.create_time()
+                except psutil.Error:
+                    known = False
+                if group in self._seen_groups and not known:
+                    restarted.add(group)
+        # Un seul redémarrage par service et par parcours : les workers remplacés ensemble ne comptent qu'une fois
+        for group in restarted:
+            self._starts[group].append(time.time())
+        self._seen_groups |= found_groups
+        self._next_scan = now + self.rescan_interval
+
+    def sample(self):
+        """Agrégats par service et liste des redémarrages récents"""
+        if time.monotonic() >= self._next_scan:
+            self._scan(time.monotonic())
+        # Horloge murale : les échantillons précédents peuvent venir d'une autre exécution
+        now = time.time()
+        cpu_started = time.process_time()
+
+        services = {
+            group: {'processes': 0, 'pids': [], 'rss_bytes': 0, 'cpu_percent': None, 'open_fds': 0,
+                    'threads': 0, 'ctx_switches_per_sec': None}
+            for group in self.groups
+        }
+        lost = False
+        for pid, (group, process) in list(self._handles.items()):
+            try:
+                with process.oneshot():
+                    rss = process.memory_info().rss
+                    times = process.cpu_times()
+                    cpu = times.user + times.system
+                    threads = process.num_threads()
+                    switches = sum(process.num_ctx_switches())
+                    try:
+                        fds = process.num_fds()
+                    except psutil.AccessDenied:
+                        fds = None
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                del self._handles[pid]
+                self._previous.pop(pid, None)
+                lost = True
+                continue
+            except psutil.AccessDenied:
+                continue
+
+            service = services[group]
+            service['processes'] += 1
+            service['pids'].append(pid)
+            service['rss_bytes'] += rss
+            service['threads'] += threads
+            if fds is not None:
+                service['open_fds'] += fds
+            created = process.create_time()
+            previous = self._previous.get(pid)
+            self._previous[pid] = (created, now, cpu, switches)
+            if previous is not None and previous[0] == created and now > previous[1]:
+                elapsed = now - previous[1]
+                service['cpu_percent'] = (service['cpu_percent'] or 0.0) + (cpu - previous[2]) / elapsed * 100
+                rate = (switches - previous[3]) / elapsed
+                service['ctx_switches_per_sec'] = (service['ctx_switches_per_sec'] or 0.0) + rate
+
+        if lost:
+            # Un processus suivi a disparu : son remplaçant est recherché dès le cycle suivant
+            self._next_scan = 0.0
+
+        restarts = {}
+        for group, starts in self._starts.items():
+            while starts and starts[0] < now - self.restart_window:
+                starts.popleft()
+            restarts[group] = len(starts)
+
+        # Processus disparus depuis l'état rechargé, jamais retrouvés par le parcours
+        for pid in [pid for pid in self._previous if pid not in self._handles]:
+            del self._previous[pid]
+
+        cpu_used = time.process_time() - cpu_started
+        return {
+            'services': services,
+            'restarts': restarts,
+            'restart_window': self.restart_window,
+            'sampler_cpu_seconds': cpu_used
+        }
+
+
+    def to_state(self):
+        """Forme sérialisable pour l'exécution suivante (mode cron)"""
+        return {
+            'previous': {str(pid): list(sample) for pid, sample in self._previous.items()},
+            'seen': sorted(self._seen_groups),
+            'starts': {group: list(starts) for group, starts in self._starts.items() if starts}
+        }
+
+    def load_state(self, state):
+        self._previous = {int(pid): tuple(sample) for pid, sample in state.get('previous', {}).items()}
+        self._seen_groups = set(state.get('seen', ())) & set(self.groups)
+        for group, starts in state.get('starts', {}).items():
+            if group in self._starts:
+                self._starts[group] = deque(starts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Échantillonnage des processus Chicha Store')
+    parser.add_argument('--interval', type=float, default=1.0)
+    parser.add_argument('--duration', type=float, default=60.0, help='Durée de la mesure en secondes')
+    args = parser.parse_args()
+
+    sampler = ProcessSampler()
+    cycles = 0
+    cpu_started, wall_started = time.process_time(), time.monotonic()
+    result = None
+    while time.monotonic() - wall_started < args.duration:
+        result = sampler.sample()
+        cycles += 1
+        time.sleep(args.interval)
+    cpu_percent = (time.process_time() - cpu_started) / (time.monotonic() - wall_started) * 100
+
+    for group, service in result['services'].items():
+        cpu = 'N/A' if service['cpu_percent'] is None else f"{service['cpu_percent']:.1f}"
+        print(f"{group}: {service['processes']} processus, RSS {service['rss_bytes'] / 1048576:.0f} Mo, "
+              f"CPU {cpu}%, {service['open_fds']} FD, {service['threads']} threads, "
+              f"redémarrages {result['restarts'][group]}")
+    print(f"{cycles} cycles, coût de l'échantillonneur : {cpu_percent:.2f}% d'un cœur (pid {os.getpid()})")
+
+
+if __name__ == '__main__':
+    main()
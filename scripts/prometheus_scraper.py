@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+
+import math
+import http.client
+from urllib.parse import urlsplit
+
+from baselines import AdaptiveBaseline
+
+USER_AGENT = 'ChichaStoreMonitoring/1.0'
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Histogrammes publiés par backend/config/performanceMonitoring.js : labels de regroupement
+BACKEND_HISTOGRAMS = {
+    'http_request_duration_seconds': ('method', 'route'),
+    'database_query_duration_seconds': ('collection', 'operation'),
+}
+
+_ESCAPES = {'\\': '\\', '"': '"', 'n': '\n'}
+
+
+def _parse_labels(line, position):
+    """Labels d'une ligne à partir de l'accolade ouvrante ; retourne (labels, position après '}')"""
+    labels = {}
+    length = len(line)
+    position += 1
+    while position < length:
+        char = line[position]
+        if char == '}':
+            return labels, position + 1
+        if char in ', ':
+            position += 1
+            continue
+        equal = line.index('=', position)
+        name = line[position:equal].strip()
+        position = line.index('"', equal) + 1
+        start = position
+        # Sans échappement (cas courant), la valeur est une simple tranche de la ligne
+        end = line.index('"', position)
+        if '\\' not in line[start:end]:
+            labels[name] = line[start:end]
+            position = end + 1
+            continue
+        chars = []
+        while line[position] != '"':
+            if line[position] == '\\':
+                position += 1
+                chars.append(_ESCAPES.get(line[position], '\\' + line[position]))
+            else:
+                chars.append(line[position])
+            position += 1
+        labels[name] = ''.join(chars)
+        position += 1
+    raise ValueError(f"unterminated label set: {line[:80]}")
+
+
+def iter_samples(lines, prefixes=None):
+    """Échantillons (nom, labels, valeur) d'un flux au format texte Prometheus
+
+    Générateur ligne à ligne : rien n'est accumulé, et les lignes dont le nom ne
+    commence par aucun des `prefixes` sont écartées avant l'analyse des labels.
+    """
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', 'replace')
+        line = line.strip()
+        if not line or line[0] == '#':
+            continue
+        if prefixes is not None and not line.startswith(prefixes):
+            continue
+        brace = line.find('{')
+        space = line.find(' ')
+        if brace != -1 and (space == -1 or brace < space):
+            name = line[:brace]
+            labels, position = _parse_labels(line, brace)
+        else:
+            name = line[:space]
+            labels, position = {}, space
+        # Valeur, éventuellement suivie d'un horodatage ignoré
+        yield name, labels, float(line[position:].split()[0])
+
+
+class HistogramDeltas:
+    """Agrégation d'un histogramme par groupe de labels et différences entre deux scrapes
+
+    Les séries d'un même groupe (par exemple tous les codes HTTP d'une route) sont
+    sommées pendant le parcours du flux ; les quantiles et le taux d'erreur sont
+    calculés sur l'activité survenue depuis le scrape précédent.
+    """
+
+    def __init__(self, name, group_labels):
+        self.name = name
+        self.group_labels = group_labels
+        # Cumuls du scrape précédent : groupe -> [compteur, {le: cumul}, erreurs]
+        self.previous = {}
+        self.current = {}
+
+    def feed(self, suffix, labels, value):
+        group = tuple(labels.get(label, '') for label in self.group_labels)
+        state = self.current.get(group)
+        if state is None:
+            state = self.current[group] = [0.0, {}, 0.0]
+        if suffix == '_bucket':
+            buckets = state[1]
+            le = labels.get('le', '+Inf')
+            buckets[le] = buckets.get(le, 0.0) + value
+        elif suffix == '_count':
+            state[0] += value
+            if labels.get('code', '').startswith('5'):
+                state[2] += value
+
+    def finish(self):
+        """Statistiques par groupe depuis le scrape précédent, puis bascule des cumuls"""
+        stats = {}
+        for group, (count, buckets, errors) in self.current.items():
+            previous = self.previous.get(group)
+            if previous is None:
+                continue
+            previous_count, previous_buckets, previous_errors = previous
+            if count < previous_count:
+                # Redémarrage du backend : les compteurs repartent de zéro
+                previous_count, previous_buckets, previous_errors = 0.0, {}, 0.0
+            requests = count - previous_count
+            if requests <= 0:
+                continue
+            deltas = sorted(
+                (float(le), cumulative - previous_buckets.get(le, 0.0)) for le, cumulative in buckets.items()
+            )
+            entry = {'requests': requests, 'error_rate': (errors - previous_errors) / requests}
+            for quantile in QUANTILES:
+                entry[f'p{round(quantile * 100)}'] = bucket_quantile(quantile, deltas)
+            stats[group] = entry
+        self.previous = self.current
+        self.current = {}
+        return stats
+
+    def to_state(self):
+        return [[list(group), count, buckets, errors] for group, (count, buckets, errors) in self.previous.items()]
+
+    def load_state(self, state):
+        self.previous = {tuple(group): [count, buckets, errors] for group, count, buckets, errors in state}
+
+
+def bucket_quantile(quantile, buckets):
+    """Quantile par interpolation linéaire dans les buckets cumulés (comme histogram_quantile)"""
+    if not buckets or buckets[-1][1] <= 0:
+        return None
+    rank = quantile * buckets[-1][1]
+    lower_bound, lower_count = 0.0, 0.0
+    for bound, cumulative in buckets:
+        if cumulative >= rank:
+            if math.isinf(bound):
+                # Au-delà du dernier bucket fini : la borne connue la plus haute
+                return lower_bound
+            if cumulative == lower_count:
+                return bound
+            return lower_bound + (bound - lower_bound) * (rank - lower_count) / (cumulative - lower_count)
+        lower_bound, lower_count = bound, cumulative
+    return lower_bound
+
+
+class BackendMetricsScraper:
+    """Scrape de l'endpoint Prometheus du backend et détection des régressions de latence"""
+
+    def __init__(self, url, histograms=BACKEND_HISTOGRAMS, timeout=5, min_requests=20,
+                 error_rate_threshold=0.05, threshold=4.0):
+        self.url = url
+        parts = urlsplit(url)
+        self.https = parts.scheme == 'https'
+        self.host = parts.hostname
+        self.port = parts.port or (443 if self.https else 80)
+        self.path = parts.path or '/metrics'
+        self.timeout = timeout
+        self.min_requests = min_requests
+        self.error_rate_threshold = error_rate_threshold
+        self.threshold = threshold
+        self.histograms = {name: HistogramDeltas(name, labels) for name, labels in histograms.items()}
+        self.prefixes = tuple(histograms)
+        # Référence adaptative du p95 par groupe (route, collection)
+        self.baselines = {}
+        self._connection = None
+
+    def _open(self):
+        if self._connection is None:
+            connection_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            self._connection = connection_class(self.host, self.port, timeout=self.timeout)
+        return self._connection
+
+    def _consume(self, lines):
+        histograms = self.histograms
+        for name, labels, value in iter_samples(lines, self.prefixes):
+            for suffix in ('_bucket', '_count'):
+                if name.endswith(suffix):
+                    histogram = histograms.get(name[:-len(suffix)])
+                    if histogram is not None:
+                        histogram.feed(suffix, labels, value)
+                    break
+
+    def scrape(self):
+        """Lecture en flux de l'endpoint ; retourne les statistiques par histogramme et groupe"""
+        for attempt in (1, 2):
+            connection = self._open()
+            try:
+                connection.request('GET', self.path, headers={'User-Agent': USER_AGENT})
+                response = connection.getresponse()
+                if response.status != 200:
+                    response.read()
+                    raise http.client.HTTPException(f"HTTP {response.status} from {self.url}")
+                self._consume(response)
+                # Fin de corps : libère la connexion pour le scrape suivant (keep-alive)
+                response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self.close()
+                for histogram in self.histograms.values():
+                    histogram.current = {}
+                if attempt == 2:
+                    raise
+            except Exception:
+                self.close()
+                for histogram in self.histograms.values():
+                    histogram.current = {}
+                raise
+        return {name: histogram.finish() for name, histogram in self.histograms.items()}
+
+    def _baseline(self, key):
+        baseline = self.baselines.get(key)
+        if baseline is None:
+            baseline = self.baselines[key] = AdaptiveBaseline(0.05, threshold=self.threshold, min_samples=10)
+        return baseline
+
+    def evaluate(self, timestamp, stats):
+        """Régressions de latence (p95 anormal) et taux d'erreur excessifs par groupe"""
+        regressions = []
+        for name, groups in stats.items():
+            for group, entry in groups.items():
+                if entry['requests'] < self.min_requests:
+                    continue
+                label = ' '.join(part for part in group if part)
+                if entry['p95'] is not None:
+                    result = self._baseline(f"{name}|{'|'.join(group)}").evaluate(timestamp, entry['p95'])
+                    if result['anomalous']:
+                        regressions.append({'metric': name, 'group': label, 'kind': 'latency',
+                                            'value': entry['p95'], 'expected': result['expected']})
+                if entry['error_rate'] >= self.error_rate_threshold:
+                    regressions.append({'metric': name, 'group': label, 'kind': 'errors',
+                                        'value': entry['error_rate'], 'expected': self.error_rate_threshold})
+        return regressions
+
+    def to_state(self):
+        return {
+            'histograms': {name: histogram.to_state() for name, histogram in self.histograms.items()},
+            'baselines': {key: baseline.to_state() for key, baseline in self.baselines.items()}
+        }
+
+    def load_state(self, state):
+        for name, histogram_state in state.get('histograms', {}).items():
+            if name in self.histograms:
+                self.histograms[name].load_state(histogram_state)
+        for key, baseline_state in state.get('baselines', {}).items():
+            self._baseline(key).load_state(baseline_state)
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+# Point d'entrée à démarrage rapide (cron, healthchecks de conteneur) : le module principal
+# est chargé depuis son bytecode en cache au lieu d'être recompilé à chaque exécution.
+import time
+
+STARTED = time.perf_counter()
+
+import advanced_monitoring
+
+if __name__ == '__main__':
+    advanced_monitoring.main(STARTED)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import time
+import fcntl
+import logging
+from contextlib import contextmanager
+
+# Débits par défaut (messages par minute) : bien en deçà des limites Gmail, Slack et Discord
+DEFAULT_CHANNEL_RATES = {'email': 10, 'webhook': 30, 'discord': 30, 'telegram': 20}
+QUOTA_PERIOD = 86400
+
+
+def parse_rates(value, defaults=DEFAULT_CHANNEL_RATES):
+    """« canal=messages_par_minute,... » (variable SEND_RATE_LIMITS), complété par les débits par défaut"""
+    rates = dict(defaults)
+    for item in (value or '').split(','):
+        channel, _, rate = item.strip().partition('=')
+        if channel and rate:
+            rates[channel] = float(rate)
+    return rates
+
+
+class TokenBucket:
+    """Seau à jetons : `capacity` envois d'affilée, puis `rate` jetons par seconde"""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity, tokens=None, updated=0.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity if tokens is None else min(tokens, capacity)
+        self.updated = updated
+
+    def refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+        return self.tokens
+
+
+class SendLimiter:
+    """Seaux par canal et par destinataire, quota glissant sur 24 h, partagés entre processus
+
+    L'état vit dans un fichier verrouillé : le daemon, les exécutions cron et les scripts shell
+    envoient depuis le même compte et consomment donc les mêmes jetons.
+    """
+
+    def __init__(self, path, channel_rates=None, recipient_rate=30, daily_quota=400):
+        self.path = path
+        self.deferred = {}
+        self.configure(channel_rates, recipient_rate, daily_quota)
+
+    def configure(self, channel_rates=None, recipient_rate=30, daily_quota=400):
+        # Débits en messages par minute (canaux) et par heure (destinataires) ; 0 = illimité
+        self.channel_rates = dict(DEFAULT_CHANNEL_RATES if channel_rates is None else channel_rates)
+        self.recipient_rate = recipient_rate
+        self.daily_quota = daily_quota
+
+    def _channel_bucket(self, state, channel):
+        rate = self.channel_rates.get(channel, 0)
+        if rate <= 0:
+            return None
+        tokens, updated = state['channels'].get(channel, (None, 0.0))
+        return TokenBucket(rate / 60, rate, tokens, updated)
+
+    def _recipient_bucket(self, state, recipient):
+        if self.recipient_rate <= 0:
+            return None
+        tokens, updated = state['recipients'].get(recipient, (None, 0.0))
+        return TokenBucket(self.recipient_rate / 3600, self.recipient_rate, tokens, updated)
+
+    def _quota_used(self, state, now):
+        # Compteurs par heure : les heures sorties de la fenêtre de 24 h sont oubliées
+        oldest = int((now - QUOTA_PERIOD) // 3600)
+        state['quota'] = {hour: count for hour, count in state['quota'].items() if int(hour) > oldest}
+        return sum(state['quota'].values())
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            state = {}
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable send limits state {self.path}: {e}")
+            state = {}
+        for key in ('channels', 'recipients', 'quota'):
+            state.setdefault(key, {})
+        return state
+
+    @contextmanager
+    def _locked(self, exclusive=True):
+        with open(f"{self.path}.lock", 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield self._read()
+
+    def _write(self, state):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def acquire(self, channel, recipients=(), now=None):
+        """Un envoi sur `channel` à `recipients` ; False (rien n'est consommé) si un seau ou le quota est épuisé"""
+        now = time.time() if now is None else now
+        recipients = [recipient for recipient in recipients if recipient]
+        with self._locked() as state:
+            buckets = [(state['channels'], channel, self._channel_bucket(state, channel))]
+            buckets += [(state['recipients'], recipient, self._recipient_bucket(state, recipient))
+                        for recipient in recipients]
+            buckets = [(store, key, bucket) for store, key, bucket in buckets if bucket is not None]
+
+            # Le quota quotidien compte les destinataires, comme Gmail
+            quota_exceeded = (recipients and self.daily_quota > 0
+                              and self._quota_used(state, now) + len(recipients) > self.daily_quota)
+            dry = [key for _, key, bucket in buckets if bucket.refill(now) < 1]
+            if quota_exceeded or dry:
+                self.deferred[channel] = self.deferred.get(channel, 0) + 1
+                logging.warning(f"Send on {channel} deferred: "
+                                f"{'daily quota reached' if quota_exceeded else 'rate limit for ' + ', '.join(dry)}")
+                return False
+
+            for store, key, bucket in buckets:
+                store[key] = (bucket.tokens - 1, bucket.updated)
+            if recipients:
+                hour = str(int(now // 3600))
+                state['quota'][hour] = state['quota'].get(hour, 0) + len(recipients)
+            self._write(state)
+        return True
+
+    def refund(self, channel, recipients=(), now=None):
+        """Restitution des jetons et du quota pris par `acquire` pour un envoi qui a échoué"""
+        now = time.time() if now is None else now
+        recipients = [recipient for recipient in recipients if recipient]
+        with self._locked() as state:
+            buckets = [(state['channels'], channel, self._channel_bucket(state, channel))]
+            buckets += [(state['recipients'], recipient, self._recipient_bucket(state, recipient))
+                        for recipient in recipients]
+            for store, key, bucket in buckets:
+                if bucket is not None:
+                    store[key] = (min(bucket.capacity, bucket.refill(now) + 1), bucket.updated)
+            if recipients and state['quota']:
+                # L'envoi a été compté dans l'heure la plus récente du quota
+                hour = max(state['quota'], key=int)
+                state['quota'][hour] = max(0, state['quota'][hour] - len(recipients))
+            self._write(state)
+
+    def snapshot(self, now=None):
+        """Jetons disponibles par seau, quota consommé et envois différés (métriques)"""
+        now = time.time() if now is None else now
+        with self._locked(exclusive=False) as state:
+            channels = {}
+            for channel in self.channel_rates:
+                bucket = self._channel_bucket(state, channel)
+                if bucket is not None:
+                    channels[channel] = bucket.refill(now)
+            recipients = {}
+            for recipient in state['recipients']:
+                bucket = self._recipient_bucket(state, recipient)
+                if bucket is not None:
+                    recipients[recipient] = bucket.refill(now)
+            quota_used = self._quota_used(state, now)
+        return {
+            'channels': channels,
+            'recipients': recipients,
+            'quota_used': quota_used,
+            'quota_limit': self.daily_quota,
+            'deferred': dict(self.deferred)
+        }
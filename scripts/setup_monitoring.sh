@@ -13,9 +13,25 @@ source monitoring_env/bin/activate
 pip install -r requirements_monitoring.txt
 
 # Rendre le script de monitoring exécutable
-chmod +x advanced_monitoring.py
+chmod +x advanced_monitoring.py run_monitoring.py
 
-# Configuration du crontab pour l'exécution périodique
-(crontab -l 2>/dev/null; echo "*/15 * * * * /Users/bv/CascadeProjects/chicha-store/scripts/monitoring_env/bin/python /Users/bv/CascadeProjects/chicha-store/scripts/advanced_monitoring.py") | crontab -
+# Configuration de l'exécution périodique
+# MONITORING_MODE=daemon : processus résident (intervalle MONITORING_INTERVAL_SECONDS, défaut 30 s)
+# MONITORING_MODE=cron   : un nouveau processus toutes les 15 minutes
+MONITORING_MODE="${MONITORING_MODE:-daemon}"
+MONITORING_PYTHON=/Users/bv/CascadeProjects/chicha-store/scripts/monitoring_env/bin/python
+MONITORING_SCRIPT=/Users/bv/CascadeProjects/chicha-store/scripts/advanced_monitoring.py
+# Point d'entrée à démarrage rapide pour les exécutions ponctuelles (bytecode en cache)
+MONITORING_ONESHOT=/Users/bv/CascadeProjects/chicha-store/scripts/run_monitoring.py
+
+if [ "$MONITORING_MODE" = "daemon" ]; then
+    DAEMON_CMD="nohup $MONITORING_PYTHON $MONITORING_SCRIPT --daemon >/dev/null 2>&1 &"
+    (crontab -l 2>/dev/null | grep -v "advanced_monitoring.py\|run_monitoring.py"; echo "@reboot $DAEMON_CMD") | crontab -
+    # Redémarrage propre d'une instance éventuellement déjà lancée
+    pkill -TERM -f "advanced_monitoring.py --daemon" 2>/dev/null
+    eval "$DAEMON_CMD"
+else
+    (crontab -l 2>/dev/null | grep -v "advanced_monitoring.py\|run_monitoring.py"; echo "*/15 * * * * $MONITORING_PYTHON $MONITORING_ONESHOT") | crontab -
+fi
 
 echo "🚀 Configuration du monitoring Chicha Store terminée !"
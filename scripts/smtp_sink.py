@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+
+import os
+import ssl
+import time
+import logging
+import argparse
+import tempfile
+import threading
+import subprocess
+import socketserver
+
+
+def self_signed_certificate(directory):
+    """Certificat auto-signé pour localhost et 127.0.0.1 (openssl), valable un jour : (certificat, clé)"""
+    certfile, keyfile = os.path.join(directory, 'sink-cert.pem'), os.path.join(directory, 'sink-key.pem')
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'ec', '-pkeyopt', 'ec_paramgen_curve:prime256v1', '-nodes',
+         '-keyout', keyfile, '-out', certfile, '-days', '1', '-subj', '/CN=localhost',
+         '-addext', 'subjectAltName=DNS:localhost,IP:127.0.0.1'],
+        check=True, capture_output=True
+    )
+    return certfile, keyfile
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Session SMTP minimale : accepte tout message et l'enregistre dans le puits"""
+
+    disable_nagle_algorithm = True
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        sink = self.server.sink
+        sink._count('connections')
+        self.reply('220 chicha-store-sink ESMTP')
+        sender, recipients = None, []
+        secure = False
+        while True:
+            line = self.rfile.readline(65536)
+            if not line:
+                return
+            command, _, argument = line.decode('utf-8', 'replace').rstrip('\r\n').partition(' ')
+            command = command.upper()
+            if command in ('EHLO', 'HELO'):
+                starttls = b'250-STARTTLS\r\n' if sink.tls_context is not None and not secure else b''
+                self.wfile.write(b'250-chicha-store-sink\r\n' + starttls +
+                                 b'250-AUTH PLAIN LOGIN\r\n250-PIPELINING\r\n250 8BITMIME\r\n')
+            elif command == 'STARTTLS' and sink.tls_context is not None and not secure:
+                self.reply('220 2.0.0 Ready to start TLS')
+                # Reprise de la session sur le socket chiffré (RFC 3207 : l'état SMTP repart de zéro)
+                self.request = sink.tls_context.wrap_socket(self.request, server_side=True)
+                self.rfile = self.request.makefile('rb')
+                self.wfile = self.request.makefile('wb', buffering=0)
+                sender, recipients, secure = None, [], True
+                sink._count('tls_sessions')
+            elif command == 'AUTH':
+                mechanism = argument.split(' ')[0].upper()
+                if mechanism == 'LOGIN':
+                    # Identifiant puis mot de passe, acceptés sans vérification
+                    for prompt in ('334 VXNlcm5hbWU6', '334 UGFzc3dvcmQ6'):
+                        self.reply(prompt)
+                        self.rfile.readline(65536)
+                elif mechanism == 'PLAIN' and ' ' not in argument:
+                    self.reply('334 ')
+                    self.rfile.readline(65536)
+                self.reply('235 2.7.0 Authentication successful')
+            elif command == 'MAIL':
+                sender, recipients = argument.partition(':')[2].strip().strip('<>'), []
+                self.reply('250 OK')
+            elif command == 'RCPT':
+                recipients.append(argument.partition(':')[2].strip().strip('<>'))
+                self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                while True:
+                    data = self.rfile.readline(1 << 20)
+                    if not data or data == b'.\r\n':
+                        break
+                    # Dot-stuffing (RFC 5321, 4.5.2)
+                    lines.append(data[1:] if data.startswith(b'..') else data)
+                sink._record(sender, recipients, b''.join(lines))
+                sender, recipients = None, []
+                self.reply('250 OK queued')
+            elif command == 'RSET':
+                sender, recipients = None, []
+                self.reply('250 OK')
+            elif command == 'NOOP':
+                self.reply('250 OK')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class _ThreadingSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPSink:
+    """Serveur SMTP local qui enregistre les messages reçus (tests et benchmarks de l'envoi d'alertes)"""
+
+    def __init__(self, host='127.0.0.1', port=0, keep_messages=True, starttls=False, certfile=None, keyfile=None):
+        self.address = (host, port)
+        self.keep_messages = keep_messages
+        # STARTTLS optionnel ; sans certificat fourni, un certificat auto-signé est généré au démarrage
+        self.starttls = starttls
+        self.certfile = certfile
+        self.keyfile = keyfile
+        self.tls_context = None
+        # (instant de réception, expéditeur, destinataires, message brut)
+        self.messages = []
+        self.received = 0
+        self.connections = 0
+        self.tls_sessions = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _record(self, sender, recipients, data):
+        with self._lock:
+            self.received += 1
+            if self.keep_messages:
+                self.messages.append((time.time(), sender, recipients, data))
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def start(self):
+        if self.starttls:
+            if self.certfile is None:
+                self.certfile, self.keyfile = self_signed_certificate(tempfile.mkdtemp(prefix='chicha_smtp_sink_'))
+            self.tls_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            self.tls_context.load_cert_chain(self.certfile, self.keyfile)
+        self._server = _ThreadingSMTPServer(self.address, _SMTPHandler)
+        self._server.sink = self
+        threading.Thread(target=self._server.serve_forever, name='smtp-sink', daemon=True).start()
+        logging.info(f"SMTP sink listening on {self._server.server_address[0]}:{self.port}")
+        return self
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+    parser = argparse.ArgumentParser(description='Puits SMTP local pour tester les alertes')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=2525)
+    parser.add_argument('--starttls', action='store_true', help='Annonce STARTTLS (certificat auto-signé par défaut)')
+    parser.add_argument('--certfile')
+    parser.add_argument('--keyfile')
+    args = parser.parse_args()
+
+    sink = SMTPSink(args.host, args.port, starttls=args.starttls, certfile=args.certfile, keyfile=args.keyfile).start()
+    if sink.starttls:
+        print(f"Certificat STARTTLS (EMAIL_SMTP_CAFILE) : {sink.certfile}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sink.close()
+        print(f"{sink.received} message(s) reçu(s) sur {sink.connections} connexion(s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+
+import smtplib
+import ssl
+import time
+import logging
+import threading
+
+
+class SMTPTransport:
+    """Connexion SMTP authentifiée conservée entre deux envois
+
+    Partagée par ChichaStoreMonitoring et EmailMonitoring : STARTTLS et login ne
+    sont payés qu'à la première connexion (ou après une coupure), pas à chaque email.
+    """
+
+    def __init__(self, server, port, username, password, use_starttls=True,
+                 timeout=10, idle_check=30, max_idle=240, cafile=None):
+        self.server = server
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_starttls = use_starttls
+        self.timeout = timeout
+        # Au-delà de idle_check secondes sans envoi, la session est vérifiée par NOOP
+        self.idle_check = idle_check
+        # Au-delà de max_idle secondes, la session est fermée (les serveurs coupent vers 5 min)
+        self.max_idle = max_idle
+
+        # cafile : autorité supplémentaire (relais interne, puits SMTP local auto-signé)
+        self.context = ssl.create_default_context(cafile=cafile)
+        self._connection = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+
+        # Compteurs exposés pour le suivi de la réutilisation des connexions
+        self.connections_opened = 0
+        self.messages_sent = 0
+
+    def _connect(self):
+        connection = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+        try:
+            connection.ehlo()
+            if self.use_starttls:
+                connection.starttls(context=self.context)
+                connection.ehlo()
+            if self.username and self.password:
+                connection.login(self.username, self.password)
+        except Exception:
+            connection.close()
+            raise
+        self.connections_opened += 1
+        logging.debug(f"SMTP session opened to {self.server}:{self.port}")
+        return connection
+
+    def _is_alive(self, connection):
+        try:
+            return connection.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _session(self):
+        """Session prête à l'emploi : réutilisée, vérifiée par NOOP ou rouverte"""
+        connection = self._connection
+        idle = time.monotonic() - self._last_used
+        if connection is not None:
+            if idle > self.max_idle:
+                self._close_connection()
+            elif idle > self.idle_check and not self._is_alive(connection):
+                logging.info("Stale SMTP session detected, reconnecting")
+                self._close_connection()
+        if self._connection is None:
+            self._connection = self._connect()
+        return self._connection
+
+    def _close_connection(self):
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        try:
+            connection.quit()
+        except (smtplib.SMTPException, OSError):
+            connection.close()
+
+    def send(self, message, sender, recipients):
+        """Envoi d'un message, avec une reconnexion transparente si la session est tombée"""
+        return self.send_batch([(message, sender, recipients)]) == 1
+
+    def send_batch(self, messages):
+        """Envoi d'une série de (message, expéditeur, destinataires) sur une seule connexion
+
+        Retourne le nombre de messages acceptés. Une coupure en cours de lot
+        provoque une seule reconnexion ; les erreurs persistantes sont remontées.
+        """
+        sent = 0
+        with self._lock:
+            for message, sender, recipients in messages:
+                payload = message if isinstance(message, str) else message.as_string()
+                for attempt in (1, 2):
+                    connection = self._session()
+                    try:
+                        connection.sendmail(sender, recipients, payload)
+                        break
+                    except (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError) as e:
+                        # Session coupée côté serveur : on retente une fois sur une connexion neuve
+                        self._close_connection()
+                        if attempt == 2:
+                            raise
+                        logging.info(f"SMTP session lost ({e}), reconnecting")
+                self._last_used = time.monotonic()
+                self.messages_sent += 1
+                sent += 1
+        return sent
+
+    def close(self):
+        with self._lock:
+            self._close_connection()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_transports = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport(server, port, username, password, **options):
+    """Transport partagé par processus pour un même serveur et un même compte"""
+    key = (server, port, username)
+    with _transports_lock:
+        transport = _transports.get(key)
+        if transport is None or transport.password != password:
+            if transport is not None:
+                transport.close()
+            transport = SMTPTransport(server, port, username, password, **options)
+            _transports[key] = transport
+        return transport
+
+
+def close_all():
+    """Fermeture des sessions ouvertes (arrêt du daemon)"""
+    with _transports_lock:
+        for transport in _transports.values():
+            transport.close()
+        _transports.clear()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+import importlib
+
+# Début du chargement des modules de monitoring (référence du profil de démarrage)
+STARTED = time.perf_counter()
+
+# Profil : durée de chaque import différé et de chaque lecture de configuration
+IMPORT_TIMES = {}
+CONFIG_TIMES = {}
+
+
+def deferred_import(name):
+    """Import au premier besoin ; le coût est enregistré pour le profil de démarrage"""
+    module = sys.modules.get(name)
+    if module is None:
+        started = time.perf_counter()
+        module = importlib.import_module(name)
+        IMPORT_TIMES[name] = time.perf_counter() - started
+    return module
+
+
+def load_env_file(path, override=False):
+    """Équivalent de load_dotenv ; python-dotenv n'est importé que si le fichier existe
+
+    Le fichier est relu à chaque démarrage, sans cache : il contient le mot de passe
+    SMTP et la configuration de livraison des alertes.
+    """
+    started = time.perf_counter()
+    if os.path.exists(path):
+        for name, value in deferred_import('dotenv').dotenv_values(path).items():
+            if value is not None and (override or name not in os.environ):
+                os.environ[name] = value
+    CONFIG_TIMES[path] = time.perf_counter() - started
+
+
+def parse_targets(value):
+    """Liste « nom=valeur,nom=valeur » (MONITORING_PROBE_URLS, CHECK_INTERVALS, CHECK_TIMEOUTS)"""
+    targets = []
+    for item in value.split(','):
+        name, _, target = item.strip().partition('=')
+        if name and target:
+            targets.append((name, target))
+    return targets
+
+
+def profile_report(phases, started=STARTED):
+    """Profil de démarrage : phases mesurées, imports différés et lectures de configuration"""
+    lines = ['⏱️ Profil de démarrage (ms):']
+    for name, duration in phases:
+        lines.append(f"- {name}: {duration * 1000:.1f}")
+    for name, duration in sorted(IMPORT_TIMES.items(), key=lambda item: item[1], reverse=True):
+        lines.append(f"- import {name}: {duration * 1000:.1f}")
+    for path, duration in CONFIG_TIMES.items():
+        lines.append(f"- config {path}: {duration * 1000:.1f}")
+    lines.append(f"- total: {(time.perf_counter() - started) * 1000:.1f}")
+    return '\n'.join(lines)
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from http_probes import ProbeEngine
+
+
+class JourneyStep:
+    """Étape d'un parcours : requête, statuts attendus, SLO de latence et poids
+
+    `weight` est le nombre de requêtes de l'étape par exécution du parcours. Lecture seule
+    après construction, comme CheckResult (classe à __slots__, sans dataclasses).
+    """
+
+    __slots__ = ('name', 'method', 'path', 'expected_status', 'slo_ms', 'weight', 'authenticated')
+
+    def __init__(self, name, method, path, expected_status=(200,), slo_ms=500, weight=1, authenticated=True):
+        assign = object.__setattr__
+        assign(self, 'name', name)
+        assign(self, 'method', method)
+        assign(self, 'path', path)
+        assign(self, 'expected_status', tuple(expected_status))
+        assign(self, 'slo_ms', slo_ms)
+        assign(self, 'weight', weight)
+        assign(self, 'authenticated', authenticated)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"JourneyStep is read-only ({name})")
+
+    def __repr__(self):
+        return (f"JourneyStep(name={self.name!r}, method={self.method!r}, path={self.path!r}, "
+                f"slo_ms={self.slo_ms!r}, weight={self.weight!r})")
+
+
+# Parcours par défaut construit à partir de backend/routes
+DEFAULT_JOURNEY = (
+    JourneyStep('products', 'GET', '/api/products', slo_ms=400, weight=3, authenticated=False),
+    JourneyStep('my_orders', 'GET', '/api/orders/my-orders', slo_ms=600, weight=2),
+    JourneyStep('mobile_providers', 'GET', '/api/mobile-payments/providers', slo_ms=300),
+    # Sans commande de référence, un 404 prouve que la route et l'authentification répondent
+    JourneyStep('mobile_status', 'GET', '/api/mobile-payments/status', expected_status=(200, 404), slo_ms=500),
+)
+LOGIN_STEP = JourneyStep('login', 'POST', '/api/auth/login', slo_ms=800, authenticated=False)
+
+
+class TokenCache:
+    """Jeton JWT partagé entre les exécutions ; un seul login à la fois"""
+
+    def __init__(self, lifetime=3300):
+        # Les jetons du backend expirent après 1 h : on les renouvelle 5 min avant
+        self.lifetime = lifetime
+        self.token = None
+        self.expires_at = 0.0
+        # Après un échec de login, pas de nouvelle tentative avant retry_at
+        self.retry_at = 0.0
+        self.lock = threading.Lock()
+
+    def valid(self):
+        return self.token is not None and time.monotonic() < self.expires_at
+
+    def store(self, token):
+        self.token = token
+        self.expires_at = time.monotonic() + self.lifetime
+
+    def invalidate(self, token):
+        with self.lock:
+            if self.token == token:
+                self.token = None
+
+
+def _percentile(ordered, percent):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round((len(ordered) - 1) * percent / 100)))]
+
+
+class SyntheticRunner:
+    """Exécution concurrente du parcours synthétique avec SLO par étape"""
+
+    def __init__(self, base_url, email, password, steps=DEFAULT_JOURNEY, concurrency=4, timeout=5):
+        self.base_url = base_url.rstrip('/')
+        self.email = email
+        self.password = password
+        self.steps = steps
+        self.tokens = TokenCache()
+        self.engine = ProbeEngine(timeout=timeout, max_workers=concurrency)
+        self.login_samples = []
+
+    def _login(self):
+        """Login uniquement si aucun jeton valide n'est en cache"""
+        with self.tokens.lock:
+            if self.tokens.valid():
+                return self.tokens.token
+            if time.monotonic() < self.tokens.retry_at:
+                return None
+            body = json.dumps({'email': self.email, 'password': self.password})
+            result = self.engine.probe(LOGIN_STEP.name, self.base_url + LOGIN_STEP.path, method='POST',
+                                       body=body, headers={'Content-Type': 'application/json'},
+                                       keep_body=True)
+            self.login_samples.append(result)
+            try:
+                if result['status_code'] != 200:
+                    raise ValueError(result.get('error') or result['status_code'])
+                self.tokens.store(json.loads(result['body'])['token'])
+            except (ValueError, KeyError):
+                self.tokens.retry_at = time.monotonic() + 60
+                return None
+            return self.tokens.token
+
+    def _execute(self, step):
+        headers = {}
+        token = None
+        if step.authenticated:
+            token = self._login()
+            if token is None:
+                return {'status_code': None, 'total': None, 'error': 'login failed'}
+            headers['Authorization'] = f'Bearer {token}'
+        result = self.engine.probe(step.name, self.base_url + step.path, method=step.method, headers=headers)
+        if result['status_code'] == 401 and token is not None:
+            # Jeton révoqué ou expiré côté serveur : nouveau login à la prochaine étape
+            self.tokens.invalidate(token)
+        return result
+
+    def run(self, iterations=1):
+        """Exécute le parcours `iterations` fois ; retourne le bilan par étape"""
+        self.login_samples = []
+        work = [step for _ in range(iterations) for step in self.steps for _ in range(step.weight)]
+        futures = [(step, self.engine.submit(self._execute, step)) for step in work]
+
+        samples = {step.name: [] for step in self.steps}
+        for step, future in futures:
+            samples[step.name].append(future.result())
+        summary = [self._summarize(LOGIN_STEP, self.login_samples)] if self.login_samples else []
+        summary.extend(self._summarize(step, samples[step.name]) for step in self.steps)
+        return summary
+
+    def _summarize(self, step, results):
+        latencies = sorted(r['total'] * 1000 for r in results if r['total'] is not None)
+        failures = [r for r in results if r['status_code'] not in step.expected_status]
+        p95 = _percentile(latencies, 95)
+        return {
+            'step': step.name,
+            'path': f"{step.method} {step.path}",
+            'requests': len(results),
+            'failures': len(failures),
+            'errors': sorted({str(r.get('error') or r['status_code']) for r in failures}),
+            'p50_ms': _percentile(latencies, 50),
+            'p95_ms': p95,
+            'max_ms': latencies[-1] if latencies else None,
+            'slo_ms': step.slo_ms,
+            'slo_breached': p95 is not None and p95 > step.slo_ms,
+            'ok': not failures and (p95 is None or p95 <= step.slo_ms)
+        }
+
+    def close(self):
+        self.engine.close()
+
+
+class StandInAPIHandler(BaseHTTPRequestHandler):
+    """Stand-in local des routes du parcours (CI, tests hors ligne)"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    token = 'standin-token'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorized(self):
+        return self.headers.get('Authorization') == f'Bearer {self.token}'
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        credentials = json.loads(self.rfile.read(length) or b'{}')
+        if urlsplit(self.path).path == '/api/auth/login' and credentials.get('email'):
+            self._reply(200, {'token': self.token, 'userId': 'standin', 'username': 'monitoring'})
+        else:
+            self._reply(400, {'message': 'Utilisateur non trouvé'})
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == '/api/health':
+            self._reply(200, {'status': 'healthy'})
+        elif path == '/api/products':
+            self._reply(200, [{'_id': '1', 'name': 'Chicha Standard', 'price': 49.9}])
+        elif not self._authorized():
+            self._reply(401, {'error': 'Veuillez vous authentifier.'})
+        elif path == '/api/orders/my-orders':
+            self._reply(200, [])
+        elif path == '/api/mobile-payments/providers':
+            self._reply(200, {'message': 'Opérateurs mobile money disponibles', 'providers': ['orange', 'mtn']})
+        elif path == '/api/mobile-payments/status':
+            self._reply(404, {'error': 'Commande non trouvée'})
+        else:
+            self._reply(404, {'error': 'Not found'})
+
+
+def start_standin():
+    """Démarre le stand-in sur un port libre ; retourne (serveur, url de base)"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInAPIHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+    parser = argparse.ArgumentParser(description='Parcours synthétiques de l\'API Chicha Store')
+    parser.add_argument('--base-url', default=os.getenv('SYNTHETIC_BASE_URL', 'http://localhost:5000'))
+    parser.add_argument('--iterations', type=int, default=int(os.getenv('SYNTHETIC_ITERATIONS', 1)))
+    parser.add_argument('--concurrency', type=int, default=int(os.getenv('SYNTHETIC_CONCURRENCY', 4)))
+    parser.add_argument('--standin', action='store_true', help='Exécution contre le stand-in local intégré')
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if args.standin:
+        server, base_url = start_standin()
+
+    runner = SyntheticRunner(base_url, os.getenv('SYNTHETIC_EMAIL', 'monitoring@chicha-store.com'),
+                             os.getenv('SYNTHETIC_PASSWORD', ''), concurrency=args.concurrency)
+    try:
+        summary = runner.run(args.iterations)
+    finally:
+        runner.close()
+        if server is not None:
+            server.shutdown()
+
+    for step in summary:
+        status = '✅' if step['ok'] else '❌'
+        p95 = 'N/A' if step['p95_ms'] is None else f"{step['p95_ms']:.0f}"
+        logging.info(f"{status} {step['path']}: {step['requests']} req, {step['failures']} échec(s), "
+                     f"p95 {p95} ms (SLO {step['slo_ms']:.0f} ms) {' '.join(step['errors'])}")
+    sys.exit(0 if all(step['ok'] for step in summary) else 1)
+
+
+if __name__ == '__main__':
+    main()
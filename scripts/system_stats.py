@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+
+import os
+from collections import namedtuple
+
+DiskUsage = namedtuple('DiskUsage', 'total used free percent')
+
+
+def disk_usage(path='/'):
+    """Occupation d'un système de fichiers (comme df : l'espace réservé à root ne compte pas comme libre)"""
+    stats = os.statvfs(path)
+    total = stats.f_blocks * stats.f_frsize
+    free = stats.f_bavail * stats.f_frsize
+    used = (stats.f_blocks - stats.f_bfree) * stats.f_frsize
+    available = used + free
+    percent = round(used / available * 100, 1) if available else 0.0
+    return DiskUsage(total, used, free, percent)
+
+
+def load_average():
+    """Charge moyenne sur 1 minute ; /proc/loadavg si getloadavg est indisponible"""
+    try:
+        return os.getloadavg()[0]
+    except (OSError, AttributeError):
+        with open('/proc/loadavg') as f:
+            return float(f.read().split()[0])
+
+
+def usable_cpus():
+    """Cœurs utilisables par ce processus (affinité, limites de cpuset), comme nproc"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return os.cpu_count() or 1
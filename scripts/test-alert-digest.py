@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import logging
+import tempfile
+from datetime import datetime, timedelta
+
+DIRECTORY = tempfile.mkdtemp(prefix='chicha_digest_test_')
+# Configuration isolée, lue à l'import du moniteur : états temporaires, aucun seuil système atteignable
+os.environ.update({
+    'MONITORING_ENV_FILE': os.path.join(DIRECTORY, 'absent.env'),
+    'MONITORING_STATE_FILE': os.path.join(DIRECTORY, 'state.json'),
+    'MONITORING_HISTORY_DIR': os.path.join(DIRECTORY, 'history'),
+    'ALERT_SPOOL_DIR': os.path.join(DIRECTORY, 'spool'),
+    'SEND_LIMITS_STATE_FILE': os.path.join(DIRECTORY, 'send_limits.json'),
+    'EMAIL_SMTP_SERVER': '127.0.0.1',
+    'EMAIL_SMTP_PORT': '2525',
+    'EMAIL_SENDER': 'monitoring@chicha-store.test',
+    'ADMIN_EMAILS': 'admin@chicha-store.test',
+    'MONITORING_WEBSITE_URL': 'http://127.0.0.1:9/',
+    'MONITORING_METRICS_PORT': '0',
+    'ANOMALY_DETECTION': 'false',
+    'DISK_SPACE_WARNING_THRESHOLD': '101',
+    'DISK_SPACE_CRITICAL_THRESHOLD': '101',
+    'SYSTEM_LOAD_WARNING_THRESHOLD': '100000',
+    'SYSTEM_LOAD_CRITICAL_THRESHOLD': '100000',
+})
+
+from advanced_monitoring import ChichaStoreMonitoring, SystemSnapshot  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+
+
+class CannedMonitoring(ChichaStoreMonitoring):
+    """Moniteur aux checks simulés : OOM kill, parcours et routes backend en échec à la demande"""
+
+    def __init__(self):
+        self.failing = False
+        self.now = datetime(2026, 10, 17, 10, 0)
+        self.sent = []
+        super().__init__()
+
+    def collect_snapshot(self):
+        return SystemSnapshot.from_results(self.checks.run(self.cycle_timeout), self.now, 0.0)
+
+    def generate_system_report(self, snapshot=None):
+        # Seul l'en-tête du digest (conditions notifiées) est vérifié
+        return ''
+
+    def send_email_alert(self, subject, body):
+        self.sent.append((subject, body))
+        return True
+
+    def check_website_status(self):
+        return {'status_code': 200, 'is_online': True, 'response_time': 0.01, 'local_server': True}
+
+    def check_endpoints(self):
+        return {'probes': [], 'failing': []}
+
+    def check_docker_containers(self):
+        return {'total_containers': 4, 'running_containers': 4, 'missing_services': [], 'unhealthy': []}
+
+    def check_container_resources(self):
+        sample = {'cpu_percent': 1.0, 'memory_bytes': 1 << 20, 'oom_kills_total': 1,
+                  'new_oom_kills': 1 if self.failing else 0}
+        return {'containers': {'chicha-store-backend': sample}}
+
+    def check_journeys(self):
+        steps = [{'step': 'login', 'p95_ms': 900.0, 'ok': not self.failing}]
+        return {'steps': steps, 'failing': ['login'] if self.failing else [], 'fresh': True}
+
+    def check_backend_metrics(self):
+        regressions = [{'group': 'GET /api/orders', 'kind': 'errors'}] if self.failing else []
+        return {'http': {}, 'database': {}, 'regressions': regressions}
+
+    def check_processes(self):
+        return {'services': {}, 'restarts': {}}
+
+    def cycle(self, minutes, failing):
+        self.now += timedelta(minutes=minutes)
+        self.failing = failing
+        sent = len(self.sent)
+        self.check_and_alert()
+        return self.sent[sent:]
+
+
+def main():
+    failures = []
+    monitoring = CannedMonitoring()
+
+    # Trois conditions critiques au même cycle : un seul email
+    sent = monitoring.cycle(0, failing=True)
+    if len(sent) != 1:
+        failures.append(f"first cycle: {len(sent)} email(s) instead of 1")
+    elif not all(title in sent[0][1] for title in ('OOM KILL', 'PARCOURS SYNTHÉTIQUES', 'ERREURS BACKEND')):
+        failures.append(f"first cycle digest: {sent[0][1].splitlines()[:6]}")
+
+    # Conditions toujours actives : rien de renvoyé avant le rappel
+    sent = monitoring.cycle(1, failing=True)
+    if sent:
+        failures.append(f"still firing: re-notified {[subject for subject, _ in sent]}")
+
+    # Retour à la normale : les résolutions attendent la fenêtre du digest
+    sent = monitoring.cycle(1, failing=False)
+    if sent:
+        failures.append(f"resolution sent immediately: {[subject for subject, _ in sent]}")
+    sent = monitoring.cycle(16, failing=False)
+    resolved = sum(line.count('RÉSOLU') for _, body in sent for line in body.splitlines())
+    if len(sent) != 1 or resolved != 3:
+        failures.append(f"resolution digest: {len(sent)} email(s), {resolved} RÉSOLU line(s)")
+
+    monitoring.spool.close()
+    monitoring.close_clients()
+
+    for failure in failures:
+        logging.error(f"❌ {failure}")
+    if not failures:
+        logging.info("✅ Digest des alertes conforme (un email par cycle, pas de renvoi, résolutions groupées)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
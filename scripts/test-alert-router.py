@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import logging
+import tempfile
+import subprocess
+from datetime import datetime, timedelta
+
+from alert_router import AlertRouter
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+
+ROUTER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'alert_router.py')
+
+
+def subjects(digests):
+    return [entry['subject'] for digest in digests for entry in digest.entries()]
+
+
+def cli(environment, state, *args):
+    """Appel du routeur comme le font monitoring.sh et advanced-monitoring.sh ; lignes affichées"""
+    output = subprocess.run([sys.executable, ROUTER, '--state', state, *args], env=environment,
+                            capture_output=True, text=True, check=True).stdout
+    return [line.split('\t') for line in output.splitlines()]
+
+
+def main():
+    failures = []
+    start = datetime(2026, 10, 17, 10, 0)
+    minutes = lambda count: start + timedelta(minutes=count)
+
+    # Critique : dû immédiatement ; avertissement : attend la fin de sa fenêtre de 15 minutes
+    router = AlertRouter()
+    router.add('site', '🚨 SITE INACCESSIBLE', start, 'CRITICAL')
+    router.add('disk', '🚨 ESPACE DISQUE - WARNING', start, 'WARNING', 82)
+    if subjects(router.due(start)) != ['🚨 SITE INACCESSIBLE']:
+        failures.append(f"immediate window: {subjects(router.due(start))}")
+    router.clear(router.due(start))
+
+    # Avertissement résolu dans la même fenêtre : le déclenchement reste, la résolution s'ajoute
+    router.add('disk', '✅ RÉSOLU - ESPACE DISQUE', minutes(5), 'RESOLVED')
+    if router.due(minutes(14)):
+        failures.append(f"digest window sent early: {subjects(router.due(minutes(14)))}")
+    due = router.due(minutes(15))
+    if sorted(subjects(due)) != ['✅ RÉSOLU - ESPACE DISQUE', '🚨 ESPACE DISQUE - WARNING']:
+        failures.append(f"warning resolved within the window collapsed: {subjects(due)}")
+    router.clear(due)
+
+    # Aggravation : l'entrée passe dans la fenêtre immédiate avec son compteur et sa première occurrence
+    router.add('load', '🚨 CHARGE - WARNING', minutes(20), 'WARNING', 75)
+    router.add('load', '🚨 CHARGE - CRITICAL', minutes(21), 'CRITICAL', 95)
+    entries = router.entries(router.due(minutes(21)))
+    if len(entries) != 1 or entries[0]['count'] != 2 or entries[0]['first_seen'] != minutes(20) \
+            or entries[0]['peak'] != 95:
+        failures.append(f"escalation: {entries}")
+
+    # Acquittement borné : une condition répétée après le rendu reste en attente
+    router.add('load', '🚨 CHARGE - CRITICAL', minutes(22), 'CRITICAL', 96)
+    router.acknowledge(0, minutes(21))
+    if subjects(router.due(minutes(22))) != ['🚨 CHARGE - CRITICAL']:
+        failures.append(f"acknowledge dropped a newer occurrence: {subjects(router.due(minutes(22)))}")
+
+    # Aller-retour JSON de l'état (exécutions cron successives)
+    reloaded = AlertRouter()
+    reloaded.load_state(json.loads(json.dumps(router.to_state())))
+    if reloaded.to_state() != router.to_state() or subjects(reloaded.due(minutes(22))) != ['🚨 CHARGE - CRITICAL']:
+        failures.append(f"state round-trip: {reloaded.to_state()}")
+
+    # CLI des scripts shell : envoi dû répété tant qu'il n'est pas acquitté, plus rien après ack
+    directory = tempfile.mkdtemp(prefix='chicha_router_test_')
+    environment = dict(os.environ, SEND_LIMITS_STATE_FILE=os.path.join(directory, 'send_limits.json'))
+    state = os.path.join(directory, 'router.json')
+    routed = cli(environment, state, 'route', 'site', 'critical', '🚨 SITE INACCESSIBLE')
+    if len(routed) != 1 or routed[0][1:] != ['critical', '🚨 SITE INACCESSIBLE']:
+        failures.append(f"cli route: {routed}")
+    elif len(cli(environment, state, 'flush')) != 1:
+        failures.append('cli: an unacknowledged delivery should be printed again')
+    else:
+        cli(environment, state, 'ack', routed[0][0])
+        if cli(environment, state, 'flush'):
+            failures.append('cli: acknowledged delivery printed again')
+
+    # Un état par script : les mêmes clés routées par l'autre moniteur ne sont pas touchées
+    other = os.path.join(directory, 'other_router.json')
+    cli(environment, other, 'route', 'disk', 'warning', '🚨 ESPACE DISQUE - WARNING')
+    with open(state) as f:
+        if 'disk' in json.load(f):
+            failures.append('cli: a separate state file received another monitor condition')
+
+    for failure in failures:
+        logging.error(f"❌ {failure}")
+    if not failures:
+        logging.info("✅ Routage des alertes conforme (fenêtres, résolutions, aggravation, ack, état)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+import sys
+import json
+import logging
+
+from alert_rules import (AlertEngine, AlertRule, ESCALATED, FIRING, FIRING_EVENT, FLAPPING, RENOTIFY,
+                         RESOLVED)
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+
+
+def run(engine, rule, values, start=0.0, step=60.0):
+    """Événements successifs d'une série de valeurs, un échantillon par `step` secondes"""
+    return [engine.evaluate(rule, start + index * step, value) for index, value in enumerate(values)]
+
+
+def main():
+    failures = []
+
+    # Hystérésis : entrée à 80, sortie seulement sous 75 ; aggravation à 90
+    rule = AlertRule('disk', 'ESPACE DISQUE', warning=80, critical=90, hysteresis=5, renotify_seconds=0)
+    events = run(AlertEngine(), rule, [70, 81, 77, 79, 76, 92, 88, 74])
+    expected = [None, FIRING_EVENT, None, None, None, ESCALATED, None, RESOLVED]
+    if events != expected:
+        failures.append(f"hysteresis: {events}")
+
+    # Durée minimale : la condition doit tenir for_seconds avant de déclencher
+    rule = AlertRule('load', 'CHARGE', warning=70, critical=90, for_seconds=120, renotify_seconds=0)
+    engine = AlertEngine()
+    events = run(engine, rule, [75, 75, 95, 75])
+    if events != [None, None, FIRING_EVENT, None] or engine.level('load') != 1:
+        failures.append(f"for-duration: {events}, level {engine.level('load')}")
+    # Retour à la normale pendant l'attente : rien n'est notifié, l'attente repart de zéro
+    engine = AlertEngine()
+    events = run(engine, rule, [75, 60, 75, 75])
+    if events != [None, None, None, None] or engine.states['load'].since != 120:
+        failures.append(f"for-duration: pending condition should restart after a normal sample ({events})")
+
+    # Rappel périodique d'une alerte qui reste active
+    rule = AlertRule('site', 'SITE', critical=1, renotify_seconds=3600)
+    events = run(AlertEngine(), rule, [1] * 8, step=900)
+    if events != [FIRING_EVENT, None, None, None, RENOTIFY, None, None, None]:
+        failures.append(f"renotify: {events}")
+
+    # Instabilité : au 4e basculement en une heure, les notifications sont suspendues
+    rule = AlertRule('flap', 'INSTABLE', critical=1, renotify_seconds=0, flap_threshold=4, flap_window=3600)
+    engine = AlertEngine()
+    events = run(engine, rule, [1, 0, 1, 0, 1, 0], step=60)
+    if events != [FIRING_EVENT, RESOLVED, FIRING_EVENT, FLAPPING, None, None]:
+        failures.append(f"flapping: {events}")
+    # Stable pendant flap_window : l'état stabilisé est annoncé une seule fois
+    settled = [engine.evaluate(rule, 300 + 60 * index, 0) for index in range(1, 62)]
+    if [event for event in settled if event] != [RESOLVED]:
+        failures.append(f"flapping recovery: {[event for event in settled if event]}")
+
+    # Aller-retour JSON de l'état : une alerte active ne se redéclenche pas après rechargement
+    rule = AlertRule('disk', 'ESPACE DISQUE', warning=80, critical=90, renotify_seconds=3600, flap_threshold=3)
+    engine = AlertEngine()
+    run(engine, rule, [85, 85])
+    reloaded = AlertEngine()
+    reloaded.load_state(json.loads(json.dumps(engine.to_state())), rule.flap_threshold)
+    if reloaded.to_state() != engine.to_state():
+        failures.append(f"load_state: {reloaded.to_state()} != {engine.to_state()}")
+    state = reloaded.states['disk']
+    if state.phase != FIRING or state.transitions.maxlen != 3:
+        failures.append(f"load_state: phase {state.phase}, transitions maxlen {state.transitions.maxlen}")
+    if reloaded.evaluate(rule, 120, 85) is not None or reloaded.evaluate(rule, 180, 95) != ESCALATED:
+        failures.append('load_state: reloaded alert should stay firing and escalate')
+
+    for failure in failures:
+        logging.error(f"❌ {failure}")
+    if not failures:
+        logging.info("✅ Règles d'alerte conformes (hystérésis, durée, rappel, instabilité, état)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import logging
+import tempfile
+
+from alert_spool import AlertSpool
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+
+
+class Outbox:
+    """Livraison simulée : messages reçus, échec tant que `failing` est vrai"""
+
+    def __init__(self):
+        self.delivered = []
+        self.failing = False
+
+    def __call__(self, record):
+        if self.failing:
+            raise ConnectionError('SMTP unavailable')
+        self.delivered.append(record['subject'])
+
+
+def main():
+    directory = tempfile.mkdtemp(prefix='chicha_spool_test_')
+    journal = os.path.join(directory, AlertSpool.JOURNAL_NAME)
+    failures = []
+
+    # Une alerte envoyée, deux en échec : seules ces deux-là restent dans le journal
+    outbox = Outbox()
+    spool = AlertSpool(directory, outbox, base_delay=60)
+    spool.enqueue('🚨 ALERTE 1', 'message 1', 'monitoring@chicha-store.test', ['admin@chicha-store.test'])
+    spool.process_due()
+    outbox.failing = True
+    spool.enqueue('🚨 ALERTE 2', 'message 2', 'monitoring@chicha-store.test', ['admin@chicha-store.test'])
+    spool.enqueue('🚨 ALERTE 3', 'message 3', 'monitoring@chicha-store.test', ['admin@chicha-store.test'])
+    spool.process_due()
+    spool.close()
+
+    # Crash en pleine écriture : le dernier enregistrement est tronqué
+    valid_size = os.path.getsize(journal)
+    with open(journal, 'a', encoding='utf-8') as f:
+        f.write('{"id": "torn", "op": "enqueue", "subject": "🚨 ALER')
+
+    replayed = AlertSpool(directory, Outbox(), base_delay=60)
+    subjects = sorted(record['subject'] for record in replayed.pending.values())
+    if subjects != ['🚨 ALERTE 2', '🚨 ALERTE 3']:
+        failures.append(f"replay after torn record: {subjects}")
+    if os.path.getsize(journal) != valid_size:
+        failures.append(f"torn tail not truncated: {os.path.getsize(journal)} != {valid_size}")
+    attempts = sorted(record['attempts'] for record in replayed.pending.values())
+    if attempts != [0, 1]:
+        failures.append(f"retry count not replayed: {attempts}")
+
+    # Les écritures suivantes repartent de la fin du dernier enregistrement valide
+    replayed.enqueue('🚨 ALERTE 4', 'message 4', 'monitoring@chicha-store.test', ['admin@chicha-store.test'])
+    replayed.close()
+    outbox = Outbox()
+    final = AlertSpool(directory, outbox, base_delay=60)
+    for record in final.pending.values():
+        record['next_attempt'] = 0
+    remaining = final.flush(5)
+    final.close()
+    if sorted(outbox.delivered) != ['🚨 ALERTE 2', '🚨 ALERTE 3', '🚨 ALERTE 4'] or remaining:
+        failures.append(f"delivery after replay: {outbox.delivered}, {remaining} remaining")
+
+    for failure in failures:
+        logging.error(f"❌ {failure}")
+    if not failures:
+        logging.info("✅ Spool d'alertes conforme (rejeu, enregistrement tronqué, reprise des envois)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+import logging
+import tempfile
+import threading
+
+DIRECTORY = tempfile.mkdtemp(prefix='chicha_budget_test_')
+# Configuration isolée, lue à l'import du moniteur : budget de cycle de 2 s
+os.environ.update({
+    'MONITORING_ENV_FILE': os.path.join(DIRECTORY, 'absent.env'),
+    'MONITORING_STATE_FILE': os.path.join(DIRECTORY, 'state.json'),
+    'MONITORING_HISTORY_DIR': os.path.join(DIRECTORY, 'history'),
+    'ALERT_SPOOL_DIR': os.path.join(DIRECTORY, 'spool'),
+    'SEND_LIMITS_STATE_FILE': os.path.join(DIRECTORY, 'send_limits.json'),
+    'EMAIL_SMTP_SERVER': '127.0.0.1',
+    'EMAIL_SMTP_PORT': '2525',
+    'EMAIL_SENDER': 'monitoring@chicha-store.test',
+    'ADMIN_EMAILS': 'admin@chicha-store.test',
+    'MONITORING_WEBSITE_URL': 'http://127.0.0.1:9/',
+    'MONITORING_METRICS_PORT': '0',
+    'MONITORING_CYCLE_TIMEOUT_SECONDS': '2',
+})
+
+from advanced_monitoring import ChichaStoreMonitoring  # noqa: E402
+from check_registry import UNKNOWN  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+
+CHECK_SECONDS = 0.4
+
+
+class SlowMonitoring(ChichaStoreMonitoring):
+    """Moniteur aux checks réseau simulés : 0,4 s chacun, le backend bloqué tant que `stuck` est posé"""
+
+    def __init__(self):
+        self.stuck = threading.Event()
+        self.released = threading.Event()
+        super().__init__()
+
+    def check_website_status(self):
+        time.sleep(CHECK_SECONDS)
+        return {'status_code': 200, 'is_online': True, 'response_time': CHECK_SECONDS, 'local_server': True}
+
+    def check_endpoints(self):
+        time.sleep(CHECK_SECONDS)
+        return {'probes': [], 'failing': []}
+
+    def check_docker_containers(self):
+        time.sleep(CHECK_SECONDS)
+        return {'total_containers': 4, 'running_containers': 4, 'missing_services': [], 'unhealthy': []}
+
+    def check_container_resources(self):
+        time.sleep(CHECK_SECONDS)
+        return {'containers': {}}
+
+    def check_journeys(self):
+        time.sleep(CHECK_SECONDS)
+        return {'steps': [], 'failing': [], 'fresh': True}
+
+    def check_backend_metrics(self):
+        if self.stuck.is_set():
+            self.released.wait(30)
+        time.sleep(CHECK_SECONDS)
+        return {'http': {}, 'database': {}, 'regressions': []}
+
+    def check_processes(self):
+        time.sleep(CHECK_SECONDS)
+        return {'services': {}, 'restarts': {}}
+
+
+def main():
+    failures = []
+    monitoring = SlowMonitoring()
+
+    # Sept checks de 0,4 s : en parallèle, le cycle dure à peine plus qu'un seul check
+    snapshot = monitoring.collect_snapshot()
+    if snapshot.collection_time > 3 * CHECK_SECONDS:
+        failures.append(f"checks not concurrent: cycle took {snapshot.collection_time:.2f}s")
+    if any(result.severity == UNKNOWN for result in snapshot.checks()):
+        failures.append(f"unexpected failures: {[r.name for r in snapshot.checks() if r.severity == UNKNOWN]}")
+
+    # Backend bloqué : le cycle s'arrête au budget, le check est UNKNOWN, les autres sont collectés
+    monitoring.stuck.set()
+    snapshot = monitoring.collect_snapshot()
+    if not 1.9 <= snapshot.collection_time <= 2.5:
+        failures.append(f"cycle budget not enforced: {snapshot.collection_time:.2f}s for a 2s budget")
+    if snapshot.backend.severity != UNKNOWN or snapshot.backend.get('regressions') != []:
+        failures.append(f"stuck check: {snapshot.backend!r} {dict(snapshot.backend.details)}")
+    if snapshot.website.get('is_online') is not True or snapshot.processes.severity == UNKNOWN:
+        failures.append('checks that finished in time were discarded')
+
+    # Cycle suivant : le check toujours bloqué n'est pas relancé dans un second thread
+    stuck_threads = sum(thread.name == 'check-backend' for thread in threading.enumerate())
+    monitoring.collect_snapshot()
+    if sum(thread.name == 'check-backend' for thread in threading.enumerate()) != stuck_threads:
+        failures.append('stuck check started again while its previous run is still blocked')
+    monitoring.released.set()
+
+    monitoring.spool.close()
+    monitoring.close_clients()
+
+    for failure in failures:
+        logging.error(f"❌ {failure}")
+    if not failures:
+        logging.info("✅ Checks concurrents conformes (parallélisme, budget de cycle, check bloqué)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
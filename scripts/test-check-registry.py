@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+import sys
+import time
+import logging
+
+from check_registry import CheckRegistry, CheckResult, NORMAL, WARNING, CRITICAL, UNKNOWN
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+
+
+class Counter:
+    """Check simulé : nombre d'appels, résultat tuple ou dict selon `detailed`"""
+
+    def __init__(self, detailed=False):
+        self.calls = 0
+        self.detailed = detailed
+
+    def __call__(self):
+        self.calls += 1
+        if self.detailed:
+            return {'value': 42.5, 'status': 'WARNING', 'message': 'Disque presque plein', 'free': 12}
+        return self.calls, NORMAL, ''
+
+
+def main():
+    failures = []
+
+    # Résultat typé en lecture seule
+    result = CheckResult('disk', 42.5, '%', WARNING, 0.0012, 'Disque presque plein')
+    try:
+        result.value = 0
+        failures.append('CheckResult attribute modified')
+    except AttributeError:
+        pass
+    if result.status != 'WARNING' or result.to_dict() != {'check': 'disk', 'value': 42.5, 'unit': '%',
+                                                          'severity': 'warning', 'message': 'Disque presque plein',
+                                                          'duration_ms': 1.2}:
+        failures.append(f"to_dict: {result.to_dict()}")
+
+    # Tuple sans détail, dict résumé par `summarize` ; détail en lecture seule accessible par get() et []
+    registry = CheckRegistry()
+    fast, detailed = Counter(), Counter(detailed=True)
+    registry.register('fast', fast, 'appels', inline=True)
+    registry.register('disk', detailed, '%')
+    results = registry.run(5)
+    if results['fast'].value != 1 or results['fast'].details:
+        failures.append(f"tuple result: {results['fast']!r} {dict(results['fast'].details)}")
+    disk = results['disk']
+    if (disk.value, disk.severity, disk.message, disk['free'], disk.get('missing', 'n/a')) != \
+            (42.5, WARNING, 'Disque presque plein', 12, 'n/a'):
+        failures.append(f"summarized result: {disk!r}")
+    try:
+        disk.details['free'] = 0
+        failures.append('check details modified')
+    except TypeError:
+        pass
+
+    # Intervalle propre : un check non dû garde son dernier résultat, sans nouvel appel
+    registry.configure(intervals={'disk': 3600, 'unknown': 1})
+    registry.run(5)
+    results = registry.run(5)
+    if detailed.calls != 2 or fast.calls != 3 or results['disk'] is not registry.plugins['disk'].last:
+        failures.append(f"intervals: disk called {detailed.calls} time(s), fast {fast.calls} time(s)")
+
+    # Exception dans un check : résultat UNKNOWN avec le détail de substitution, les autres checks continuent
+    def broken():
+        raise OSError('socket Docker introuvable')
+
+    registry = CheckRegistry(lambda name, error: {'error': error, 'running_containers': 0})
+    registry.register('docker', broken, 'conteneurs')
+    registry.register('fast', Counter(), 'appels')
+    results = registry.run(5)
+    docker = results['docker']
+    if docker.severity != UNKNOWN or docker['running_containers'] != 0 or 'introuvable' not in docker.message \
+            or results['fast'].severity != NORMAL:
+        failures.append(f"failed check: {docker!r} {dict(docker.details)}")
+
+    # Délai propre à un check, plus court que le budget du cycle
+    registry = CheckRegistry()
+    registry.register('slow', lambda: time.sleep(1) or (1, CRITICAL, ''), 's', timeout=0.2)
+    started = time.monotonic()
+    results = registry.run(5, names=['slow'])
+    if time.monotonic() - started > 0.8 or results['slow'].severity != UNKNOWN:
+        failures.append(f"per-check timeout: {time.monotonic() - started:.2f}s, {results['slow']!r}")
+
+    for failure in failures:
+        logging.error(f"❌ {failure}")
+    if not failures:
+        logging.info("✅ Registre de checks conforme (résultats typés, résumé, intervalles, erreurs, délais)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
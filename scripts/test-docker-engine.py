@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import logging
+import tempfile
+import threading
+import socketserver
+from http.server import BaseHTTPRequestHandler
+
+from docker_engine import DockerEngineClient
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+
+# Conteneurs simulés : redis est arrêté, nginx n'a jamais été créé
+FAKE_CONTAINERS = [
+    {'Id': 'a1', 'Names': ['/chicha-store-backend'], 'Image': 'chichastore/backend',
+     'State': 'running', 'Status': 'Up 2 hours (healthy)'},
+    {'Id': 'b2', 'Names': ['/chicha-store-mongodb'], 'Image': 'mongo:latest',
+     'State': 'running', 'Status': 'Up 2 hours (unhealthy)'},
+    {'Id': 'c3', 'Names': ['/chicha-store-redis'], 'Image': 'redis:alpine',
+     'State': 'exited', 'Status': 'Exited (137) 5 minutes ago'},
+]
+
+
+class FakeEngineHandler(BaseHTTPRequestHandler):
+    """Stand-in minimal de l'API Docker Engine (HTTP/1.1 keep-alive)"""
+    protocol_version = 'HTTP/1.1'
+    containers = FAKE_CONTAINERS
+    samples = {}
+    connections = set()
+
+    def address_string(self):
+        return 'docker.sock'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        FakeEngineHandler.connections.add(id(self.connection))
+        if self.path.startswith('/containers/json'):
+            payload = FakeEngineHandler.containers
+        elif self.path.startswith('/containers/') and '/stats' in self.path:
+            container_id = self.path.split('/')[2]
+            sample = FakeEngineHandler.samples.get(container_id, 0) + 1
+            FakeEngineHandler.samples[container_id] = sample
+            payload = {
+                'cpu_stats': {
+                    'cpu_usage': {'total_usage': sample * 50_000_000},
+                    'system_cpu_usage': sample * 1_000_000_000,
+                    'online_cpus': 2
+                },
+                'memory_stats': {'usage': 300 * 1024 * 1024, 'limit': 1024 ** 3,
+                                 'stats': {'inactive_file': 100 * 1024 * 1024}}
+            }
+        else:
+            self.send_error(404)
+            return
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeEngineServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def main():
+    socket_path = os.path.join(tempfile.mkdtemp(), 'docker.sock')
+    server = FakeEngineServer(socket_path, FakeEngineHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    client = DockerEngineClient(socket_path)
+    expected = ['chicha-store-backend', 'chicha-store-mongodb', 'chicha-store-redis', 'chicha-store-nginx']
+    first = client.collect(expected)
+    second = client.collect(expected)
+    # Aucun conteneur (Docker redémarré, stack arrêtée) : tous les services attendus sont absents
+    FakeEngineHandler.containers = []
+    empty = client.collect(expected)
+    client.close()
+    server.shutdown()
+
+    failures = []
+    if second['total_containers'] != 3 or second['running_containers'] != 2:
+        failures.append(f"container counts: {second['total_containers']}/{second['running_containers']}")
+    if second['missing_services'] != ['chicha-store-redis', 'chicha-store-nginx']:
+        failures.append(f"missing services: {second['missing_services']}")
+    if second['unhealthy'] != ['chicha-store-mongodb']:
+        failures.append(f"unhealthy: {second['unhealthy']}")
+    if first['stats']['chicha-store-backend']['cpu_percent'] is not None:
+        failures.append('first sample should have no CPU delta')
+    backend = second['stats']['chicha-store-backend']
+    if abs(backend['cpu_percent'] - 10.0) > 1e-6 or backend['memory_bytes'] != 200 * 1024 * 1024:
+        failures.append(f"backend stats: {backend}")
+    if empty['total_containers'] != 0 or empty['running_containers'] != 0:
+        failures.append(f"empty container counts: {empty['total_containers']}/{empty['running_containers']}")
+    if empty['missing_services'] != expected:
+        failures.append(f"empty missing services: {empty['missing_services']}")
+    if empty.get('unhealthy') or empty.get('stats'):
+        failures.append(f"empty list should have no unhealthy container or stats: {empty}")
+    if len(FakeEngineHandler.connections) != 1:
+        failures.append(f"keep-alive not used: {len(FakeEngineHandler.connections)} connections")
+
+    for failure in failures:
+        logging.error(f"❌ {failure}")
+    if not failures:
+        logging.info("✅ Client Docker Engine API conforme")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
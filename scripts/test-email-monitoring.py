@@ -59,8 +59,8 @@ def test_email_configuration():
         """
         message.attach(MIMEText(body, 'plain'))
 
-        # Création du contexte SSL
-        context = ssl.create_default_context()
+        # Création du contexte SSL (EMAIL_SMTP_CAFILE : certificat du puits local smtp_sink.py --starttls)
+        context = ssl.create_default_context(cafile=os.getenv('EMAIL_SMTP_CAFILE'))
 
         # Tentative de connexion et d'envoi
         with smtplib.SMTP(smtp_server, smtp_port) as server:
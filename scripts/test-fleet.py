@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+import signal
+import socket
+import asyncio
+import logging
+import tempfile
+import threading
+
+from alert_rules import AlertRule
+from fleet_agent import FleetAgent
+from fleet_collector import AgentState, FleetAlerter, FleetCollector, serve
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+
+
+def free_address():
+    """Port local libre, sans collecteur à l'écoute"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()
+
+
+class CountingAgent(FleetAgent):
+    """Agent dont les tentatives de connexion sont horodatées"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.attempts = []
+
+    def _connect(self):
+        self.attempts.append(time.monotonic())
+        super()._connect()
+
+
+class SlowAlerter(FleetAlerter):
+    """Évaluation lente (SMTP, disque) : la boucle asyncio doit continuer d'acquitter les lots"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.evaluating = threading.Event()
+
+    def evaluate(self):
+        self.evaluating.set()
+        time.sleep(1.5)
+        super().evaluate()
+        self.evaluating.clear()
+
+
+def acknowledged_during_evaluation(alerter, address, result):
+    """Délai d'acquittement d'un lot envoyé pendant l'évaluation ; le collecteur est ensuite arrêté par SIGTERM"""
+    agent = FleetAgent(address, 'prod', 1)
+    agent.start()
+    if alerter.evaluating.wait(5):
+        started = time.monotonic()
+        agent.add(time.time(), [('disk_percent', 95)])
+        while agent.sent == 0 and time.monotonic() - started < 5:
+            time.sleep(0.01)
+        result.append(time.monotonic() - started)
+    agent.close()
+    os.kill(os.getpid(), signal.SIGTERM)
+
+
+def main():
+    failures = []
+    directory = tempfile.mkdtemp(prefix='chicha_fleet_test_')
+    os.environ.update({
+        'SEND_LIMITS_STATE_FILE': os.path.join(directory, 'send_limits.json'),
+        'SEND_RATE_LIMITS': 'email=1',
+        'EMAIL_SENDER': 'monitoring@chicha-store.test',
+        'ADMIN_EMAILS': 'admin@chicha-store.test',
+    })
+
+    # Collecteur injoignable : les ajouts de l'agent ne raccourcissent pas l'attente de reconnexion
+    agent = CountingAgent(free_address(), 'prod', 1, timeout=1)
+    agent.start()
+    deadline = time.monotonic() + 1.5
+    while time.monotonic() < deadline:
+        agent.add(time.time(), [('disk_percent', 50)])
+        time.sleep(0.02)
+    if len(agent.attempts) != 2:
+        failures.append(f"backoff: {len(agent.attempts)} connection attempt(s) in 1.5 s instead of 2")
+    # L'arrêt, lui, interrompt l'attente
+    started = time.monotonic()
+    agent.close()
+    if time.monotonic() - started > 0.5 or agent._thread.is_alive():
+        failures.append(f"close() waited {time.monotonic() - started:.2f}s for the backoff")
+
+    # Évaluation hors de la boucle : les lots sont acquittés pendant une évaluation lente
+    rule = AlertRule('fleet', 'FLOTTE', warning=1, critical=2)
+    alerter = SlowAlerter(FleetCollector(), 0, os.path.join(directory, 'spool'),
+                          os.path.join(directory, 'state.json'), rule)
+    address, result = free_address(), []
+    threading.Thread(target=acknowledged_during_evaluation, args=(alerter, address, result), daemon=True).start()
+    asyncio.run(serve(alerter.collector, *address, 0.2, alerter))
+    acknowledged = result[0] if result else None
+    if acknowledged is None:
+        failures.append('fleet evaluation never started')
+    elif acknowledged > 1:
+        failures.append(f"batch acknowledged {acknowledged:.2f}s after it was sent, once the evaluation ended")
+    alerter.spool.close()
+
+    # Limites d'envoi : un email par minute, le digest suivant attend ; échec de mise en file remboursé
+    os.environ['SEND_LIMITS_STATE_FILE'] = os.path.join(directory, 'fleet_send_limits.json')
+    collector = FleetCollector(disk_warning=80, disk_critical=90)
+    alerter = FleetAlerter(collector, 0, os.path.join(directory, 'limited_spool'),
+                           os.path.join(directory, 'limited_state.json'), rule)
+    for instance in ('prod', 'staging'):
+        state = collector.agents[instance] = AgentState(instance, 60, 10)
+        state.latest['disk_percent'] = (time.time(), 95.0)
+        alerter.evaluate()
+    if len(alerter.spool.pending) != 1 or not alerter.digest.pending:
+        failures.append(f"send limit: {len(alerter.spool.pending)} queued, {len(alerter.digest.pending)} pending")
+
+    def broken_enqueue(*args):
+        raise OSError('spool full')
+
+    alerter.limiter.configure({'email': 5}, 30, 400)
+    tokens = alerter.limiter.snapshot()['channels']['email']
+    alerter.spool.enqueue = broken_enqueue
+    alerter.evaluate()
+    snapshot = alerter.limiter.snapshot()
+    if abs(snapshot['channels']['email'] - tokens) > 0.5 or not alerter.digest.pending:
+        failures.append(f"refund after a failed enqueue: {snapshot}")
+    alerter.spool.close()
+
+    for failure in failures:
+        logging.error(f"❌ {failure}")
+    if not failures:
+        logging.info("✅ Flotte conforme (attente de reconnexion, évaluation hors boucle, limites d'envoi)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
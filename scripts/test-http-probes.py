@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+import sys
+import socket
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from http_probes import ProbeEngine
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    """Serveur HTTP/1.1 keep-alive ; `drop_after_response` ferme la connexion sans l'annoncer"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def _respond(self):
+        with self.server.lock:
+            self.server.requests.append((self.command, self.path))
+            # Décidé avant la réponse : le client peut changer le réglage dès qu'il l'a reçue
+            drop = self.server.drop_after_response
+        status = 500 if self.path == '/error' else 200
+        body = b'{"status": "ok"}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        if drop:
+            # Délai keep-alive expiré côté serveur : la connexion est fermée après la réponse
+            self.close_connection = True
+
+    def do_GET(self):
+        self._respond()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self._respond()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _KeepAliveHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.requests = []
+    server.drop_after_response = False
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def unused_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    failures = []
+    server = start_server()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    targets = [('home', f"{base}/"), ('health', f"{base}/api/health")]
+    engine = ProbeEngine(timeout=2)
+
+    # Premier cycle : connexions ouvertes ; cycles suivants : mêmes connexions, DNS/TCP non mesurés
+    first = engine.probe_all(targets)
+    opened = server.connections
+    for _ in range(3):
+        results = engine.probe_all(targets)
+    if not all(r['ok'] and not r['reused'] for r in first) or not all(r['ok'] and r['reused'] for r in results):
+        failures.append(f"keep-alive: {[(r['name'], r['ok'], r['reused']) for r in first + results]}")
+    if server.connections != opened or any(r['connect'] for r in results):
+        failures.append(f"keep-alive reopened connections: {opened} -> {server.connections}")
+
+    # Mode cold : une connexion neuve par sonde, temps de connexion mesurés
+    connections = server.connections
+    cold = engine.probe_all(targets, cold=True)
+    if server.connections - connections != 2 or any(r['reused'] or r['total'] is None for r in cold):
+        failures.append(f"cold mode: {server.connections - connections} new connection(s)")
+
+    # Connexion coupée par le serveur entre deux cycles : GET rejoué une fois sur une connexion neuve
+    # (moteurs à une seule connexion en pool, pour que la sonde suivante reprenne celle qui a été coupée)
+    single = ProbeEngine(timeout=2)
+    server.drop_after_response = True
+    single.probe('home', f"{base}/")
+    server.drop_after_response = False
+    result = single.probe('home', f"{base}/")
+    if not result['ok'] or result['reused'] or 'error' in result:
+        failures.append(f"GET on a dropped keep-alive connection: {result}")
+
+    # Même coupure pour un POST : jamais rejoué, l'erreur est remontée
+    single.close()
+    single = ProbeEngine(timeout=2)
+    server.drop_after_response = True
+    single.probe('cart', f"{base}/api/cart", method='POST', body=b'{}')
+    server.drop_after_response = False
+    posts = sum(method == 'POST' for method, _ in server.requests)
+    result = single.probe('cart', f"{base}/api/cart", method='POST', body=b'{}')
+    if 'error' not in result or sum(method == 'POST' for method, _ in server.requests) != posts:
+        failures.append(f"POST replayed on a dropped keep-alive connection: {result}")
+
+    # Statut d'erreur et serveur injoignable
+    if engine.probe('error', f"{base}/error")['ok']:
+        failures.append('HTTP 500 reported as ok')
+    result = engine.probe('down', f"http://127.0.0.1:{unused_port()}/")
+    if result['ok'] or 'error' not in result:
+        failures.append(f"unreachable server: {result}")
+
+    single.close()
+    engine.close()
+    server.shutdown()
+
+    for failure in failures:
+        logging.error(f"❌ {failure}")
+    if not failures:
+        logging.info("✅ Sondes HTTP conformes (keep-alive, mode cold, reprise GET, POST non rejoué)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import gzip
+import socket
+import logging
+import tempfile
+import http.client
+
+DIRECTORY = tempfile.mkdtemp(prefix='chicha_metrics_test_')
+# Configuration isolée, lue à l'import du moniteur
+os.environ.update({
+    'MONITORING_ENV_FILE': os.path.join(DIRECTORY, 'absent.env'),
+    'MONITORING_STATE_FILE': os.path.join(DIRECTORY, 'state.json'),
+    'MONITORING_HISTORY_DIR': os.path.join(DIRECTORY, 'history'),
+    'ALERT_SPOOL_DIR': os.path.join(DIRECTORY, 'spool'),
+    'SEND_LIMITS_STATE_FILE': os.path.join(DIRECTORY, 'send_limits.json'),
+    'EMAIL_SMTP_SERVER': '127.0.0.1',
+    'EMAIL_SMTP_PORT': '2525',
+    'EMAIL_SENDER': 'monitoring@chicha-store.test',
+    'ADMIN_EMAILS': 'admin@chicha-store.test',
+    'MONITORING_WEBSITE_URL': 'http://127.0.0.1:9/',
+    'MONITORING_METRICS_ADDR': '127.0.0.1',
+})
+
+from advanced_monitoring import ChichaStoreMonitoring  # noqa: E402
+from metrics_exporter import MetricsRegistry, MetricsServer  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+
+
+def scrape(port, path='/metrics', compressed=False):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    connection.request('GET', path, headers={'Accept-Encoding': 'gzip'} if compressed else {})
+    response = connection.getresponse()
+    body = response.read()
+    connection.close()
+    if response.getheader('Content-Encoding') == 'gzip':
+        body = gzip.decompress(body)
+    return response.status, response.getheader('Content-Type'), body.decode()
+
+
+def main():
+    failures = []
+
+    # Format d'exposition : échappement des labels, entiers, NaN/Inf, séries None absentes
+    registry = MetricsRegistry()
+    registry.gauge('chicha_monitor_disk_used_percent', 'Root filesystem usage').set(42.0)
+    probes = registry.gauge('chicha_monitor_probe_up', 'HTTP probe success', ('probe',))
+    probes.replace({('home',): 1, ('api "v2"\n',): 0, ('down',): None})
+    registry.gauge('chicha_monitor_website_response_seconds', 'Frontend response time').set(float('nan'))
+    registry.counter('chicha_monitor_empty_total', 'Never set')
+    registry.publish()
+    expected = (
+        "# HELP chicha_monitor_disk_used_percent Root filesystem usage\n"
+        "# TYPE chicha_monitor_disk_used_percent gauge\n"
+        "chicha_monitor_disk_used_percent 42\n"
+        "# HELP chicha_monitor_probe_up HTTP probe success\n"
+        "# TYPE chicha_monitor_probe_up gauge\n"
+        'chicha_monitor_probe_up{probe="home"} 1\n'
+        'chicha_monitor_probe_up{probe="api \\"v2\\"\\n"} 0\n'
+        "# HELP chicha_monitor_website_response_seconds Frontend response time\n"
+        "# TYPE chicha_monitor_website_response_seconds gauge\n"
+        "chicha_monitor_website_response_seconds NaN\n"
+    )
+    if registry.body().decode() != expected:
+        failures.append(f"exposition format:\n{registry.body().decode()}")
+
+    # Familles inchangées : texte en cache réutilisé ; valeur modifiée : seule sa famille est re-rendue
+    cached = probes.text
+    registry.gauge('chicha_monitor_disk_used_percent', 'Root filesystem usage').set(43.5)
+    probes.replace({('home',): 1, ('api "v2"\n',): 0})
+    registry.publish()
+    if probes.text is not cached or 'chicha_monitor_disk_used_percent 43.5\n' not in registry.body().decode():
+        failures.append('unchanged family re-rendered or changed family not published')
+
+    # Endpoint : corps pré-rendu, compressé à la demande, 404 ailleurs
+    server = MetricsServer(registry, '127.0.0.1', 0)
+    server.start()
+    port = server._server.server_address[1]
+    status, content_type, body = scrape(port)
+    if status != 200 or not content_type.startswith('text/plain; version=0.0.4') or body != registry.body().decode():
+        failures.append(f"scrape: {status} {content_type}")
+    if scrape(port, compressed=True)[2] != body:
+        failures.append('gzip scrape differs from the plain body')
+    if scrape(port, '/')[0] != 404:
+        failures.append('non-/metrics path not rejected')
+    server.close()
+
+    # Port déjà occupé : le daemon continue sans /metrics et retente au cycle suivant
+    with socket.socket() as busy:
+        busy.bind(('127.0.0.1', 0))
+        busy.listen()
+        os.environ['MONITORING_METRICS_PORT'] = str(busy.getsockname()[1])
+        monitoring = ChichaStoreMonitoring()
+        monitoring.metrics = MetricsRegistry()
+        try:
+            monitoring.start_metrics_server()
+        except OSError as e:
+            failures.append(f"busy port stopped the daemon: {e}")
+        if monitoring.metrics_server is not None:
+            failures.append('metrics server reported as started on a busy port')
+    monitoring.start_metrics_server()
+    if monitoring.metrics_server is None:
+        failures.append('metrics server not started once the port was released')
+    else:
+        monitoring.metrics_server.close()
+    monitoring.spool.close()
+    monitoring.close_clients()
+
+    for failure in failures:
+        logging.error(f"❌ {failure}")
+    if not failures:
+        logging.info("✅ Export Prometheus conforme (format, cache, gzip, port occupé)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+import logging
+import tempfile
+
+from metrics_history import MetricsHistory, MetricsHistoryReader, SeriesFile
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+
+
+def main():
+    directory = tempfile.mkdtemp(prefix='chicha_history_test_')
+    failures = []
+
+    # Tampon circulaire : au-delà de la capacité, les plus anciens points sont écrasés
+    path = os.path.join(directory, 'ring.ts')
+    series = SeriesFile(path, 5, writable=True)
+    for index in range(8):
+        series.append(1000.0 + index, float(index))
+    points = series.read()
+    if points != [(1000.0 + index, float(index)) for index in range(3, 8)] or len(series) != 5:
+        failures.append(f"wraparound: {points}")
+    if series.read(since=1004, until=1006) != [(1004.0, 4.0), (1005.0, 5.0), (1006.0, 6.0)]:
+        failures.append(f"range read across the wrap: {series.read(since=1004, until=1006)}")
+    series.flush()
+    series.close()
+
+    # Réouverture : en-tête, position d'écriture et points retrouvés tels quels
+    reopened = SeriesFile(path, writable=True)
+    if reopened.capacity != 5 or reopened.read() != points:
+        failures.append(f"reopen: capacity {reopened.capacity}, {reopened.read()}")
+    reopened.append(1008.0, 8.0)
+    if reopened.read()[-2:] != [(1007.0, 7.0), (1008.0, 8.0)] or len(reopened) != 5:
+        failures.append(f"append after reopen: {reopened.read()}")
+
+    # Expiration par âge : seuls les points antérieurs à la borne sont retirés
+    expired = reopened.expire(1006.0)
+    if expired != 2 or reopened.read() != [(1006.0, 6.0), (1007.0, 7.0), (1008.0, 8.0)]:
+        failures.append(f"expire: {expired} removed, {reopened.read()}")
+    if reopened.expire(1000.0) != 0:
+        failures.append('expire before the oldest point should remove nothing')
+    reopened.close()
+
+    # Lecture seule pendant que l'écrivain garde le fichier ouvert
+    if MetricsHistoryReader(directory).read('ring') != [(1006.0, 6.0), (1007.0, 7.0), (1008.0, 8.0)]:
+        failures.append(f"reader: {MetricsHistoryReader(directory).read('ring')}")
+
+    # Rétention par âge, quelle que soit la cadence d'écriture
+    now = time.time()
+    history = MetricsHistory(directory, retention=600, interval=60)
+    for offset in range(0, 1200, 120):
+        history.append('disk_percent', now - 1200 + offset, float(offset))
+    history.close()
+    kept = MetricsHistoryReader(directory).read('disk_percent')
+    if not kept or kept[0][0] < now - 1200 + 1080 - 600 or len(kept) != 6:
+        failures.append(f"age retention: {[round(timestamp - now) for timestamp, _ in kept]}")
+
+    # Intervalle plus court : fichier redimensionné, points encore dans la rétention conservés
+    history = MetricsHistory(directory, retention=600, interval=30)
+    history.append('disk_percent', now, 1200.0)
+    history.close()
+    resized = SeriesFile(os.path.join(directory, 'disk_percent.ts'))
+    retained = [point for point in kept if point[0] > now - 590]
+    if resized.capacity != 21 or resized.read() != retained + [(now, 1200.0)]:
+        failures.append(f"resize: capacity {resized.capacity}, {len(resized.read())} point(s)")
+    resized.close()
+    if os.path.exists(os.path.join(directory, 'disk_percent.ts.tmp')):
+        failures.append('resize left a temporary file behind')
+
+    for failure in failures:
+        logging.error(f"❌ {failure}")
+    if not failures:
+        logging.info("✅ Historique des métriques conforme (tampon circulaire, réouverture, rétention)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+import sys
+import logging
+import contextlib
+from collections import namedtuple
+
+import psutil
+
+import process_sampler
+from process_sampler import ProcessSampler
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+
+MemoryInfo = namedtuple('MemoryInfo', 'rss')
+CpuTimes = namedtuple('CpuTimes', 'user system')
+
+
+class FakeProcess:
+    """Processus simulé : mêmes accesseurs que psutil.Process, NoSuchProcess une fois arrêté"""
+
+    def __init__(self, pid, name, cmdline=(), create_time=1000.0):
+        self.pid = pid
+        self.info = {'pid': pid, 'name': name, 'cmdline': list(cmdline)}
+        self.created = create_time
+        self.alive = True
+
+    def _check(self):
+        if not self.alive:
+            raise psutil.NoSuchProcess(self.pid)
+
+    def oneshot(self):
+        return contextlib.nullcontext()
+
+    def create_time(self):
+        self._check()
+        return self.created
+
+    def memory_info(self):
+        self._check()
+        return MemoryInfo(50 * 1024 * 1024)
+
+    def cpu_times(self):
+        self._check()
+        return CpuTimes(1.0, 0.5)
+
+    def num_threads(self):
+        self._check()
+        return 4
+
+    def num_ctx_switches(self):
+        self._check()
+        return (100, 10)
+
+    def num_fds(self):
+        self._check()
+        return 12
+
+
+class FakeProcessTable:
+    """Table des processus lue par process_iter ; kill() et spawn() simulent arrêts et démarrages"""
+
+    def __init__(self):
+        self.processes = {}
+
+    def spawn(self, pid, name, cmdline=(), create_time=1000.0):
+        self.processes[pid] = FakeProcess(pid, name, cmdline, create_time)
+
+    def kill(self, *pids):
+        for pid in pids:
+            self.processes.pop(pid).alive = False
+
+    def process_iter(self, attrs=None):
+        return list(self.processes.values())
+
+
+def main():
+    failures = []
+    table = FakeProcessTable()
+    process_sampler.psutil.process_iter = table.process_iter
+
+    # nginx : un master et quatre workers ; backend Node et mongod
+    table.spawn(100, 'nginx')
+    for pid in range(101, 105):
+        table.spawn(pid, 'nginx')
+    table.spawn(200, 'node', ['node', 'server.js'])
+    table.spawn(300, 'mongod')
+
+    sampler = ProcessSampler(rescan_interval=3600)
+    result = sampler.sample()
+    nginx = result['services']['nginx']
+    if nginx['processes'] != 5 or result['services']['backend']['processes'] != 1:
+        failures.append(f"discovery: {result['services']}")
+    if any(result['restarts'].values()):
+        failures.append(f"first scan counted restarts: {result['restarts']}")
+
+    # nginx -s reload : les quatre workers sont remplacés en même temps, le master reste
+    table.kill(101, 102, 103, 104)
+    for pid in range(111, 115):
+        table.spawn(pid, 'nginx', create_time=2000.0)
+    sampler.sample()
+    result = sampler.sample()
+    if result['services']['nginx']['processes'] != 5:
+        failures.append(f"reload: workers not rediscovered ({result['services']['nginx']['pids']})")
+    if result['restarts']['nginx'] != 1:
+        failures.append(f"reload of 4 workers counted {result['restarts']['nginx']} restarts instead of 1")
+
+    # Vraie boucle de redémarrage du backend : un nouveau PID à chaque parcours
+    for index, pid in enumerate((201, 202, 203)):
+        table.kill(pid - 1 if index else 200)
+        table.spawn(pid, 'node', ['node', 'server.js'], create_time=3000.0 + index)
+        sampler.sample()
+        result = sampler.sample()
+    if result['restarts']['backend'] != 3:
+        failures.append(f"restart loop: backend counted {result['restarts']['backend']} restarts instead of 3")
+
+    # Exécution cron suivante : mêmes processus, état rechargé, aucun redémarrage supplémentaire
+    reloaded = ProcessSampler(rescan_interval=3600)
+    reloaded.load_state(sampler.to_state())
+    result = reloaded.sample()
+    if result['restarts'] != {'backend': 3, 'mongodb': 0, 'redis': 0, 'nginx': 1}:
+        failures.append(f"state round-trip: {result['restarts']}")
+
+    for failure in failures:
+        logging.error(f"❌ {failure}")
+    if not failures:
+        logging.info("✅ Échantillonneur de processus conforme (découverte, reload multi-workers, redémarrages)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+import sys
+import logging
+
+from prometheus_scraper import HistogramDeltas, bucket_quantile, iter_samples
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+
+NAME = 'http_request_duration_seconds'
+
+
+def exposition(buckets, count, errors=0, route='/api/products'):
+    """Histogramme au format texte Prometheus : cumuls par borne, requêtes 200 et 500"""
+    lines = [f'# TYPE {NAME} histogram']
+    for code, share in (('200', count - errors), ('500', errors)):
+        if not share:
+            continue
+        for le, cumulative in buckets:
+            scaled = cumulative * share / count
+            lines.append(f'{NAME}_bucket{{method="GET",route="{route}",code="{code}",le="{le}"}} {scaled}')
+        lines.append(f'{NAME}_count{{method="GET",route="{route}",code="{code}"}} {share}')
+    return lines
+
+
+def scrape(deltas, lines):
+    prefix = len(NAME)
+    for name, labels, value in iter_samples(lines, (NAME,)):
+        deltas.feed(name[prefix:], labels, value)
+    return deltas.finish()
+
+
+def close(value, expected):
+    return value is not None and abs(value - expected) < 1e-9
+
+
+def main():
+    failures = []
+
+    # Interpolation linéaire dans le bucket qui contient le rang, comme histogram_quantile
+    buckets = [(0.1, 50.0), (0.5, 90.0), (1.0, 100.0), (float('inf'), 100.0)]
+    if not close(bucket_quantile(0.5, buckets), 0.1):
+        failures.append(f"p50: {bucket_quantile(0.5, buckets)}")
+    if not close(bucket_quantile(0.7, buckets), 0.3):
+        failures.append(f"p70: {bucket_quantile(0.7, buckets)}")
+    if not close(bucket_quantile(0.95, buckets), 0.75):
+        failures.append(f"p95: {bucket_quantile(0.95, buckets)}")
+    # Rang au-delà du dernier bucket fini : la borne finie la plus haute
+    overflow = [(0.1, 10.0), (1.0, 50.0), (float('inf'), 100.0)]
+    if bucket_quantile(0.99, overflow) != 1.0:
+        failures.append(f"+Inf bucket: {bucket_quantile(0.99, overflow)}")
+    if bucket_quantile(0.5, []) is not None or bucket_quantile(0.5, [(1.0, 0.0), (float('inf'), 0.0)]) is not None:
+        failures.append('empty histogram should have no quantile')
+
+    deltas = HistogramDeltas(NAME, ('method', 'route'))
+    group = ('GET', '/api/products')
+    first = scrape(deltas, exposition([('0.1', 40), ('0.5', 80), ('+Inf', 100)], 100))
+    if first:
+        failures.append(f"first scrape has no previous cumulative: {first}")
+
+    # Différence entre deux scrapes : 100 requêtes dont 10 en erreur, toutes sous 100 ms
+    second = scrape(deltas, exposition([('0.1', 140), ('0.5', 180), ('+Inf', 200)], 200, errors=10))
+    stats = second.get(group)
+    if stats is None or stats['requests'] != 100 or not close(stats['error_rate'], 0.1):
+        failures.append(f"delta scrape: {second}")
+    elif not close(stats['p50'], 0.05) or not close(stats['p95'], 0.095):
+        failures.append(f"delta quantiles: {stats}")
+
+    # Redémarrage du backend : les compteurs repartent de zéro, le scrape est lu en entier
+    restarted = scrape(deltas, exposition([('0.1', 0), ('0.5', 30), ('+Inf', 40)], 40))
+    stats = restarted.get(group)
+    if stats is None or stats['requests'] != 40 or stats['error_rate'] != 0:
+        failures.append(f"counter reset: {restarted}")
+    elif not (0.1 < stats['p50'] < 0.5):
+        failures.append(f"counter reset quantiles: {stats}")
+
+    # Aucune activité depuis le scrape précédent : pas de statistiques
+    idle = scrape(deltas, exposition([('0.1', 0), ('0.5', 30), ('+Inf', 40)], 40))
+    if idle:
+        failures.append(f"idle scrape: {idle}")
+
+    # Cumuls du scrape précédent conservés entre deux exécutions cron
+    reloaded = HistogramDeltas(NAME, ('method', 'route'))
+    reloaded.load_state(deltas.to_state())
+    after_reload = scrape(reloaded, exposition([('0.1', 10), ('0.5', 40), ('+Inf', 50)], 50))
+    if after_reload.get(group, {}).get('requests') != 10:
+        failures.append(f"state round-trip: {after_reload}")
+
+    for failure in failures:
+        logging.error(f"❌ {failure}")
+    if not failures:
+        logging.info("✅ Histogrammes Prometheus conformes (quantiles, deltas, redémarrages)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import logging
+import tempfile
+
+from send_limits import SendLimiter, parse_rates
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+
+
+def main():
+    directory = tempfile.mkdtemp(prefix='chicha_send_limits_test_')
+    path = os.path.join(directory, 'send_limits.json')
+    failures = []
+
+    # Seau de 6 envois, puis 6 jetons par minute (un toutes les 10 s)
+    limiter = SendLimiter(path, {'email': 6}, recipient_rate=0, daily_quota=0)
+    now = 1_000_000.0
+    granted = [limiter.acquire('email', now=now) for _ in range(7)]
+    if granted != [True] * 6 + [False] or limiter.deferred.get('email') != 1:
+        failures.append(f"burst: {granted}, deferred {limiter.deferred}")
+    if limiter.acquire('email', now=now + 9):
+        failures.append('token granted before the refill interval')
+    if not limiter.acquire('email', now=now + 10) or limiter.acquire('email', now=now + 10):
+        failures.append('one token expected after 10 s')
+    # Longue inactivité : le seau se remplit jusqu'à sa capacité, pas au-delà
+    tokens = limiter.snapshot(now=now + 3600)['channels']['email']
+    if tokens != 6:
+        failures.append(f"refill beyond capacity: {tokens}")
+
+    # État partagé entre processus : une autre instance voit les jetons consommés
+    other = SendLimiter(path, {'email': 6}, recipient_rate=0, daily_quota=0)
+    if abs(other.snapshot(now=now + 10)['channels']['email']) > 1e-9:
+        failures.append(f"shared state: {other.snapshot(now=now + 10)['channels']}")
+
+    # Débit par destinataire (par heure) et quota quotidien, comptés par destinataire
+    limiter = SendLimiter(os.path.join(directory, 'recipients.json'), {'email': 0}, recipient_rate=2, daily_quota=6)
+    recipients = ['admin@chicha-store.test', 'ops@chicha-store.test']
+    granted = [limiter.acquire('email', recipients, now=now + index) for index in range(3)]
+    if granted != [True, True, False]:
+        failures.append(f"recipient rate: {granted}")
+    if limiter.acquire('email', recipients, now=now + 1800) is not True:
+        failures.append('recipient bucket should refill after 30 min')
+    if limiter.acquire('email', recipients, now=now + 7200):
+        failures.append('daily quota of 6 recipients should be reached')
+
+    # Échec d'envoi : jetons et quota rendus
+    limiter = SendLimiter(os.path.join(directory, 'refund.json'), {'webhook': 1}, recipient_rate=0, daily_quota=2)
+    limiter.acquire('webhook', ['admin@chicha-store.test'], now=now)
+    limiter.refund('webhook', ['admin@chicha-store.test'], now=now)
+    snapshot = limiter.snapshot(now=now)
+    if snapshot['channels']['webhook'] != 1 or snapshot['quota_used'] != 0:
+        failures.append(f"refund: {snapshot}")
+
+    if parse_rates('email=5, webhook=0')['email'] != 5.0 or parse_rates('')['discord'] != 30:
+        failures.append(f"parse_rates: {parse_rates('email=5, webhook=0')}")
+
+    for failure in failures:
+        logging.error(f"❌ {failure}")
+    if not failures:
+        logging.info("✅ Limites d'envoi conformes (seaux, recharge, quota, restitution)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
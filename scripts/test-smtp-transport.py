@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+import sys
+import socket
+import logging
+
+import smtp_transport
+from smtp_sink import SMTPSink
+from smtp_transport import SMTPTransport, get_transport
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+
+SENDER = 'monitoring@chicha-store.test'
+RECIPIENTS = ['admin@chicha-store.test']
+
+
+def message(index):
+    return f"Subject: Alerte {index}\r\n\r\nCorps {index}\r\n"
+
+
+def main():
+    failures = []
+    sink = SMTPSink(starttls=True).start()
+    try:
+        # Session persistante : STARTTLS et connexion payés une seule fois pour dix emails
+        transport = SMTPTransport('127.0.0.1', sink.port, SENDER, 'secret', cafile=sink.certfile)
+        sent = sum(transport.send(message(index), SENDER, RECIPIENTS) for index in range(10))
+        if sent != 10 or sink.received != 10 or sink.connections != 1 or sink.tls_sessions != 1:
+            failures.append(f"reuse: {sent} sent, {sink.received} received, "
+                            f"{sink.connections} connection(s), {sink.tls_sessions} TLS session(s)")
+
+        # Session coupée entre deux envois : une seule reconnexion, aucun message perdu
+        transport._connection.sock.shutdown(socket.SHUT_RDWR)
+        if not transport.send(message(10), SENDER, RECIPIENTS) or sink.received != 11 \
+                or transport.connections_opened != 2:
+            failures.append(f"reconnection: {sink.received} received, {transport.connections_opened} connection(s)")
+
+        # Session inactive au-delà de max_idle : fermée et rouverte avant l'envoi
+        transport._last_used -= transport.max_idle + 1
+        transport.send(message(11), SENDER, RECIPIENTS)
+        if transport.connections_opened != 3 or sink.received != 12:
+            failures.append(f"max idle: {transport.connections_opened} connection(s), {sink.received} received")
+        transport.close()
+
+        # Lot : une connexion pour toute la série
+        connections = sink.connections
+        with SMTPTransport('127.0.0.1', sink.port, SENDER, 'secret', cafile=sink.certfile) as batch:
+            accepted = batch.send_batch([(message(index), SENDER, RECIPIENTS) for index in range(5)])
+        if accepted != 5 or sink.connections - connections != 1:
+            failures.append(f"batch: {accepted} accepted over {sink.connections - connections} connection(s)")
+
+        # Transport partagé par processus : même serveur et même compte, même session
+        options = {'cafile': sink.certfile}
+        shared = get_transport('127.0.0.1', sink.port, SENDER, 'secret', **options)
+        if get_transport('127.0.0.1', sink.port, SENDER, 'secret', **options) is not shared:
+            failures.append('get_transport did not reuse the transport of the same account')
+        if get_transport('127.0.0.1', sink.port, SENDER, 'rotated', **options) is shared:
+            failures.append('get_transport kept a transport after a password change')
+        smtp_transport.close_all()
+    finally:
+        sink.close()
+
+    for failure in failures:
+        logging.error(f"❌ {failure}")
+    if not failures:
+        logging.info("✅ Transport SMTP conforme (session réutilisée, reconnexion, inactivité, partage)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import logging
+import tempfile
+import threading
+import subprocess
+import importlib.util
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from check_registry import NORMAL, CRITICAL
+from system_stats import disk_usage, load_average, usable_cpus
+
+# Configuré avant le chargement d'email-monitoring.py : son basicConfig (fichier sous /var/log) est sans effet
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class _StatusHandler(BaseHTTPRequestHandler):
+    """Site simulé : statut HTTP choisi par `server.status`"""
+
+    def do_GET(self):
+        self.send_response(self.server.status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def load_email_monitoring():
+    spec = importlib.util.spec_from_file_location('email_monitoring', os.path.join(SCRIPTS_DIR, 'email-monitoring.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def forbidden(*args, **kwargs):
+    raise AssertionError('process forked during a check')
+
+
+def main():
+    failures = []
+
+    # Mêmes valeurs que df, nproc et /proc/loadavg
+    usage = disk_usage('/')
+    df = subprocess.run(['df', '-P', '-k', '/'], capture_output=True, text=True, check=True).stdout.splitlines()[1]
+    df_percent = int(df.split()[4].rstrip('%'))
+    if not df_percent - 1 <= usage.percent <= df_percent:
+        failures.append(f"disk_usage: {usage.percent}% vs df {df_percent}%")
+    if abs(usage.free // 1024 - int(df.split()[3])) > max(1024, int(df.split()[3]) // 100):
+        failures.append(f"disk_usage free: {usage.free // 1024} KiB vs df {df.split()[3]} KiB")
+    nproc = int(subprocess.run(['nproc'], capture_output=True, text=True, check=True).stdout)
+    if usable_cpus() != nproc:
+        failures.append(f"usable_cpus: {usable_cpus()} vs nproc {nproc}")
+    with open('/proc/loadavg') as f:
+        loadavg = float(f.read().split()[0])
+    if abs(load_average() - loadavg) > 0.5:
+        failures.append(f"load_average: {load_average()} vs /proc/loadavg {loadavg}")
+
+    # Checks d'EmailMonitoring sans aucun fork (df, uptime, nproc et curl remplacés)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StatusHandler)
+    server.daemon_threads = True
+    server.status = 200
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    directory = tempfile.mkdtemp(prefix='chicha_system_stats_test_')
+    os.environ.update({
+        'PUBLIC_WEBSITE_URL': f"http://127.0.0.1:{server.server_address[1]}/",
+        'EMAIL_MONITORING_STATE_FILE': os.path.join(directory, 'state.json'),
+        'SEND_LIMITS_STATE_FILE': os.path.join(directory, 'send_limits.json'),
+    })
+    monitoring = load_email_monitoring().EmailMonitoring()
+    popen, fork = subprocess.Popen, os.fork
+    subprocess.Popen = os.fork = forbidden
+    try:
+        results = monitoring.checks.run(budget=10)
+        server.status = 503
+        down = monitoring.checks.run(budget=10)['Website Status']
+    finally:
+        subprocess.Popen, os.fork = popen, fork
+    if results['Disk Space'].value != usage.percent or results['System Load'].value is None:
+        failures.append(f"system checks: {[results['Disk Space'], results['System Load']]}")
+    if results['Website Status'].severity != NORMAL or down.severity != CRITICAL or down.value != 503:
+        failures.append(f"website check: {results['Website Status']!r} then {down!r}")
+    monitoring.probes.close()
+    server.shutdown()
+
+    for failure in failures:
+        logging.error(f"❌ {failure}")
+    if not failures:
+        logging.info("✅ Statistiques système conformes (df, nproc, loadavg, aucun fork)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+from array import array
+
+
+class RingSeries:
+    """Série temporelle à capacité fixe, stockée dans deux array('d')
+
+    Aucun objet n'est alloué par échantillon : 16 octets par point, soit environ
+    1,4 Mo pour une journée d'échantillons à la seconde. Les tableaux grandissent
+    jusqu'à la capacité puis sont réécrits en place.
+    """
+
+    __slots__ = ('capacity', 'timestamps', 'values', 'head', 'count')
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.timestamps = array('d')
+        self.values = array('d')
+        # Position de la prochaine écriture et nombre de points valides
+        self.head = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, timestamp, value):
+        if self.count < self.capacity:
+            self.timestamps.append(timestamp)
+            self.values.append(value)
+            self.count += 1
+        else:
+            self.timestamps[self.head] = timestamp
+            self.values[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+
+    def _physical(self, index):
+        """Position dans les tableaux du index-ième point (0 = le plus ancien)"""
+        return (self.head - self.count + index) % self.capacity
+
+    def _first_index_since(self, since):
+        """Recherche dichotomique du premier point de timestamp >= since"""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.timestamps[self._physical(middle)] < since:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def latest(self):
+        """Dernier point (timestamp, valeur) ou None"""
+        if not self.count:
+            return None
+        position = (self.head - 1) % self.capacity
+        return self.timestamps[position], self.values[position]
+
+    def window(self, since=None):
+        """Points (timestamps, valeurs) depuis `since`, du plus ancien au plus récent"""
+        start = 0 if since is None else self._first_index_since(since)
+        begin = self._physical(start)
+        length = self.count - start
+        if begin + length <= self.capacity:
+            return self.timestamps[begin:begin + length], self.values[begin:begin + length]
+        split = self.capacity - begin
+        return (self.timestamps[begin:] + self.timestamps[:length - split],
+                self.values[begin:] + self.values[:length - split])
+
+    def mean(self, since=None):
+        _, values = self.window(since)
+        return sum(values) / len(values) if values else None
+
+    def rate(self, since=None):
+        """Variation par seconde entre le premier et le dernier point de la fenêtre"""
+        timestamps, values = self.window(since)
+        if len(values) < 2 or timestamps[-1] == timestamps[0]:
+            return None
+        return (values[-1] - values[0]) / (timestamps[-1] - timestamps[0])
+
+    def trend(self, since=None):
+        """Pente de la régression linéaire (unités par seconde) sur la fenêtre"""
+        timestamps, values = self.window(since)
+        n = len(values)
+        if n < 2:
+            return None
+        origin = timestamps[0]
+        mean_t = sum(t - origin for t in timestamps) / n
+        mean_v = sum(values) / n
+        covariance = variance = 0.0
+        for t, v in zip(timestamps, values):
+            dt = t - origin - mean_t
+            covariance += dt * (v - mean_v)
+            variance += dt * dt
+        return covariance / variance if variance else None
+
+    def percentile(self, percent, since=None):
+        """Percentile (0-100) par interpolation linéaire sur la fenêtre"""
+        _, values = self.window(since)
+        if not values:
+            return None
+        ordered = sorted(values)
+        rank = (len(ordered) - 1) * percent / 100
+        lower = int(rank)
+        upper = min(lower + 1, len(ordered) - 1)
+        return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+class TimeSeriesStore:
+    """Ensemble de séries nommées partageant la même capacité"""
+
+    def __init__(self, capacity=172800):
+        self.capacity = capacity
+        self.series = {}
+
+    def record(self, name, timestamp, value):
+        if value is None:
+            return
+        series = self.series.get(name)
+        if series is None:
+            series = self.series[name] = RingSeries(self.capacity)
+        series.append(timestamp, value)
+
+    def get(self, name):
+        return self.series.get(name)
+
+    def memory_bytes(self):
+        return sum(series.timestamps.itemsize * len(series.timestamps) * 2
+                   for series in self.series.values())